@@ -6,6 +6,7 @@
 import os
 import re
 import shutil
+import sys
 import threading
 import time
 from datetime import datetime, timedelta
@@ -15,6 +16,7 @@ from cached_property import cached_property
 
 from module.base.decorator import del_cached_property
 from module.base.api_client import ApiClient
+from module.base.frame_diff import FRAME_DIFF
 from module.config.config import AzurLaneConfig, TaskEnd
 from module.config.deep import deep_get, deep_set
 from module.exception import *
@@ -369,6 +371,8 @@ class AzurLaneAutoScript:
             folder.mkdir(parents=True, exist_ok=True)
             logger.warning(f'Saving error: {folder}')
 
+            self.device.screenshot_deque.log()
+            # Frames are decoded one by one
             for data in self.device.screenshot_deque:
                 image_time = datetime.strftime(data['time'], '%Y-%m-%d_%H-%M-%S-%f')
                 image = handle_sensitive_image(data['image'])
@@ -701,19 +705,15 @@ class AzurLaneAutoScript:
         """
         future = future + timedelta(seconds=1)
         self.config.start_watching()
-        while 1:
-            if datetime.now() > future:
-                return True
-            if self.stop_event is not None:
-                if self.stop_event.is_set():
-                    logger.info("Update event detected")
-                    logger.info(f"[{self.config_name}] exited. Reason: Update")
-                    exit(0)
-
-            time.sleep(5)
-
-            if self.config.should_reload():
-                return False
+        # Sleep until future, woken up immediately by config modifications or update event
+        if not self.config.wait_change(future, stop_event=self.stop_event):
+            return True
+        if self.stop_event is not None:
+            if self.stop_event.is_set():
+                logger.info("Update event detected")
+                logger.info(f"[{self.config_name}] exited. Reason: Update")
+                exit(0)
+        return False
 
     def get_next_task(self):
         """
@@ -835,6 +835,13 @@ class AzurLaneAutoScript:
                 logger.hr(task, level=0)
                 success = self.run(inflection.underscore(task))
                 logger.info(f'Scheduler: End task `{task}`')
+                FRAME_DIFF.log()
+                if self.device.input_dispatcher is not None:
+                    self.device.input_dispatcher.log()
+                # Write buffered CL1 statistics, if the task used them
+                cl1_database = sys.modules.get('module.statistics.cl1_database')
+                if cl1_database is not None:
+                    cl1_database.db.flush()
                 self.is_first_task = False
 
                 # Check failures
@@ -0,0 +1,160 @@
+import importlib
+import json
+import os
+
+import numpy as np
+
+import module.config.server as server
+from module.base.asset_pack import (ASSET_PACK, PACK_FOLDER, PACK_HEADER, PACK_MAGIC, PACK_VERSION, align,
+                                    button_key, data_start, pack_file, source_signature)
+from module.base.button import Button
+from module.base.mask import Mask
+from module.base.template import Template
+from module.config.server import VALID_SERVER
+from module.logger import logger
+
+MODULE_FOLDER = './module'
+
+
+def import_all_assets():
+    """
+    Import all module/*/assets.py
+
+    Returns:
+        list[Button, Template]: All buttons and templates.
+            Resource.instances can't be used, buttons sharing the same file override each other there.
+    """
+    assets = []
+    for root, _, files in os.walk(MODULE_FOLDER):
+        if 'assets.py' not in files:
+            continue
+        name = os.path.relpath(os.path.join(root, 'assets'), '.').replace('\\', '/').replace('/', '.')
+        module = importlib.import_module(name)
+        for obj in vars(module).values():
+            if isinstance(obj, (Button, Template)):
+                assets.append(obj)
+    return assets
+
+
+class AssetPackBuilder:
+    """
+    Pack all assets of a server into ./assets/pack/<server>.pack,
+    which is memory-mapped by Button and Template at runtime, see module/base/asset_pack.py
+
+    Run in the root folder of Alas:
+        python -m dev_tools.asset_pack
+    Re-run it after updating assets, modified assets won't be read from pack.
+    """
+
+    def __init__(self, s, assets):
+        """
+        Args:
+            s (str): Server
+            assets (list[Button, Template]):
+        """
+        self.server = s
+        self.assets = assets
+        self.index = {}
+        self.chunks = []
+        self.length = 0
+
+    def add_array(self, image):
+        """
+        Returns:
+            list: [offset, shape]
+        """
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        offset = self.length
+        self.chunks.append(image.tobytes())
+        padding = align(image.nbytes) - image.nbytes
+        if padding:
+            self.chunks.append(b'\x00' * padding)
+        self.length += image.nbytes + padding
+        return [offset, list(image.shape)]
+
+    def add(self, key, file, is_gif, image, binary, luma):
+        if key in self.index:
+            return
+        if not is_gif:
+            image, binary, luma = [image], [binary], [luma]
+        self.index[key] = {
+            'source': source_signature(file),
+            'gif': is_gif,
+            'image': [self.add_array(frame) for frame in image],
+            'binary': [self.add_array(frame) for frame in binary],
+            'luma': [self.add_array(frame) for frame in luma],
+        }
+
+    def add_button(self, button):
+        """
+        Args:
+            button (Button):
+        """
+        button.resource_release()
+        if not button.file or not os.path.exists(button.file):
+            return
+        button.ensure_template()
+        button.ensure_binary_template()
+        button.ensure_luma_template()
+        self.add(
+            key=button_key(button.file, button.area), file=button.file, is_gif=button.is_gif,
+            image=button.image, binary=button.image_binary, luma=button.image_luma)
+        button.resource_release()
+
+    def add_template(self, template):
+        """
+        Args:
+            template (Template):
+        """
+        template.resource_release()
+        if not template.file or not os.path.exists(template.file):
+            return
+        self.add(
+            key=template.file, file=template.file, is_gif=template.is_gif,
+            image=template.image, binary=template.image_binary, luma=template.image_luma)
+        template.resource_release()
+
+    def build(self):
+        logger.hr(f'Asset pack {self.server}', level=1)
+        server.server = self.server
+        for obj in self.assets:
+            try:
+                if isinstance(obj, Mask):
+                    # Mask has its own loading
+                    continue
+                elif isinstance(obj, Template):
+                    if type(obj).pre_process is Template.pre_process:
+                        self.add_template(obj)
+                elif isinstance(obj, Button):
+                    self.add_button(obj)
+            except Exception as e:
+                logger.warning(f'Failed to pack {obj}: {e}')
+
+    def write(self):
+        index = json.dumps(self.index).encode('utf-8')
+        header = PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index))
+        padding = data_start(len(index)) - len(header) - len(index)
+        file = pack_file(self.server)
+        os.makedirs(PACK_FOLDER, exist_ok=True)
+        with open(file, 'wb') as f:
+            f.write(header)
+            f.write(index)
+            f.write(b'\x00' * padding)
+            for chunk in self.chunks:
+                f.write(chunk)
+        logger.info(f'Asset pack saved: {file}, {len(self.index)} assets, {self.length / 1048576:.1f}MB')
+
+
+def build_all():
+    # Decode from asset files, not from existing packs
+    ASSET_PACK.enabled = False
+    assets = import_all_assets()
+    for s in VALID_SERVER:
+        builder = AssetPackBuilder(s, assets)
+        builder.build()
+        builder.write()
+    server.server = 'cn'
+
+
+if __name__ == '__main__':
+    build_all()
@@ -0,0 +1,187 @@
+"""
+Benchmark config load and bind per scheduler loop, with and without `CONFIG_CACHE`,
+and `ConfigUpdater.read_file()` with the legacy update loop, the compiled update plan and the memoized result.
+
+Run in the root folder of Alas:
+    python -m dev_tools.config_benchmark
+"""
+import logging
+import os
+import random
+import shutil
+import time
+
+from module.config.config import CONFIG_CACHE, AzurLaneConfig
+from module.config.config_updater import ConfigUpdatePlan, ConfigUpdater
+from module.config.deep import deep_get, deep_iter, deep_set
+from module.config.utils import filepath_config, parse_value, read_file, write_file
+from module.logger import logger
+
+BENCHMARK_CONFIG = 'config_benchmark'
+TASKS = ['Alas', 'Commission', 'Main', 'OpsiExplore', 'Event']
+
+
+class LegacyUpdatePlan(ConfigUpdatePlan):
+    """
+    The update loop that `ConfigUpdater.config_update()` used to run.
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+    def update(self, old, is_template=False):
+        new = {}
+        for keys, data in deep_iter(self.args, depth=3):
+            if not isinstance(data, dict):
+                continue
+            value = deep_get(old, keys=keys, default=data['value'])
+            typ = data['type']
+            display = data.get('display')
+            if is_template or value is None or value == '' \
+                    or typ in ['lock', 'state'] or (display == 'hide' and typ != 'stored'):
+                value = data['value']
+            value = parse_value(value, data=data)
+            deep_set(new, keys=keys, value=value)
+        return new
+
+
+def scramble(file, seed=1):
+    """
+    Make a config look like an old user config: missing, empty, stringified and out-of-option values.
+    """
+    rng = random.Random(seed)
+    data = read_file(file)
+    for keys, value in list(deep_iter(data, depth=3)):
+        r = rng.random()
+        if r < 0.05:
+            group = deep_get(data, keys[:2])
+            group.pop(keys[2], None)
+        elif r < 0.10:
+            deep_set(data, keys, '')
+        elif r < 0.20 and not isinstance(value, (dict, list)):
+            deep_set(data, keys, str(value))
+        elif r < 0.25:
+            deep_set(data, keys, 'not_an_option')
+    write_file(file, data)
+
+
+def update_tick(updater, config_name, mode):
+    """
+    Args:
+        updater (ConfigUpdater):
+        config_name (str):
+        mode (str): legacy, plan, memo
+    """
+    if mode != 'memo':
+        ConfigUpdater._update_memo.clear()
+    return updater.read_file(config_name)
+
+
+def benchmark_update(config_name, mode, total=20):
+    """
+    Returns:
+        float: Average cost of a read_file() in ms
+    """
+    updater = ConfigUpdater()
+    if mode == 'legacy':
+        updater.update_plan = LegacyUpdatePlan(updater.args)
+    ConfigUpdater._update_memo.clear()
+    update_tick(updater, config_name, mode)
+    start = time.perf_counter()
+    for _ in range(total):
+        update_tick(updater, config_name, mode)
+    cost = time.perf_counter() - start
+    return cost / total * 1000
+
+
+def scheduler_tick(config_name):
+    """
+    What scheduler does in one loop: re-create config, then bind tasks.
+    """
+    if not CONFIG_CACHE.enabled:
+        # Read args.json and update config file on every new config, as it used to be
+        ConfigUpdater._args_cache = (None, None)
+        ConfigUpdater._update_memo.clear()
+    config = AzurLaneConfig(config_name)
+    for task in TASKS:
+        config.bind(task)
+    return config
+
+
+def benchmark(config_name, enabled, total=20):
+    """
+    Returns:
+        float: Average cost of a scheduler tick in ms
+    """
+    CONFIG_CACHE.clear()
+    CONFIG_CACHE.enabled = enabled
+    # Warm up, the first load always reads file
+    scheduler_tick(config_name)
+    # Console rendering of "Bind task" logs is not counted
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        start = time.perf_counter()
+        for _ in range(total):
+            scheduler_tick(config_name)
+        cost = time.perf_counter() - start
+    finally:
+        logger.setLevel(level)
+    return cost / total * 1000
+
+
+def run(source='template'):
+    """
+    Args:
+        source (str): Config to benchmark, copied to ./config/config_benchmark.json,
+            so the source config won't be modified.
+    """
+    file = filepath_config(BENCHMARK_CONFIG)
+    shutil.copyfile(filepath_config(source), file)
+    try:
+        # Bind results must be the same
+        CONFIG_CACHE.enabled = False
+        before = scheduler_tick(BENCHMARK_CONFIG)
+        CONFIG_CACHE.enabled = True
+        scheduler_tick(BENCHMARK_CONFIG)
+        after = scheduler_tick(BENCHMARK_CONFIG)
+        assert before.bound == after.bound
+        assert all(getattr(before, arg) == getattr(after, arg) for arg in before.bound)
+
+        cost_before = benchmark(BENCHMARK_CONFIG, enabled=False)
+        cost_after = benchmark(BENCHMARK_CONFIG, enabled=True)
+
+        # Load path, on an old-looking config
+        scramble(file)
+        legacy = ConfigUpdater()
+        legacy.update_plan = LegacyUpdatePlan(legacy.args)
+        for is_template in [False, True]:
+            ConfigUpdater._update_memo.clear()
+            expected = legacy.read_file(BENCHMARK_CONFIG, is_template=is_template)
+            ConfigUpdater._update_memo.clear()
+            assert ConfigUpdater().read_file(BENCHMARK_CONFIG, is_template=is_template) == expected
+            assert ConfigUpdater().read_file(BENCHMARK_CONFIG, is_template=is_template) == expected
+        level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            cost_update = {mode: benchmark_update(BENCHMARK_CONFIG, mode) for mode in ['legacy', 'plan', 'memo']}
+        finally:
+            logger.setLevel(level)
+
+        logger.hr('Config benchmark', level=1)
+        logger.attr('Tasks bound per tick', len(TASKS))
+        logger.attr('Before', f'{cost_before:.2f}ms')
+        logger.attr('After', f'{cost_after:.2f}ms')
+        logger.attr('read_file, legacy', f'{cost_update["legacy"]:.2f}ms')
+        logger.attr('read_file, update plan', f'{cost_update["plan"]:.2f}ms')
+        logger.attr('read_file, memoized', f'{cost_update["memo"]:.2f}ms')
+    finally:
+        CONFIG_CACHE.enabled = True
+        CONFIG_CACHE.clear()
+        ConfigUpdater._update_memo.clear()
+        if os.path.exists(file):
+            os.remove(file)
+
+
+if __name__ == '__main__':
+    run()
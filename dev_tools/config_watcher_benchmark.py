@@ -0,0 +1,114 @@
+"""
+Measure how fast a waiting scheduler reacts to config modifications and stop events.
+
+Run in the root folder of Alas:
+    python -m dev_tools.config_watcher_benchmark
+"""
+import os
+import random
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+
+from deploy.atomic import atomic_write
+from module.config.file_watcher import FolderWatcher, _folder_watchers, get_folder_watcher
+from module.config.utils import filepath_config
+from module.config.watcher import ConfigWatcher
+from module.logger import logger
+
+TEST_CONFIG = 'config_watcher_test'
+
+
+class Watcher(ConfigWatcher):
+    config_name = TEST_CONFIG
+
+
+def edit_later(file, delay, record):
+    """
+    Modify file after `delay` seconds like GUI does, record the time of modification.
+    """
+    time.sleep(delay)
+    with open(file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    record.append(time.perf_counter())
+    atomic_write(file, content + ' ')
+
+
+def set_later(event, delay, record):
+    time.sleep(delay)
+    record.append(time.perf_counter())
+    event.set()
+
+
+def measure(trigger, total=5):
+    """
+    Args:
+        trigger (callable): Function to start a trigger thread, receives the time record list
+        total (int):
+
+    Returns:
+        list[float]: Reaction latency in ms
+    """
+    latency = []
+    watcher = Watcher()
+    for _ in range(total):
+        record = []
+        stop_event = threading.Event()
+        watcher.start_watching()
+        thread = trigger(record, stop_event)
+        # Without triggers, wait ends in 30s
+        result = watcher.wait_change(datetime.now() + timedelta(seconds=30), stop_event=stop_event)
+        woken = time.perf_counter()
+        thread.join()
+        if not result or not record:
+            logger.warning('Wait ended without trigger')
+            continue
+        latency.append((woken - record[0]) * 1000)
+    return latency
+
+
+def trigger_file_edit(record, stop_event):
+    thread = threading.Thread(
+        target=edit_later, args=(filepath_config(TEST_CONFIG), random.uniform(0.2, 1.5), record))
+    thread.start()
+    return thread
+
+
+def trigger_stop_event(record, stop_event):
+    thread = threading.Thread(target=set_later, args=(stop_event, random.uniform(0.2, 1.5), record))
+    thread.start()
+    return thread
+
+
+def report(name, latency):
+    if latency:
+        logger.attr(name, f'avg {sum(latency) / len(latency):.1f}ms, max {max(latency):.1f}ms')
+    else:
+        logger.attr(name, 'no result')
+
+
+def run(source='template'):
+    file = filepath_config(TEST_CONFIG)
+    shutil.copyfile(filepath_config(source), file)
+    folder = os.path.dirname(file)
+    try:
+        logger.hr('Config watcher test', level=1)
+        watcher = get_folder_watcher(folder)
+        logger.attr('Watcher', watcher.__class__.__name__)
+        report('File edit', measure(trigger_file_edit))
+        report('Stop event', measure(trigger_stop_event))
+
+        # Stat polling fallback
+        _folder_watchers[os.path.abspath(folder)] = FolderWatcher(folder)
+        logger.attr('Watcher', 'FolderWatcher, polling')
+        report('File edit', measure(trigger_file_edit))
+        report('Stop event', measure(trigger_stop_event))
+    finally:
+        _folder_watchers.pop(os.path.abspath(folder), None)
+        if os.path.exists(file):
+            os.remove(file)
+
+
+if __name__ == '__main__':
+    run()
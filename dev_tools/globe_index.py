@@ -0,0 +1,46 @@
+"""
+Build the image pyramid of OS globe map into ./assets/pack/os_globe.index,
+which is memory-mapped by GlobeDetection at runtime, see module/os/globe_index.py
+
+Run in the root folder of Alas:
+    python -m dev_tools.globe_index
+Re-run it after updating os_globe_map.png or OS_GLOBE_* parameters, outdated index won't be used.
+"""
+import time
+
+import numpy as np
+
+from module.base.asset_pack import source_signature
+from module.config.config import AzurLaneConfig
+from module.logger import logger
+from module.os.globe_detection import GLOBE_MAP, GlobeDetection
+from module.os.globe_index import GlobeIndex
+
+
+def build(config='template'):
+    """
+    Args:
+        config (str): Config to read settings, it won't be modified.
+    """
+    config = AzurLaneConfig(config, task='Alas')
+    globe = GlobeDetection(config)
+    logger.hr('Globe index', level=1)
+
+    start = time.time()
+    index = GlobeIndex.build(globe.globe_image(), source=source_signature(GLOBE_MAP), params=globe.globe_params())
+    logger.attr('Build', f'{time.time() - start:.3f}s')
+    for factor, image in index.levels:
+        logger.attr(f'Level 1/{factor}', f'{image.shape[1]}x{image.shape[0]}')
+    index.save()
+
+    # Check that the saved index is readable
+    start = time.time()
+    loaded = GlobeIndex.load(source=source_signature(GLOBE_MAP), params=globe.globe_params())
+    if loaded is None or not np.array_equal(loaded.image, index.image):
+        logger.warning('Failed to load the saved globe index')
+        return
+    logger.attr('Load', f'{time.time() - start:.3f}s')
+
+
+if __name__ == '__main__':
+    build()
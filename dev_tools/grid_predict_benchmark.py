@@ -0,0 +1,170 @@
+"""
+Benchmark `View.predict()` on all campaign maps, per grid prediction versus batched by `GridBatch`,
+and check that both give the same grid info.
+
+Screenshots are read from ./screenshots/map/<campaign module>, such as ./screenshots/map/campaign_main/campaign_7_2
+Maps without screenshots are skipped. If no map has screenshots, a synthetic view on random pixels
+is predicted with the settings of each map, which measures cost but not detection.
+
+Run in the root folder of Alas:
+    python -m dev_tools.grid_predict_benchmark
+"""
+import copy
+import importlib
+import logging
+import os
+import time
+
+import numpy as np
+
+from dev_tools.path_benchmark import import_all_maps
+from module.base.utils import area_in_area, load_image
+from module.config.config import AzurLaneConfig
+from module.exception import MapDetectionError
+from module.logger import logger
+from module.map.camera import Camera
+from module.map_detection.grid_predictor import GridBatch
+from module.map_detection.homography import Homography
+from module.map_detection.utils import corner2area
+from module.map_detection.view import View
+
+SCREENSHOT_FOLDER = './screenshots/map'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+# Grid info written by `GridPredictor.predict()`
+ATTRIBUTES = ['enemy_scale', 'enemy_genre', 'is_enemy', 'is_boss', 'is_siren', 'is_submarine', 'is_fleet',
+              'is_mystery', 'is_current_fleet', 'is_missile_attack']
+# A camera of 7-2, for synthetic views
+SYNTHETIC_STORAGE = ((8, 3), [(80.773, 281.635), (1164.829, 281.635), (-20.123, 609.332), (1259.794, 609.332)])
+
+
+def map_settings(base, name, config_class):
+    """
+    Args:
+        base (AzurLaneConfig):
+        name (str): Campaign module name
+        config_class: Config class in campaign module
+
+    Returns:
+        tuple[AzurLaneConfig, type]: Config merged with the campaign one, grid class of the campaign.
+    """
+    config = copy.copy(base).merge(config_class())
+    campaign = getattr(importlib.import_module(name), 'Campaign', None)
+    return config, getattr(campaign, 'grid_class', Camera.grid_class)
+
+
+def recorded_views(name, config, grid_class):
+    """
+    Yields:
+        callable: Function that creates a loaded View, grids are new on every call.
+    """
+    folder = os.path.join(SCREENSHOT_FOLDER, *name.split('.')[1:])
+    if not os.path.isdir(folder):
+        return
+    for file in sorted(os.listdir(folder)):
+        if not file.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = load_image(os.path.join(folder, file))
+        view = View(config, grid_class=grid_class)
+        try:
+            view.load(image)
+        except MapDetectionError:
+            continue
+
+        def create(view=view, image=image):
+            view.load(image)
+            return view
+
+        yield create
+
+
+def synthetic_view(config, grid_class, seed=0):
+    """
+    Returns:
+        callable: Function that creates grids on random pixels.
+    """
+    homography = Homography(config)
+    homography.find_homography(*SYNTHETIC_STORAGE)
+    homography.homo_loca = np.array([26, 58])
+    homography.left_edge, homography.right_edge, homography.lower_edge, homography.upper_edge = \
+        False, False, False, False
+    image = np.random.default_rng(seed).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    points = [(loca, corner) for loca, corner in homography.generate()
+              if area_in_area(corner2area(corner), config.DETECTING_AREA)]
+
+    def create():
+        view = View(config, grid_class=grid_class)
+        view.grids = {loca: grid_class(location=loca, image=image, corner=corner, config=config)
+                      for loca, corner in points}
+        return view
+
+    return create
+
+
+def predict(view, batch):
+    """
+    Returns:
+        tuple[float, dict]: Seconds, grid info
+    """
+    start = time.perf_counter()
+    if batch:
+        GridBatch(view.grids.values()).prefetch()
+    for grid in view:
+        grid.predict()
+    cost = time.perf_counter() - start
+    info = {loca: tuple(getattr(grid, attr, None) for attr in ATTRIBUTES) for loca, grid in view.grids.items()}
+    return cost, info
+
+
+def run(rounds=3):
+    """
+    Args:
+        rounds (int): Predictions on each view, the fastest is taken.
+    """
+    base = AzurLaneConfig('template', task='Alas')
+    maps = import_all_maps()
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    views = []
+    try:
+        settings = {name: map_settings(base, name, config_class) for name, _, config_class in maps}
+        for name, (config, grid_class) in settings.items():
+            views += [(name, create) for create in recorded_views(name, config, grid_class)]
+        synthetic = not views
+        if synthetic:
+            for name, (config, grid_class) in settings.items():
+                views.append((name, synthetic_view(config, grid_class)))
+
+        cost_grid, cost_batch, grids, predicted, mismatch, failed = 0., 0., 0, 0, [], []
+        for name, create in views:
+            best_grid, best_batch = [], []
+            try:
+                for _ in range(rounds):
+                    c, info_grid = predict(create(), batch=False)
+                    best_grid.append(c)
+                    c, info_batch = predict(create(), batch=True)
+                    best_batch.append(c)
+                    if info_grid != info_batch:
+                        mismatch.append(name)
+            except Exception as e:
+                # Missing or broken templates of the map, fails the same without GridBatch
+                logger.warning(f'{name}: {e.__class__.__name__}')
+                failed.append(name)
+                continue
+            predicted += 1
+            cost_grid += min(best_grid)
+            cost_batch += min(best_batch)
+            grids += len(info_grid)
+    finally:
+        logger.setLevel(level)
+
+    logger.hr('Grid prediction benchmark', level=1)
+    logger.attr('Views', f'{predicted} ({"synthetic" if synthetic else "recorded"}), {len(failed)} failed')
+    logger.attr('Grids', grids)
+    if predicted:
+        logger.attr('Per grid', f'{cost_grid / predicted * 1000:.2f}ms per view')
+        logger.attr('GridBatch', f'{cost_batch / predicted * 1000:.2f}ms per view')
+    logger.attr('Mismatch', f'{sorted(set(mismatch))}')
+
+
+if __name__ == '__main__':
+    run()
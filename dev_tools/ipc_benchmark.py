@@ -0,0 +1,173 @@
+"""
+Benchmark nemu_ipc and ldopengl screenshots without MuMu or LDPlayer,
+a stub shared library stands in for the emulator, see dev_tools/ipc_stub.c
+
+The stub is compiled into ./assets/pack/ipc_stub/ with a C compiler, `cc` by default, set CC to use another one.
+Time is the cost of capture and conversion on Alas side, copying frames in the stub is included.
+
+Run in the root folder of Alas:
+    python -m dev_tools.ipc_benchmark
+"""
+import ctypes
+import os
+import subprocess
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+from rich.table import Table
+
+from module.device.method.ldopengl import LDOpenGL, LDOpenGLImpl
+from module.device.method.nemu_ipc import NemuIpc, NemuIpcImpl
+from module.device.method.utils import FrameBuffer
+from module.logger import logger
+
+STUB_SOURCE = './dev_tools/ipc_stub.c'
+STUB_FOLDER = './assets/pack/ipc_stub'
+# Where NemuIpcImpl looks for the library
+STUB_NEMU_DLL = 'shell/sdk/external_renderer_ipc.dll'
+
+
+def build_stub():
+    """
+    Returns:
+        str: Folder to be used as nemu_folder.
+    """
+    file = os.path.join(STUB_FOLDER, STUB_NEMU_DLL)
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    cmd = [os.environ.get('CC', 'cc'), '-O2', '-shared', '-fPIC', '-o', file, STUB_SOURCE]
+    logger.info(f'Build stub: {" ".join(cmd)}')
+    subprocess.run(cmd, check=True)
+    return os.path.abspath(STUB_FOLDER)
+
+
+class StubScreenShotInstance:
+    """
+    Replaces IScreenShotClass, whose vtable calls are Windows only.
+    """
+
+    def __init__(self, lib):
+        self.lib = lib
+        self.lib.ld_capture.restype = ctypes.c_void_p
+
+    def cap(self):
+        return self.lib.ld_capture()
+
+
+class StubDevice:
+    """
+    Attributes that screenshot methods of Screenshot mixins need.
+    """
+
+    def __init__(self, nemu_ipc=None, ldopengl=None):
+        self.nemu_ipc = nemu_ipc
+        self.ldopengl = ldopengl
+        self.orientation = 0
+        self.frame_buffer = FrameBuffer(size=2)
+
+
+def _screenshot(impl):
+    """
+    NemuIpcImpl._screenshot() allocating a new buffer each time, as it was.
+    Same name as the method, so `run_func()` treats it the same.
+    """
+    impl.get_resolution(on_thread=False)
+    width_ptr = ctypes.pointer(ctypes.c_int(impl.width))
+    height_ptr = ctypes.pointer(ctypes.c_int(impl.height))
+    length = impl.width * impl.height * 4
+    pixels_pointer = ctypes.pointer((ctypes.c_ubyte * length)())
+    impl.lib.nemu_capture_display(impl.connect_id, impl.display_id, length, width_ptr, height_ptr, pixels_pointer)
+    return pixels_pointer
+
+
+def nemu_ipc_allocating(device):
+    impl = device.nemu_ipc
+    pixels_pointer = impl.run_func(_screenshot, impl)
+    image = np.ctypeslib.as_array(pixels_pointer.contents).reshape((impl.height, impl.width, 4))
+    image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    cv2.flip(image, 0, dst=image)
+    return image
+
+
+def ldopengl_allocating(device):
+    image = device.ldopengl.screenshot()
+    image = cv2.flip(image, 0)
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+    return image
+
+
+def run(total=300, resolution=(1280, 720)):
+    """
+    Args:
+        total (int): Frames to capture for each method.
+        resolution (tuple[int, int]): Emulator resolution, (width, height).
+
+    Returns:
+        list[list]: [method, frames per second, bytes allocated per frame]
+    """
+    folder = build_stub()
+    nemu = NemuIpcImpl(nemu_folder=folder, instance_id=0)
+    nemu.lib.stub_set_resolution(*resolution)
+    nemu.connect()
+    ld = LDOpenGLImpl.__new__(LDOpenGLImpl)
+    ld.lib = nemu.lib
+    ld.info = SimpleNamespace(width=resolution[0], height=resolution[1])
+    ld.screenshot_instance = StubScreenShotInstance(nemu.lib)
+    device = StubDevice(nemu_ipc=nemu, ldopengl=ld)
+
+    methods = [
+        ['nemu_ipc', lambda: nemu_ipc_allocating(device)],
+        ['nemu_ipc_buffer', lambda: NemuIpc.screenshot_nemu_ipc(device)],
+        ['ldopengl', lambda: ldopengl_allocating(device)],
+        ['ldopengl_buffer', lambda: LDOpenGL.screenshot_ldopengl(device)],
+    ]
+
+    result = []
+    expected = {}
+    image = None
+    for method, capture in methods:
+        logger.hr(f'Capture {method}', level=2)
+        # Warm up, and check results are the same as before
+        # The stub changes its first pixel on every capture, which is in the last row after flipping
+        last, image = image, capture()
+        if last is not None:
+            device.frame_buffer.free(last)
+        name = method.split('_buffer')[0]
+        if name in expected and not np.array_equal(expected[name][:-1], image[:-1]):
+            logger.warning(f'{method} result is different from {name}')
+        expected[name] = image.copy()
+
+        start = time.perf_counter()
+        for _ in range(total):
+            # Last frame is kept while capturing and freed after, as Screenshot does
+            last, image = image, capture()
+            device.frame_buffer.free(last)
+        cost = (time.perf_counter() - start) / total
+        # Trace allocations in another round, tracemalloc slows down everything
+        allocated = 0
+        for _ in range(10):
+            tracemalloc.start()
+            last, image = image, capture()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            device.frame_buffer.free(last)
+            allocated += peak
+        allocated = int(allocated / 10)
+        logger.info(f'{method}: {1 / cost:.1f} fps, {cost * 1000:.3f}ms per frame, {allocated} bytes per frame')
+        result.append([method, 1 / cost, allocated])
+    nemu.disconnect()
+
+    table = Table(show_lines=True)
+    table.add_column('Method', header_style="bright_cyan", style="cyan", no_wrap=True)
+    table.add_column("FPS", style="magenta")
+    table.add_column("Allocated", style="green")
+    for row in result:
+        table.add_row(row[0], f'{row[1]:.1f}', f'{row[2] / 1024:.1f}KB')
+    logger.print(table, justify='center')
+    return result
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,85 @@
+/*
+ * Stand-in for emulator screenshot libraries, used by dev_tools/ipc_benchmark.py
+ *
+ * Exports the nemu_ipc functions that NemuIpcImpl calls in MuMu12 external_renderer_ipc.dll,
+ * and `ld_capture()`, which returns a frame pointer like IScreenShotClass_Cap in LDPlayer ldopengl64.dll.
+ * Frames are upside down, RGBA for nemu_ipc, BGR for ldopengl, a few pixels change on every capture.
+ */
+#include <stdlib.h>
+#include <string.h>
+#include <wchar.h>
+
+#ifdef _WIN32
+#define EXPORT __declspec(dllexport)
+#else
+#define EXPORT
+#endif
+
+static int width = 1280;
+static int height = 720;
+static unsigned char *rgba = NULL;
+static unsigned char *bgr = NULL;
+static unsigned int counter = 0;
+
+static void ensure_frames(void) {
+    if (rgba != NULL) {
+        return;
+    }
+    rgba = (unsigned char *) malloc((size_t) width * height * 4);
+    bgr = (unsigned char *) malloc((size_t) width * height * 3);
+    for (int i = 0; i < width * height; i++) {
+        int x = i % width, y = i / width;
+        rgba[i * 4 + 0] = (unsigned char) x;
+        rgba[i * 4 + 1] = (unsigned char) y;
+        rgba[i * 4 + 2] = (unsigned char) (x + y);
+        rgba[i * 4 + 3] = 255;
+        bgr[i * 3 + 0] = (unsigned char) (x + y);
+        bgr[i * 3 + 1] = (unsigned char) y;
+        bgr[i * 3 + 2] = (unsigned char) x;
+    }
+}
+
+EXPORT void stub_set_resolution(int w, int h) {
+    free(rgba);
+    free(bgr);
+    rgba = NULL;
+    bgr = NULL;
+    width = w;
+    height = h;
+}
+
+EXPORT int nemu_connect(const wchar_t *path, int index) {
+    (void) path;
+    return index + 1;
+}
+
+EXPORT int nemu_disconnect(int handle) {
+    (void) handle;
+    return 0;
+}
+
+EXPORT int nemu_capture_display(int handle, unsigned int display_id, int buffer_size,
+                                int *w, int *h, unsigned char *pixels) {
+    (void) handle;
+    (void) display_id;
+    *w = width;
+    *h = height;
+    if (buffer_size == 0 || pixels == NULL) {
+        return 0;
+    }
+    if (buffer_size < width * height * 4) {
+        return 1;
+    }
+    ensure_frames();
+    counter++;
+    rgba[0] = (unsigned char) counter;
+    memcpy(pixels, rgba, (size_t) width * height * 4);
+    return 0;
+}
+
+EXPORT unsigned char *ld_capture(void) {
+    ensure_frames();
+    counter++;
+    bgr[0] = (unsigned char) counter;
+    return bgr;
+}
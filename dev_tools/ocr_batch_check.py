@@ -0,0 +1,90 @@
+"""
+Check that OCR server batching gives the same results as running each request alone.
+
+Requests from many clients are submitted to `OcrBatcher` at the same time,
+including requests that mix crop shapes, results are compared with
+`atomic_ocr_for_single_lines()` on each request.
+
+Run in the root folder of Alas:
+    python -m dev_tools.ocr_batch_check
+"""
+import random
+
+import cv2
+import gevent
+import numpy as np
+
+from module.logger import logger
+from module.ocr.models import OCR_MODEL
+from module.ocr.rpc import OcrBatcher
+
+# Crop shapes, (height, width)
+SHAPES = [(20, 60), (20, 90), (24, 120), (32, 200)]
+ALPHABETS = [None, '0123456789', '0123456789/']
+
+
+def text_image(text, shape):
+    """
+    Args:
+        text (str):
+        shape (tuple[int, int]): (height, width)
+
+    Returns:
+        np.ndarray: Black text on white background.
+    """
+    height, width = shape
+    image = np.full((height, width), 255, dtype=np.uint8)
+    scale = height / 30
+    cv2.putText(image, text, (2, height - 4), cv2.FONT_HERSHEY_SIMPLEX, scale, 0, max(int(scale * 2), 1))
+    return image
+
+
+def random_request(rng):
+    """
+    Returns:
+        list[np.ndarray]: 1 to 6 crops, of the same shape or mixed shapes.
+    """
+    count = rng.randint(1, 6)
+    if rng.random() < 0.3:
+        shapes = [rng.choice(SHAPES) for _ in range(count)]
+    else:
+        shapes = [rng.choice(SHAPES)] * count
+    return [text_image(str(rng.randint(0, 99999)), shape) for shape in shapes]
+
+
+def run(lang='azur_lane', clients=40, rounds=5, seed=0):
+    """
+    Args:
+        lang (str):
+        clients (int): Requests submitted at the same time in each round.
+        rounds (int):
+        seed (int):
+
+    Returns:
+        int: Number of requests whose results are different.
+    """
+    rng = random.Random(seed)
+    batcher = OcrBatcher(OCR_MODEL, window=0.05)
+    cnocr = OCR_MODEL.__getattribute__(lang)
+
+    diff = 0
+    total = 0
+    for _ in range(rounds):
+        requests = [(random_request(rng), rng.choice(ALPHABETS)) for _ in range(clients)]
+        jobs = [gevent.spawn(batcher.submit, lang, img_list, alphabet) for img_list, alphabet in requests]
+        gevent.joinall(jobs, raise_error=True)
+        for (img_list, alphabet), job in zip(requests, jobs):
+            expected = cnocr.atomic_ocr_for_single_lines(img_list, alphabet)
+            total += 1
+            if job.value != expected:
+                diff += 1
+                logger.warning(f'Different result, shapes={[image.shape for image in img_list]}, '
+                               f'alphabet={alphabet}, batched={job.value}, alone={expected}')
+
+    batcher.metrics.log(force=True)
+    logger.info(f'OCR batch check: {diff}/{total} requests different')
+    return diff
+
+
+if __name__ == '__main__':
+    run()
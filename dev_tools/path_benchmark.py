@@ -0,0 +1,160 @@
+"""
+Benchmark `CampaignMap.find_path_initial()` on all campaign maps,
+compare routes and time with the fixed-point relaxation it used to be.
+
+Run in the root folder of Alas:
+    python -m dev_tools.path_benchmark
+"""
+import importlib
+import logging
+import os
+import random
+import time
+
+from module.logger import logger
+from module.map.map_base import CampaignMap
+
+CAMPAIGN_FOLDER = './campaign'
+
+
+def import_all_maps():
+    """
+    Returns:
+        list[tuple[str, CampaignMap, type]]: Module name, MAP, Config
+    """
+    maps = []
+    for root, _, files in os.walk(CAMPAIGN_FOLDER):
+        for file in sorted(files):
+            if not file.endswith('.py') or file.startswith('__'):
+                continue
+            name = os.path.relpath(os.path.join(root, file[:-3]), '.').replace('\\', '/').replace('/', '.')
+            try:
+                module = importlib.import_module(name)
+            except Exception:
+                continue
+            campaign_map = getattr(module, 'MAP', None)
+            if isinstance(campaign_map, CampaignMap) and campaign_map.grids:
+                maps.append((name, campaign_map, getattr(module, 'Config', object)))
+    return maps
+
+
+def prepare(campaign_map, config):
+    """
+    What `Fleet.map_data_init()` does to a map.
+    """
+    campaign_map.load_map_data(use_loop=False)
+    campaign_map.grid_connection_initial(
+        wall=getattr(config, 'MAP_HAS_WALL', False),
+        portal=getattr(config, 'MAP_HAS_PORTAL', False),
+    )
+    campaign_map.load_mechanism(
+        land_based=getattr(config, 'MAP_HAS_LAND_BASED', False),
+        maze=getattr(config, 'MAP_HAS_MAZE', False),
+        fortress=getattr(config, 'MAP_HAS_FORTRESS', False),
+        bouncing_enemy=getattr(config, 'MAP_HAS_BOUNCING_ENEMY', False),
+    )
+
+
+def randomize(campaign_map, rng, enemy=0.25):
+    for grid in campaign_map:
+        grid.is_enemy = not grid.is_land and rng.random() < enemy
+        grid.is_boss = False
+        grid.is_siren = False
+
+
+def find_path_initial_legacy(campaign_map, location, has_ambush=True, has_enemy=True):
+    """
+    The previous `CampaignMap.find_path_initial()`, relax all visited grids until no new grid is visited.
+    """
+    ambush_cost = 10 if has_ambush else 1
+    for grid in campaign_map:
+        grid.cost = 9999
+        grid.connection = None
+    start = campaign_map[location]
+    start.cost = 0
+    visited = {start}
+
+    while 1:
+        new = visited.copy()
+        for grid in visited:
+            for arr in campaign_map.grid_connection[grid.location]:
+                arr = campaign_map[arr]
+                if arr.is_land or arr.is_mechanism_block:
+                    continue
+                cost = ambush_cost if arr.may_ambush else 1
+                cost += grid.cost
+
+                if cost < arr.cost:
+                    arr.cost = cost
+                    arr.connection = grid.location
+                elif cost == arr.cost:
+                    if abs(arr.location[0] - grid.location[0]) == 1:
+                        arr.connection = grid.location
+                if arr.is_sea or not has_enemy:
+                    new.add(arr)
+        if len(new) == len(visited):
+            break
+        visited = new
+
+
+def snapshot(campaign_map):
+    return {grid.location: (grid.cost, grid.connection) for grid in campaign_map}
+
+
+def run(trials=3, sources=4, seed=1):
+    """
+    Args:
+        trials (int): Random enemy placements on each map.
+        sources (int): Path finding sources on each placement.
+        seed (int):
+    """
+    rng = random.Random(seed)
+    maps = import_all_maps()
+    # Don't count console rendering of map loading logs
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    queries, different, cost_mismatch = 0, 0, 0
+    cost_legacy, cost_new, cost_dijkstra = 0., 0., 0.
+    try:
+        for name, campaign_map, config in maps:
+            prepare(campaign_map, config)
+            for _ in range(trials):
+                randomize(campaign_map, rng)
+                seas = [grid.location for grid in campaign_map if grid.is_sea]
+                for location in rng.sample(seas, min(sources, len(seas))):
+                    start = time.perf_counter()
+                    find_path_initial_legacy(campaign_map, location)
+                    cost_legacy += time.perf_counter() - start
+                    legacy = snapshot(campaign_map)
+
+                    start = time.perf_counter()
+                    campaign_map.find_path_initial(location)
+                    cost_new += time.perf_counter() - start
+                    new = snapshot(campaign_map)
+
+                    start = time.perf_counter()
+                    cost, _ = campaign_map.path_finder.search([location], route=False)
+                    cost_dijkstra += time.perf_counter() - start
+                    # Dijkstra costs are the lowest, legacy may stop before that
+                    if any(c != new[k][0] for k, c in zip(campaign_map.path_finder.locations, cost[0].tolist())):
+                        cost_mismatch += 1
+
+                    queries += 1
+                    if new != legacy:
+                        different += 1
+                        logger.warning(f'Different routes: {name}, {location}')
+    finally:
+        logger.setLevel(level)
+
+    logger.hr('Path finding benchmark', level=1)
+    logger.attr('Maps', len(maps))
+    logger.attr('Queries', queries)
+    logger.attr('Legacy', f'{cost_legacy / queries * 1000:.3f}ms per query')
+    logger.attr('PathFinder', f'{cost_new / queries * 1000:.3f}ms per query')
+    logger.attr('PathFinder costs only', f'{cost_dijkstra / queries * 1000:.3f}ms per query')
+    logger.attr('Different routes', f'{different} queries')
+    logger.attr('Costs only, lower cost', f'{cost_mismatch} queries')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,134 @@
+"""
+Check the freshness rule of `ScreenshotPrefetch` without an emulator.
+
+A fake capture method returns the time it started capturing,
+so the age of every frame that `get()` returns can be measured.
+
+Cases:
+- Click then screenshot, frames captured before the click are not returned.
+- Sleep then screenshot, without inputs in between, frames captured before the sleep are not returned.
+- Loop of evaluate then screenshot, prefetch still saves the capture latency.
+
+Run in the root folder of Alas:
+    python -m dev_tools.prefetch_check
+"""
+import time
+
+from module.base.timer import Timer
+from module.device.prefetch import ScreenshotPrefetch
+from module.logger import logger
+
+
+class FakeCapture:
+    def __init__(self, latency=0.08):
+        """
+        Args:
+            latency (float): Seconds to capture a frame.
+        """
+        self.latency = latency
+
+    def __call__(self):
+        """
+        Returns:
+            float: Time in time.perf_counter() when capture started, stands in for an image.
+        """
+        start = time.perf_counter()
+        time.sleep(self.latency)
+        return start
+
+
+def check_action(prefetch, rounds=20):
+    """
+    Returns:
+        int: Number of frames captured before the last input.
+    """
+    stale = 0
+    prefetch.get()
+    for _ in range(rounds):
+        time.sleep(0.01)
+        # Click
+        action_time = time.perf_counter()
+        captured = prefetch.get(action_time=action_time)
+        if captured < action_time:
+            stale += 1
+    return stale
+
+
+def check_sleep(prefetch, second=0.5, rounds=5):
+    """
+    Returns:
+        float: Max age of frames returned after sleeping, in seconds.
+            Age is the time from capture start to `get()` called.
+    """
+    age = 0.
+    prefetch.get()
+    for _ in range(rounds):
+        # device.sleep() without inputs, frames captured before it shouldn't be used
+        time.sleep(second)
+        start = time.perf_counter()
+        captured = prefetch.get()
+        age = max(age, start - captured)
+    return age
+
+
+def check_loop(prefetch, work=0.08, rounds=50):
+    """
+    Returns:
+        float: Seconds of the loop.
+    """
+    prefetch.get()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        time.sleep(work)
+        prefetch.get()
+    return time.perf_counter() - start
+
+
+def run(interval=0.1, latency=0.08):
+    """
+    Args:
+        interval (float): Screenshot interval.
+        latency (float): Seconds to capture a frame.
+
+    Returns:
+        bool: If all checks passed.
+    """
+    capture = FakeCapture(latency=latency)
+
+    def new_prefetch():
+        return ScreenshotPrefetch(capture=capture, timer=Timer(interval))
+
+    passed = True
+
+    prefetch = new_prefetch()
+    stale = check_action(prefetch)
+    prefetch.stop()
+    logger.info(f'Click then screenshot: {stale} frames captured before the click')
+    passed &= stale == 0
+
+    prefetch = new_prefetch()
+    age = check_sleep(prefetch)
+    prefetch.stop()
+    logger.info(f'Sleep then screenshot: max age {age * 1000:.1f}ms, allowed {interval * 1000:.1f}ms')
+    passed &= age <= interval
+
+    prefetch = new_prefetch()
+    cost = check_loop(prefetch, work=latency)
+    prefetch.stop()
+    timer = Timer(interval)
+    start = time.perf_counter()
+    for _ in range(50):
+        time.sleep(latency)
+        timer.wait()
+        timer.reset()
+        capture()
+    on_demand = time.perf_counter() - start
+    logger.info(f'Loop: prefetch {cost:.2f}s, on demand {on_demand:.2f}s')
+    passed &= cost < on_demand
+
+    logger.info(f'Prefetch check: {"passed" if passed else "FAILED"}')
+    return passed
+
+
+if __name__ == '__main__':
+    run()
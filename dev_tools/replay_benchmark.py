@@ -0,0 +1,174 @@
+"""
+Benchmark the CPU cost of state-machine loops by replaying recorded frames, no emulator needed.
+
+Recordings are read from ./screenshots/replay/<scenario>, see module/device/replay.py for the format.
+Scenarios without recordings are skipped, except `ui_navigation`, which falls back to a built-in script
+playing page assets.
+
+Run in the root folder of Alas:
+    python -m dev_tools.replay_benchmark
+"""
+import logging
+import os
+
+import numpy as np
+from rich.table import Table
+
+from module.config.config import AzurLaneConfig
+from module.device.replay import ReplayDevice, ReplayEnd
+from module.exception import MapDetectionError
+from module.logger import logger
+from module.map_detection.view import View
+from module.retire.scanner import ShipScanner
+from module.ui.page import page_campaign, page_fleet, page_main
+from module.ui.ui import UI
+
+REPLAY_FOLDER = './screenshots/replay'
+
+
+def ui_navigation(config, device, rounds=10):
+    ui = UI(config, device=device)
+    for _ in range(rounds):
+        ui.ui_ensure(page_fleet)
+        ui.ui_ensure(page_campaign)
+        ui.ui_ensure(page_main)
+
+
+def map_scan(config, device):
+    view = View(config)
+    while 1:
+        device.screenshot()
+        try:
+            view.load(device.image)
+            view.predict()
+        except MapDetectionError:
+            # Camera.update() retries on the next screenshot
+            continue
+
+
+def retire_scan(config, device):
+    scanner = ShipScanner()
+    while 1:
+        device.screenshot()
+        scanner.scan(device.image, output=False)
+
+
+def ui_navigation_script(server):
+    """
+    Page assets are screenshots with everything masked except the button,
+    which is enough for page detection.
+    """
+
+    def frame(name):
+        return f'./assets/{server}/ui/{name}.png'
+
+    return {
+        'start': 'main',
+        'states': {
+            'main': {
+                'frames': frame('MAIN_GOTO_FLEET'),
+                'click': {'MAIN_GOTO_FLEET': 'fleet', 'MAIN_GOTO_CAMPAIGN': 'campaign_menu'},
+            },
+            'fleet': {
+                'frames': frame('FLEET_CHECK'),
+                'click': {'GOTO_MAIN': 'main'},
+            },
+            'campaign_menu': {
+                'frames': frame('CAMPAIGN_MENU_CHECK'),
+                'click': {'CAMPAIGN_MENU_GOTO_CAMPAIGN': 'campaign', 'GOTO_MAIN': 'main'},
+            },
+            'campaign': {
+                'frames': frame('CAMPAIGN_CHECK'),
+                'click': {'GOTO_MAIN': 'main', 'BACK_ARROW': 'campaign_menu'},
+            },
+        }
+    }
+
+
+# Key: scenario name, value: task to run on a replay device, until it returns or replay ends.
+SCENARIOS = {
+    'ui_navigation': ui_navigation,
+    'map_scan': map_scan,
+    'retire_scan': retire_scan,
+}
+
+
+def replay(config, scenario, trace_malloc=False):
+    """
+    Args:
+        config (AzurLaneConfig):
+        scenario (str):
+        trace_malloc (bool):
+
+    Returns:
+        ReplayDevice: None if no recordings.
+    """
+    folder = os.path.join(REPLAY_FOLDER, scenario)
+    script = None
+    if not os.path.exists(folder):
+        if scenario != 'ui_navigation':
+            return None
+        script = ui_navigation_script(config.SERVER)
+
+    device = ReplayDevice(config, folder, script=script, trace_malloc=trace_malloc)
+    with device.clock.patch():
+        try:
+            SCENARIOS[scenario](config, device)
+        except ReplayEnd:
+            pass
+        finally:
+            device.replay_stop()
+    return device
+
+
+def run(config='template'):
+    """
+    Args:
+        config (str): Config to read settings, it won't be modified.
+
+    Returns:
+        list[list]: [scenario, iterations, p50, p90, p99, max, average bytes allocated per iteration]
+    """
+    config = AzurLaneConfig(config, task='Alas')
+    result = []
+    for scenario in SCENARIOS:
+        logger.hr(f'Replay {scenario}', level=2)
+        # Console rendering of logs is not counted
+        level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            # Warm up, assets are loaded on first use
+            device = replay(config, scenario)
+            if device is None:
+                logger.setLevel(level)
+                logger.info(f'No recordings in {os.path.join(REPLAY_FOLDER, scenario)}, skipped')
+                continue
+            device = replay(config, scenario)
+            # Trace allocations in another round, tracemalloc slows down everything
+            traced = replay(config, scenario, trace_malloc=True)
+        finally:
+            logger.setLevel(level)
+
+        cost = np.array(device.iteration_cost) * 1000
+        if not len(cost):
+            logger.warning(f'Replay {scenario} has no loop iterations')
+            continue
+        p50, p90, p99 = np.percentile(cost, [50, 90, 99])
+        allocated = int(np.mean(traced.iteration_alloc)) if traced.iteration_alloc else 0
+        logger.info(f'{scenario}: {len(cost)} iterations, p50={p50:.2f}ms, p90={p90:.2f}ms, p99={p99:.2f}ms, '
+                    f'max={np.max(cost):.2f}ms, {allocated} bytes per iteration')
+        result.append([scenario, len(cost), p50, p90, p99, np.max(cost), allocated])
+
+    table = Table(show_lines=True)
+    table.add_column('Scenario', header_style="bright_cyan", style="cyan", no_wrap=True)
+    for column in ['Iterations', 'p50', 'p90', 'p99', 'Max', 'Allocated']:
+        table.add_column(column, style="magenta")
+    for row in result:
+        table.add_row(
+            row[0], str(row[1]), *[f'{ms:.2f}ms' for ms in row[2:6]], f'{row[6] / 1024:.1f}KB')
+    logger.print(table, justify='center')
+    return result
+
+
+if __name__ == '__main__':
+    run()
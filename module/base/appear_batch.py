@@ -0,0 +1,175 @@
+import weakref
+
+from module.base.button import Button
+from module.base.frame_diff import FRAME_DIFF
+from module.base.template import Template
+from module.base.utils import *
+
+
+class AppearBatch:
+    """
+    Evaluate appearance of multiple buttons on one screenshot in one pass.
+
+    - Color checks of all buttons are done with one mean color reduction, see `get_colors()`.
+    - Template matches are grouped by overlapping search areas, each group is cropped once.
+
+    Results are kept for the current frame, including results of `ModuleBase.appear()`,
+    so following `appear()` calls on the same frame reuse them instead of matching again.
+    Buttons whose areas are unchanged since previous frames reuse results from FRAME_DIFF.
+    """
+
+    def __init__(self):
+        self.image_ref = None
+        self.frame = -1
+        # Key: (id(button), offset, similarity, threshold)
+        # Value: (button, appear, button._button_offset)
+        # Buttons are kept in values, so ids in keys are not reused by new buttons while cached.
+        self.results = {}
+
+    def is_valid(self, image, frame):
+        """
+        Args:
+            image (np.ndarray): Current screenshot
+            frame (int): `Device.frame_count` of current screenshot
+
+        Returns:
+            bool: If cached results belong to this image
+        """
+        return self.frame == frame and self.image_ref is not None and self.image_ref() is image
+
+    def reset(self, image, frame):
+        self.image_ref = weakref.ref(image)
+        self.frame = frame
+        self.results = {}
+
+    @staticmethod
+    def get_key(button, offset, similarity, threshold):
+        if offset:
+            offset = tuple(Button.parse_offset(offset).tolist())
+            # Color threshold is not used in template matching
+            threshold = 0
+        else:
+            offset = 0
+            similarity = 0
+        return id(button), offset, similarity, threshold
+
+    def get(self, button, offset, similarity, threshold):
+        """
+        Returns:
+            bool: Cached result, or None if not evaluated on this frame
+        """
+        try:
+            cached, appear, button_offset = self.results[self.get_key(button, offset, similarity, threshold)]
+        except KeyError:
+            return None
+        if cached is not button:
+            return None
+        if isinstance(button, Button):
+            button._button_offset = button_offset
+        return appear
+
+    def store(self, button, offset, similarity, threshold, appear):
+        """
+        Keep the result of a button evaluated outside of the batch, such as in `ModuleBase.appear()`.
+        """
+        button_offset = button._button_offset if isinstance(button, Button) else None
+        self.results[self.get_key(button, offset, similarity, threshold)] = (button, appear, button_offset)
+
+    def evaluate(self, image, frame, buttons, similarity=0.85, threshold=10):
+        """
+        Args:
+            image (np.ndarray): Screenshot
+            frame (int): `Device.frame_count` of the screenshot
+            buttons (dict[Button | Template, int | tuple]): Buttons and their offsets.
+                Offset 0 for color match, otherwise template match.
+            similarity (float): 0 to 1.
+            threshold (int): 0 to 255, smaller means more similar
+
+        Returns:
+            dict[Button | Template, bool]: If each button appears
+        """
+        if not self.is_valid(image, frame):
+            self.reset(image, frame)
+
+        out = {}
+        colors = []
+        matches = []
+        for button, offset in buttons.items():
+            key = self.get_key(button, offset, similarity, threshold)
+            if key in self.results and self.results[key][0] is button:
+                out[button] = self.results[key][1]
+            elif isinstance(button, Template):
+                appear = button.match(image, similarity=similarity)
+                self.results[key] = (button, appear, None)
+                out[button] = appear
+            elif offset:
+                offset = Button.parse_offset(offset)
+                button.ensure_template()
+                found, result = FRAME_DIFF.lookup(image, button.match_key(offset, similarity), kind='match')
+                if found:
+                    button._button_offset = result[1]
+                    self.results[key] = (button, result[0], result[1])
+                    out[button] = result[0]
+                    continue
+                area = tuple(int(round(n)) for n in offset + button.area)
+                matches.append((key, button, offset, area))
+            else:
+                found, appear = FRAME_DIFF.lookup(image, button.color_key(threshold), kind='color')
+                if found:
+                    self.results[key] = (button, appear, button._button_offset)
+                    out[button] = appear
+                    continue
+                colors.append((key, button))
+
+        # One reduction for all color checks
+        if colors:
+            result = get_colors(image, [button.area for _, button in colors])
+            for (key, button), color in zip(colors, result):
+                appear = bool(color_similar(color1=color, color2=button.color, threshold=threshold))
+                self.results[key] = (button, appear, button._button_offset)
+                out[button] = appear
+                FRAME_DIFF.store(image, button.color_key(threshold), button.area, appear,
+                                 kind='color', keep=(button,))
+
+        # Template matches on grouped search areas
+        for group, area in self.group_search_area(matches):
+            search = crop(image, area, copy=True)
+            for key, button, offset, (x1, y1, x2, y2) in group:
+                x1, y1, x2, y2 = x1 - area[0], y1 - area[1], x2 - area[0], y2 - area[1]
+                appear = button.match_cropped(search[y1:y2, x1:x2], offset=offset, similarity=similarity)
+                self.results[key] = (button, appear, button._button_offset)
+                out[button] = appear
+                FRAME_DIFF.store(image, button.match_key(offset, similarity), offset + button.area,
+                                 (appear, button._button_offset), kind='match', keep=(button, button.image))
+
+        return out
+
+    @staticmethod
+    def group_search_area(matches):
+        """
+        Merge overlapping search areas.
+
+        Args:
+            matches (list[tuple]): (key, button, offset, search_area)
+
+        Returns:
+            list[tuple[list, tuple]]: (matches in group, union area of the group)
+        """
+        groups = []
+        for match in matches:
+            area = match[3]
+            # Absorb all groups that overlap with the new area, until nothing changes
+            members = [match]
+            merged = True
+            while merged:
+                merged = False
+                for group in groups:
+                    if area_cross_area(area, group[1], threshold=0):
+                        groups.remove(group)
+                        members += group[0]
+                        area = (min(area[0], group[1][0]), min(area[1], group[1][1]),
+                                max(area[2], group[1][2]), max(area[3], group[1][3]))
+                        merged = True
+                        break
+            groups.append((members, area))
+        return groups
@@ -0,0 +1,164 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+import module.config.server as server
+
+PACK_FOLDER = './assets/pack'
+PACK_MAGIC = b'ALASPACK'
+PACK_VERSION = 1
+# magic, version, index length
+PACK_HEADER = struct.Struct('<8sII')
+PACK_ALIGN = 64
+
+
+def align(n):
+    return (n + PACK_ALIGN - 1) // PACK_ALIGN * PACK_ALIGN
+
+
+def data_start(index_length):
+    return align(PACK_HEADER.size + index_length)
+
+
+def pack_file(s=None):
+    """
+    Args:
+        s (str): Server, or None to use current server
+
+    Returns:
+        str: ./assets/pack/cn.pack
+    """
+    if s is None:
+        s = server.server
+    return os.path.join(PACK_FOLDER, f'{s}.pack').replace('\\', '/')
+
+
+def source_signature(file):
+    """
+    Args:
+        file (str): Asset file
+
+    Returns:
+        list[int]: [size, mtime_ns], or None if file not exists
+    """
+    try:
+        stat = os.stat(file)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def button_key(file, area):
+    """
+    Buttons with the same file may crop different areas.
+
+    Returns:
+        str: ./assets/cn/ui/BACK_ARROW.png|33,44,47,64
+    """
+    return f'{file}|{",".join(str(int(n)) for n in area)}'
+
+
+class AssetPack:
+    """
+    Precompiled assets of one server, built by `dev_tools/asset_pack.py`.
+
+    The pack is memory-mapped read-only, so decoded templates are shared between Alas instances
+    through page cache, and `release_resources()` no longer means decoding them again.
+    Everything falls back to decoding asset files if pack doesn't exist or an asset is modified after build.
+
+    Pack layout:
+        header: magic, version, index length
+        index: JSON, {key: {'source': [size, mtime_ns], 'gif': bool, 'image': [[offset, shape], ...], ...}}
+        data: uint8 arrays, each aligned to 64 bytes, offsets are relative to the start of data
+    """
+    # Set to False to always decode from asset files
+    enabled = True
+
+    def __init__(self):
+        self.server = None
+        self.mmap = None
+        self.data_start = 0
+        self.index = {}
+        # Source files that are confirmed to be unmodified
+        self.checked = {}
+
+    def load(self):
+        """
+        Open pack of current server, re-open if server changed.
+
+        Returns:
+            bool: If pack available
+        """
+        if not self.enabled:
+            return False
+        if self.server == server.server:
+            return self.mmap is not None
+
+        self.server = server.server
+        self.mmap = None
+        self.index = {}
+        self.checked = {}
+        file = pack_file(self.server)
+        if not os.path.exists(file):
+            return False
+
+        from module.logger import logger
+        try:
+            mmap = np.memmap(file, dtype=np.uint8, mode='r')
+            magic, version, length = PACK_HEADER.unpack_from(mmap, 0)
+            if magic != PACK_MAGIC or version != PACK_VERSION:
+                logger.warning(f'Asset pack {file} is outdated, please rebuild it')
+                return False
+            start = PACK_HEADER.size
+            index = json.loads(bytes(mmap[start:start + length]).decode('utf-8'))
+        except (ValueError, struct.error) as e:
+            logger.warning(f'Failed to load asset pack {file}: {e}')
+            return False
+
+        self.mmap = mmap
+        self.data_start = data_start(length)
+        self.index = index
+        logger.info(f'Asset pack loaded: {file}, {len(index)} assets')
+        return True
+
+    def is_valid(self, key, row):
+        if key in self.checked:
+            return self.checked[key]
+        file = key.split('|', maxsplit=1)[0]
+        valid = source_signature(file) == row['source']
+        self.checked[key] = valid
+        return valid
+
+    def get(self, key, variant='image'):
+        """
+        Args:
+            key (str): File of Template, or `button_key()` of Button
+            variant (str): 'image', 'binary', 'luma'
+
+        Returns:
+            np.ndarray, list[np.ndarray]: Read-only arrays, a list of frames if asset is a gif.
+                None if not in pack.
+        """
+        if not self.load():
+            return None
+        try:
+            row = self.index[key]
+            frames = row[variant]
+        except KeyError:
+            return None
+        if not self.is_valid(key, row):
+            return None
+
+        frames = [
+            np.ndarray(shape=tuple(shape), dtype=np.uint8, buffer=self.mmap, offset=self.data_start + offset)
+            for offset, shape in frames
+        ]
+        if row['gif']:
+            return frames
+        else:
+            return frames[0]
+
+
+ASSET_PACK = AssetPack()
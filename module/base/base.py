@@ -1,3 +1,4 @@
+from module.base.appear_batch import AppearBatch
 from module.base.button import Button
 from module.base.decorator import cached_property
 # 此文件定义了 Alas 逻辑模块的最高基类 ModuleBase。
@@ -58,6 +59,10 @@ class ModuleBase:
         self.interval_timer = {}
         self.early_ocr_import()
 
+    @cached_property
+    def appear_cache(self) -> AppearBatch:
+        return AppearBatch()
+
     @cached_property
     def stat(self) -> AzurStats:
         return AzurStats(config=self.config)
@@ -225,18 +230,61 @@ class ModuleBase:
 
         if isinstance(button, HierarchyButton):
             appear = bool(button)
-        elif offset:
-            if isinstance(offset, bool):
-                offset = self.config.BUTTON_OFFSET
-            appear = button.match(self.device.image, offset=offset, similarity=similarity)
         else:
-            appear = button.appear_on(self.device.image, threshold=threshold)
+            if isinstance(offset, bool):
+                offset = self.config.BUTTON_OFFSET if offset else 0
+            if not self.appear_cache.is_valid(self.device.image, self.device.frame_count):
+                self.appear_cache.reset(self.device.image, self.device.frame_count)
+            appear = self.appear_cache.get(button, offset=offset, similarity=similarity, threshold=threshold)
+            if appear is None:
+                if offset:
+                    appear = button.match(self.device.image, offset=offset, similarity=similarity)
+                else:
+                    appear = button.appear_on(self.device.image, threshold=threshold)
+                self.appear_cache.store(button, offset=offset, similarity=similarity, threshold=threshold,
+                                        appear=appear)
 
         if appear and interval:
             self.interval_timer[button.name].reset()
 
         return appear
 
+    def appear_batch(self, buttons, offset=0, similarity=0.85, threshold=10):
+        """
+        Evaluate multiple buttons on current screenshot in one pass.
+        Results are cached for current frame, following `appear()` calls on these buttons reuse them.
+
+        Args:
+            buttons (list[Button, Template], dict[Button | Template, bool | int | tuple]):
+                List of buttons that use the same `offset`, or a dict of buttons and their own offsets
+            offset (bool, int):
+            similarity (int, float): 0 to 1.
+            threshold (int, float): 0 to 255 if not use offset, smaller means more similar
+
+        Returns:
+            dict[Button | Template, bool]: If each button appears.
+                Note that intervals are not checked, use `appear()` if needed.
+
+        Examples:
+            ```
+            self.appear_batch([POPUP_CONFIRM, POPUP_CANCEL], offset=(30, 30))
+            # Reuse results
+            if self.appear(POPUP_CANCEL, offset=(30, 30)) and self.appear(POPUP_CONFIRM, offset=(30, 30)):
+                pass
+            ```
+        """
+        if isinstance(buttons, dict):
+            buttons = dict(buttons)
+        else:
+            buttons = {button: offset for button in buttons}
+        for button, button_offset in buttons.items():
+            if isinstance(button_offset, bool):
+                buttons[button] = self.config.BUTTON_OFFSET if button_offset else 0
+            self.device.stuck_record_add(button)
+
+        return self.appear_cache.evaluate(
+            self.device.image, self.device.frame_count, buttons, similarity=similarity, threshold=threshold)
+
     def match_template_color(self, button, offset=(20, 20), interval=0, similarity=0.85, threshold=30):
         """
         Args:
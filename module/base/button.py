@@ -7,7 +7,10 @@ import traceback
 import imageio
 from PIL import ImageDraw
 
+from module.base.asset_pack import ASSET_PACK, button_key
 from module.base.decorator import cached_property
+from module.base.frame_cache import FRAME_CACHE
+from module.base.frame_diff import FRAME_DIFF
 from module.base.resource import Resource
 from module.base.utils import *
 from module.config.server import VALID_SERVER
@@ -42,6 +45,7 @@ class Button(Resource):
         self._match_init = False
         self._match_binary_init = False
         self._match_luma_init = False
+        self._image_packed = False
         self.image = None
         self.image_binary = None
         self.image_luma = None
@@ -114,12 +118,30 @@ class Button(Resource):
         Returns:
             bool: True if button appears on screenshot.
         """
-        return color_similar(
-            color1=get_color(image, self.area),
-            color2=self.color,
-            threshold=threshold
+        return FRAME_DIFF.get(
+            image, self.color_key(threshold), self.area,
+            lambda: color_similar(color1=get_color(image, self.area), color2=self.color, threshold=threshold),
+            kind='color', keep=(self,)
         )
 
+    def color_key(self, threshold):
+        """
+        Returns:
+            tuple: Key of `appear_on()` results in FRAME_DIFF.
+        """
+        return 'color', id(self), tuple(self.color), tuple(self.area), threshold
+
+    def match_key(self, offset, similarity):
+        """
+        Args:
+            offset (np.ndarray): Parsed offset.
+            similarity (float):
+
+        Returns:
+            tuple: Key of `match()` results in FRAME_DIFF, call `ensure_template()` first.
+        """
+        return 'match', id(self), id(self.image), tuple(offset.tolist()), tuple(self.area), similarity
+
     def load_color(self, image):
         """Load color from the specific area of the given image.
         This method is irreversible, this would be only use in some special occasion.
@@ -132,6 +154,7 @@ class Button(Resource):
         """
         self.__dict__['color'] = get_color(image, self.area)
         self.image = crop(image, self.area)
+        self._image_packed = False
         self.__dict__['is_gif'] = False
         return self.color
 
@@ -148,13 +171,34 @@ class Button(Resource):
     def clear_offset(self):
         self._button_offset = None
 
+    def load_packed(self, variant='image'):
+        """
+        Load precompiled template from asset pack, see module/base/asset_pack.py
+
+        Args:
+            variant (str): 'image', 'binary', 'luma'
+
+        Returns:
+            np.ndarray, list[np.ndarray]: Or None if not in pack
+        """
+        if not self.file:
+            return None
+        # Binary and luma templates follow self.image, which may be loaded from screenshot by load_color()
+        if variant != 'image' and not self._image_packed:
+            return None
+        return ASSET_PACK.get(button_key(self.file, self.area), variant)
+
     def ensure_template(self):
         """
         Load asset image.
         If needs to call self.match, call this first.
         """
         if not self._match_init:
-            if self.is_gif:
+            packed = self.load_packed('image')
+            self._image_packed = packed is not None
+            if packed is not None:
+                self.image = packed
+            elif self.is_gif:
                 self.image = []
                 for image in imageio.mimread(self.file):
                     image = image[:, :, :3].copy() if len(image.shape) == 3 else image
@@ -170,7 +214,10 @@ class Button(Resource):
         If needs to call self.match, call this first.
         """
         if not self._match_binary_init:
-            if self.is_gif:
+            packed = self.load_packed('binary')
+            if packed is not None:
+                self.image_binary = packed
+            elif self.is_gif:
                 self.image_binary = []
                 for image in self.image:
                     image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -183,7 +230,10 @@ class Button(Resource):
 
     def ensure_luma_template(self):
         if not self._match_luma_init:
-            if self.is_gif:
+            packed = self.load_packed('luma')
+            if packed is not None:
+                self.image_luma = packed
+            elif self.is_gif:
                 self.image_luma = []
                 for image in self.image:
                     luma = rgb2luma(image)
@@ -200,6 +250,27 @@ class Button(Resource):
         self._match_init = False
         self._match_binary_init = False
         self._match_luma_init = False
+        self._image_packed = False
+
+    @staticmethod
+    def parse_offset(offset):
+        """
+        Args:
+            offset (int, tuple): Detection area offset.
+                int for (-3, -offset, 3, offset)
+                (x, y) for (-x, -y, x, y)
+                (x1, y1, x2, y2) as it is
+
+        Returns:
+            np.ndarray: (x1, y1, x2, y2)
+        """
+        if isinstance(offset, tuple):
+            if len(offset) == 2:
+                return np.array((-offset[0], -offset[1], offset[0], offset[1]))
+            else:
+                return np.array(offset)
+        else:
+            return np.array((-3, -offset, 3, offset))
 
     def match(self, image, offset=30, similarity=0.85):
         """Detects button by template matching. To Some button, its location may not be static.
@@ -214,14 +285,30 @@ class Button(Resource):
         """
         self.ensure_template()
 
-        if isinstance(offset, tuple):
-            if len(offset) == 2:
-                offset = np.array((-offset[0], -offset[1], offset[0], offset[1]))
-            else:
-                offset = np.array(offset)
-        else:
-            offset = np.array((-3, -offset, 3, offset))
-        image = crop(image, offset + self.area, copy=False)
+        offset = self.parse_offset(offset)
+        area = offset + self.area
+
+        def match():
+            appear = self.match_cropped(crop(image, area, copy=False), offset=offset, similarity=similarity)
+            return appear, self._button_offset
+
+        appear, self._button_offset = FRAME_DIFF.get(
+            image, self.match_key(offset, similarity), area, match, kind='match', keep=(self, self.image))
+        return appear
+
+    def match_cropped(self, image, offset, similarity=0.85):
+        """
+        Template matching on an image that is already cropped by `offset + self.area`.
+
+        Args:
+            image: Search area.
+            offset (np.ndarray): Detection area offset, (x1, y1, x2, y2).
+            similarity (float): 0-1. Similarity.
+
+        Returns:
+            bool.
+        """
+        self.ensure_template()
 
         if self.is_gif:
             for template in self.image:
@@ -252,21 +339,12 @@ class Button(Resource):
         self.ensure_template()
         self.ensure_binary_template()
 
-        if isinstance(offset, tuple):
-            if len(offset) == 2:
-                offset = np.array((-offset[0], -offset[1], offset[0], offset[1]))
-            else:
-                offset = np.array(offset)
-        else:
-            offset = np.array((-3, -offset, 3, offset))
-        image = crop(image, offset + self.area, copy=False)
+        offset = self.parse_offset(offset)
+        # graying and binarization
+        image_binary = FRAME_CACHE.crop(image, offset + self.area, 'binary')
 
         if self.is_gif:
             for template in self.image_binary:
-                # graying
-                image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                # binarization
-                _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
                 # template matching
                 res = cv2.matchTemplate(template, image_binary, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, point = cv2.minMaxLoc(res)
@@ -275,10 +353,6 @@ class Button(Resource):
                     return True
             return False
         else:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             # template matching
             res = cv2.matchTemplate(self.image_binary, image_binary, cv2.TM_CCOEFF_NORMED)
             _, sim, _, point = cv2.minMaxLoc(res)
@@ -300,17 +374,10 @@ class Button(Resource):
         self.ensure_template()
         self.ensure_luma_template()
 
-        if isinstance(offset, tuple):
-            if len(offset) == 2:
-                offset = np.array((-offset[0], -offset[1], offset[0], offset[1]))
-            else:
-                offset = np.array(offset)
-        else:
-            offset = np.array((-3, -offset, 3, offset))
-        image = crop(image, offset + self.area, copy=False)
+        offset = self.parse_offset(offset)
+        image_luma = FRAME_CACHE.crop(image, offset + self.area, 'luma')
 
         if self.is_gif:
-            image_luma = rgb2luma(image)
             for template in self.image_luma:
                 res = cv2.matchTemplate(template, image_luma, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, point = cv2.minMaxLoc(res)
@@ -318,11 +385,9 @@ class Button(Resource):
                 if sim > similarity:
                     return True
         else:
-            image_luma = rgb2luma(image)
             res = cv2.matchTemplate(self.image_luma, image_luma, cv2.TM_CCOEFF_NORMED)
             _, sim, _, point = cv2.minMaxLoc(res)
             self._button_offset = area_offset(self._button, offset[:2] + np.array(point))
-            print(sim, similarity)
             return sim > similarity
 
     def match_template_color(self, image, offset=(20, 20), similarity=0.85, threshold=30):
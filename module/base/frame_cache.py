@@ -0,0 +1,154 @@
+import weakref
+
+from module.base.utils import *
+
+
+def rgb2gray_cv(image):
+    """
+    Gray image used in binary template matching, which is different from `rgb2gray()`.
+    """
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def rgb2binary(image):
+    """
+    Binarization using Otsu's threshold, not a per-pixel operation.
+    """
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return image
+
+
+class FrameCache:
+    """
+    Images derived from the current screenshot, shared by Button, Template and Ocr.
+
+    Cache is keyed on the identity of `Device.image` and cleared on every new screenshot,
+    images other than the current screenshot are always calculated directly.
+    Returned images are shared, do not modify them in place.
+
+    ```
+    luma = FRAME_CACHE.convert(self.device.image, 'luma')
+    luma = FRAME_CACHE.crop(self.device.image, area, 'luma')
+    ```
+    """
+    # Per-pixel color space conversions, where a crop of converted frame equals to the converted crop
+    CONVERT = {
+        'luma': rgb2luma,
+        'yuv': rgb2yuv,
+        'gray': rgb2gray,
+        'gray_cv': rgb2gray_cv,
+    }
+    # Conversions that depend on the whole input image
+    CONVERT_CROPPED = {
+        'binary': rgb2binary,
+    }
+
+    def __init__(self):
+        self.frame = None
+        self.cache = {}
+        self.hit = 0
+        self.miss = 0
+
+    def clear(self, image=None):
+        """
+        Args:
+            image (np.ndarray): New screenshot, or None to disable cache until next screenshot
+        """
+        self.cache = {}
+        self.frame = weakref.ref(image) if image is not None else None
+
+    def is_frame(self, image):
+        """
+        Returns:
+            bool: If image is the current screenshot
+        """
+        return self.frame is not None and self.frame() is image
+
+    def get(self, image, key, func):
+        """
+        Args:
+            image (np.ndarray): Image that the value derived from
+            key (tuple): Any hashable key that describes the derivation
+            func (callable): Function to calculate the value, without arguments
+
+        Returns:
+            Cached value if image is the current screenshot
+        """
+        if not self.is_frame(image):
+            return func()
+        try:
+            value = self.cache[key]
+            self.hit += 1
+            return value
+        except KeyError:
+            self.miss += 1
+            value = func()
+            self.cache[key] = value
+            return value
+
+    def convert(self, image, mode):
+        """
+        Full image color space conversion.
+
+        Args:
+            image (np.ndarray):
+            mode (str): 'luma', 'yuv', 'gray', 'gray_cv', 'binary'
+
+        Returns:
+            np.ndarray:
+        """
+        if mode in self.CONVERT:
+            func = self.CONVERT[mode]
+        else:
+            func = self.CONVERT_CROPPED[mode]
+        return self.get(image, (mode,), lambda: func(image))
+
+    def crop(self, image, area, mode='rgb'):
+        """
+        Crop an area and convert it into the given color space.
+
+        Args:
+            image (np.ndarray):
+            area (tuple):
+            mode (str): 'rgb' for no conversion, or any mode in `convert()`
+
+        Returns:
+            np.ndarray:
+        """
+        area = tuple(round(n) for n in area)
+        if mode == 'rgb':
+            return self.get(image, (mode, area), lambda: crop(image, area, copy=True))
+        if mode in self.CONVERT:
+            func = self.CONVERT[mode]
+            # Crop from the converted frame if it's already there
+            # Not for areas outside of image, padding should be converted as well
+            if self.is_frame(image) and (mode,) in self.cache and area_in_area(area, (0, 0, *image_size(image)), 0):
+                return self.get(image, (mode, area), lambda: crop(self.cache[(mode,)], area, copy=False))
+        else:
+            func = self.CONVERT_CROPPED[mode]
+        return self.get(image, (mode, area), lambda: func(crop(image, area, copy=False)))
+
+    @property
+    def hit_rate(self):
+        total = self.hit + self.miss
+        return self.hit / total if total else 0.
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit and miss counters, for profiling
+        """
+        return {
+            'hit': self.hit,
+            'miss': self.miss,
+            'hit_rate': round(self.hit_rate, 3),
+            'cached': len(self.cache),
+        }
+
+    def stats_reset(self):
+        self.hit = 0
+        self.miss = 0
+
+
+FRAME_CACHE = FrameCache()
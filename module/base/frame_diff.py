@@ -0,0 +1,235 @@
+import weakref
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from module.logger import logger
+
+
+class FrameDiff:
+    """
+    Per-block change tracking between screenshots, to reuse results of areas that didn't change.
+
+    On every screenshot, the new frame is compared with a private copy of the previous one,
+    each block of `block` x `block` pixels records the last frame it changed in.
+    A result computed on an area stays valid until any block under the area changes, so checks during
+    animations and waits are skipped if their areas are pixel-identical to when they were evaluated.
+    Comparison is exact, reused results are always the same as evaluating again.
+
+    Like FRAME_CACHE, only the current screenshot is tracked, other images are always calculated directly.
+    Results are kept in an LRU of at most `size` entries.
+
+    ```
+    appear = FRAME_DIFF.get(image, ('color', id(self), threshold), self.area,
+                            lambda: self.appear_on(image, threshold))
+    ```
+    """
+
+    def __init__(self, block=16, size=1024):
+        """
+        Args:
+            block (int): Width and height of blocks in pixels.
+            size (int): Max number of results kept.
+        """
+        self.block = block
+        self.size = size
+        self.frame = None
+        self.serial = 0
+        # Copy of the last frame
+        self.last = None
+        # Serial of the frame that each block changed in, shape (rows, columns)
+        self.changed_at = None
+        self.rows = np.array([], dtype=np.int64)
+        self.columns = np.array([], dtype=np.int64)
+        # Key: any hashable
+        # Value: (serial, (x1, y1, x2, y2) in blocks, result, objects kept alive while the key is in use)
+        self.results = OrderedDict()
+
+        # Counters for profiling
+        self.frames = 0
+        self.unchanged = 0
+        self.hit = {}
+        self.miss = {}
+
+    def update(self, image):
+        """
+        Args:
+            image (np.ndarray): New screenshot.
+        """
+        self.serial += 1
+        self.frames += 1
+        self.frame = weakref.ref(image)
+        if self.last is None or self.last.shape != image.shape or self.last.dtype != image.dtype:
+            self.last = np.array(image, copy=True)
+            height, width = image.shape[:2]
+            self.rows = np.arange(0, height, self.block)
+            self.columns = np.arange(0, width, self.block)
+            self.changed_at = np.full((len(self.rows), len(self.columns)), self.serial, dtype=np.int64)
+            self.results.clear()
+            return
+
+        dirty = self.dirty(image, self.last)
+        if not dirty.any():
+            self.unchanged += 1
+            return
+        self.changed_at[dirty] = self.serial
+        np.copyto(self.last, image)
+
+    def dirty(self, image, last):
+        """
+        Args:
+            image (np.ndarray):
+            last (np.ndarray): Previous frame in the same shape.
+
+        Returns:
+            np.ndarray: If each block changed, shape (rows, columns)
+        """
+        height, width = image.shape[:2]
+        channel = image.shape[2] if image.ndim == 3 else 1
+        row_bytes = image.itemsize * self.block * channel
+        if height % self.block == 0 and width % self.block == 0 and row_bytes % 8 == 0 \
+                and image.flags.c_contiguous and last.flags.c_contiguous:
+            # Compare 8 bytes at a time, 1280x720 takes about 2ms
+            diff = np.not_equal(image.reshape(height, -1).view(np.uint64), last.reshape(height, -1).view(np.uint64))
+            return diff.reshape(height // self.block, self.block, width // self.block, -1).any(axis=(1, 3))
+
+        diff = cv2.absdiff(image, last).reshape(height, -1)
+        diff = np.maximum.reduceat(diff, self.rows, axis=0)
+        diff = np.maximum.reduceat(diff, self.columns * channel, axis=1)
+        return diff > 0
+
+    def detach(self):
+        """
+        Disable reuse until next `update()`, call it when a new frame is taken, frames may reuse the same array.
+        """
+        self.frame = None
+
+    def clear(self):
+        """
+        Stop tracking until next `update()`, call it when frames are taken without comparison.
+        """
+        self.frame = None
+        self.last = None
+        self.changed_at = None
+        self.results.clear()
+
+    def is_frame(self, image):
+        """
+        Returns:
+            bool: If image is the current screenshot
+        """
+        return self.frame is not None and self.frame() is image
+
+    def region(self, area):
+        """
+        Args:
+            area (tuple): (x1, y1, x2, y2) in pixels, may be outside of image.
+
+        Returns:
+            tuple: (x1, y1, x2, y2) in blocks.
+        """
+        rows, columns = self.changed_at.shape
+        x1, y1, x2, y2 = [int(round(n)) for n in area]
+        x1 = min(max(x1 // self.block, 0), columns)
+        y1 = min(max(y1 // self.block, 0), rows)
+        x2 = min(max(-(-x2 // self.block), 0), columns)
+        y2 = min(max(-(-y2 // self.block), 0), rows)
+        return x1, y1, x2, y2
+
+    def lookup(self, image, key, kind='color'):
+        """
+        Args:
+            image (np.ndarray): Image that the result derived from.
+            key (tuple): Any hashable key that describes the evaluation.
+            kind (str): Counter name in stats.
+
+        Returns:
+            tuple[bool, Any]: If found, result reused from previous frames.
+        """
+        if not self.is_frame(image) or self.changed_at is None:
+            return False, None
+        try:
+            serial, region, result, _ = self.results[key]
+        except KeyError:
+            return False, None
+        x1, y1, x2, y2 = region
+        if self.changed_at[y1:y2, x1:x2].max(initial=0) > serial:
+            return False, None
+        self.results.move_to_end(key)
+        self.hit[kind] = self.hit.get(kind, 0) + 1
+        return True, result
+
+    def store(self, image, key, area, result, kind='color', keep=()):
+        """
+        Args:
+            image (np.ndarray): Image that the result derived from.
+            key (tuple): Any hashable key that describes the evaluation.
+            area (tuple): Area that the result depends on, (x1, y1, x2, y2), or None for the whole image.
+            result: Evaluated result.
+            kind (str): Counter name in stats.
+            keep (tuple): Objects whose ids are in `key`, kept alive so ids are not reused.
+        """
+        if not self.is_frame(image) or self.changed_at is None:
+            return
+        self.miss[kind] = self.miss.get(kind, 0) + 1
+        region = self.region(area if area is not None else (0, 0, image.shape[1], image.shape[0]))
+        self.results[key] = (self.serial, region, result, keep)
+        self.results.move_to_end(key)
+        while len(self.results) > self.size:
+            self.results.popitem(last=False)
+
+    def get(self, image, key, area, func, kind='color', keep=()):
+        """
+        Args:
+            image (np.ndarray): Image that the result derived from.
+            key (tuple): Any hashable key that describes the evaluation.
+            area (tuple): Area that the result depends on, (x1, y1, x2, y2), or None for the whole image.
+            func (callable): Function to evaluate, without arguments.
+            kind (str): Counter name in stats.
+            keep (tuple): Objects whose ids are in `key`, kept alive so ids are not reused.
+
+        Returns:
+            Result reused from previous frames if the area is unchanged, otherwise evaluated.
+        """
+        found, result = self.lookup(image, key, kind=kind)
+        if found:
+            return result
+        result = func()
+        self.store(image, key, area, result, kind=kind, keep=keep)
+        return result
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counters since the last reset.
+                skipped and evaluated are dicts of {kind: count}
+        """
+        return {
+            'frames': self.frames,
+            'unchanged': self.unchanged,
+            'skipped': dict(self.hit),
+            'evaluated': dict(self.miss),
+        }
+
+    def stats_reset(self):
+        self.frames = 0
+        self.unchanged = 0
+        self.hit = {}
+        self.miss = {}
+
+    def log(self):
+        """
+        Log and reset counters, called at the end of every task.
+        """
+        if not self.frames:
+            return
+        kinds = sorted(set(self.hit) | set(self.miss))
+        skipped = ', '.join(f'{kind} {self.hit.get(kind, 0)}/{self.hit.get(kind, 0) + self.miss.get(kind, 0)}'
+                            for kind in kinds)
+        logger.info(f'Frame diff: {self.unchanged}/{self.frames} frames unchanged, '
+                    f'skipped {skipped if skipped else "nothing"}')
+        self.stats_reset()
+
+
+FRAME_DIFF = FrameDiff()
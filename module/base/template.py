@@ -2,8 +2,11 @@ import os
 
 import imageio
 
+from module.base.asset_pack import ASSET_PACK
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.frame_cache import FRAME_CACHE
+from module.base.frame_diff import FRAME_DIFF
 from module.base.resource import Resource
 from module.base.utils import *
 from module.config.server import VALID_SERVER
@@ -20,6 +23,7 @@ class Template(Resource):
         self._image = None
         self._image_binary = None
         self._image_luma = None
+        self._image_packed = False
 
         self.resource_add(self.file)
 
@@ -37,10 +41,35 @@ class Template(Resource):
     def is_gif(self):
         return os.path.splitext(self.file)[1] == '.gif'
 
+    def load_packed(self, variant='image'):
+        """
+        Load precompiled template from asset pack, see module/base/asset_pack.py
+
+        Args:
+            variant (str): 'image', 'binary', 'luma'
+
+        Returns:
+            np.ndarray, list[np.ndarray]: Or None if not in pack
+        """
+        # Pack stores templates without custom pre-processing
+        if type(self).pre_process is not Template.pre_process:
+            return None
+        # Binary and luma templates follow self.image, which may be set manually
+        if variant != 'image':
+            if self._image is None:
+                _ = self.image
+            if not self._image_packed:
+                return None
+        return ASSET_PACK.get(self.file, variant)
+
     @property
     def image(self):
         if self._image is None:
-            if self.is_gif:
+            packed = self.load_packed('image')
+            self._image_packed = packed is not None
+            if packed is not None:
+                self._image = packed
+            elif self.is_gif:
                 self._image = []
                 channel = 0
                 for image in imageio.mimread(self.file):
@@ -62,7 +91,10 @@ class Template(Resource):
     @property
     def image_binary(self):
         if self._image_binary is None:
-            if self.is_gif:
+            packed = self.load_packed('binary')
+            if packed is not None:
+                self._image_binary = packed
+            elif self.is_gif:
                 self._image_binary = []
                 for image in self.image:
                     image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -77,7 +109,10 @@ class Template(Resource):
     @property
     def image_luma(self):
         if self._image_luma is None:
-            if self.is_gif:
+            packed = self.load_packed('luma')
+            if packed is not None:
+                self._image_luma = packed
+            elif self.is_gif:
                 self._image_luma = []
                 for image in self.image:
                     luma = rgb2luma(image)
@@ -90,12 +125,14 @@ class Template(Resource):
     @image.setter
     def image(self, value):
         self._image = value
+        self._image_packed = False
 
     def resource_release(self):
         super().resource_release()
         self._image = None
         self._image_binary = None
         self._image_luma = None
+        self._image_packed = False
 
     def pre_process(self, image):
         """
@@ -124,6 +161,14 @@ class Template(Resource):
         Returns:
             bool: If matches.
         """
+        # Searching the whole image, reused only if the entire screenshot is unchanged
+        return FRAME_DIFF.get(
+            image, ('template', id(self), id(self.image), scaling, similarity), None,
+            lambda: self._match(image, scaling=scaling, similarity=similarity),
+            kind='template', keep=(self, self.image)
+        )
+
+    def _match(self, image, scaling=1.0, similarity=0.85):
         scaling = 1 / scaling
         if scaling != 1.0:
             image = cv2.resize(image, None, fx=scaling, fy=scaling)
@@ -155,11 +200,9 @@ class Template(Resource):
         Returns:
             bool: If matches.
         """
+        # graying and binarization
+        image_binary = FRAME_CACHE.convert(image, 'binary')
         if self.is_gif:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             for template in self.image_binary:
                 # template matching
                 res = cv2.matchTemplate(template, image_binary, cv2.TM_CCOEFF_NORMED)
@@ -171,10 +214,6 @@ class Template(Resource):
             return False
 
         else:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             # template matching
             res = cv2.matchTemplate(self.image_binary, image_binary, cv2.TM_CCOEFF_NORMED)
             _, sim, _, _ = cv2.minMaxLoc(res)
@@ -183,7 +222,7 @@ class Template(Resource):
 
     def match_luma(self, image, similarity=0.85):
         if self.is_gif:
-            image = rgb2luma(image)
+            image = FRAME_CACHE.convert(image, 'luma')
             for template in self.image_luma:
                 res = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, _ = cv2.minMaxLoc(res)
@@ -235,7 +274,7 @@ class Template(Resource):
         return sim, button
 
     def match_luma_result(self, image, name=None):
-        image = rgb2luma(image)
+        image = FRAME_CACHE.convert(image, 'luma')
         res = cv2.matchTemplate(image, self.image_luma, cv2.TM_CCOEFF_NORMED)
         _, sim, _, point = cv2.minMaxLoc(res)
         # print(self.file, sim)
@@ -791,6 +791,40 @@ def get_color(image, area):
     return color[:3]
 
 
+def get_colors(image, areas):
+    """
+    Calculate the average color of multiple areas in one pass.
+    Results are the same as calling `get_color()` on each area,
+    but only one integral image is calculated on the bounding box of all areas.
+
+    Args:
+        image (np.ndarray): Screenshot in RGB.
+        areas (list[tuple]): List of (upper_left_x, upper_left_y, bottom_right_x, bottom_right_y)
+
+    Returns:
+        np.ndarray: Shape (n, 3), (r, g, b) of each area
+    """
+    areas = np.round(np.array(areas, dtype=float).reshape(-1, 4)).astype(int)
+    if not len(areas):
+        return np.zeros((0, 3), dtype=float)
+    h, w = image.shape[:2]
+    # Areas outside of image are considered as black, like crop() does
+    x1 = np.clip(areas[:, 0], 0, w)
+    y1 = np.clip(areas[:, 1], 0, h)
+    x2 = np.clip(areas[:, 2], 0, w)
+    y2 = np.clip(areas[:, 3], 0, h)
+    bx1, by1, bx2, by2 = x1.min(), y1.min(), x2.max(), y2.max()
+    if bx1 >= bx2 or by1 >= by2:
+        return np.zeros((len(areas), 3), dtype=float)
+
+    integral = cv2.integral(image[by1:by2, bx1:bx2, :3])
+    x1, x2 = x1 - bx1, np.maximum(x2, x1) - bx1
+    y1, y2 = y1 - by1, np.maximum(y2, y1) - by1
+    total = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+    count = (areas[:, 2] - areas[:, 0]) * (areas[:, 3] - areas[:, 1])
+    return total / np.maximum(count, 1)[:, np.newaxis]
+
+
 class ImageNotSupported(Exception):
     """
     Raised if we can't perform image calculation on this image
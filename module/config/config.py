@@ -1,5 +1,5 @@
 import copy
-import operator
+import heapq
 import threading
 from datetime import datetime, timedelta
 
@@ -9,7 +9,7 @@ from module.base.filter import Filter
 from module.config.config_generated import GeneratedConfig
 from module.config.config_manual import ManualConfig, OutputConfig
 from module.config.config_updater import ConfigUpdater, ensure_time, get_server_next_update, nearest_future
-from module.config.deep import deep_get, deep_set
+from module.config.deep import deep_copy, deep_get, deep_set
 from module.config.utils import DEFAULT_TIME, dict_to_kv, filepath_config, get_os_reset_remain, path_to_arg
 from module.config.watcher import ConfigWatcher
 from module.exception import RequestHumanTakeover, ScriptError
@@ -57,6 +57,263 @@ def name_to_function(name):
     return function
 
 
+class TaskScheduler:
+    """
+    Index of `Scheduler` settings of all tasks, so the next task can be found without scanning the whole config.
+
+    - Tasks whose NextRun hasn't been reached are in `_timeline`, a heap of (next_run, priority).
+    - Tasks whose NextRun has been reached are moved to `_ready`, a heap of (priority,).
+    - Tasks with invalid NextRun are always pending, ahead of others.
+
+    Index is kept in sync by `sync()` after every `AzurLaneConfig.load()`,
+    only tasks with changed Scheduler.Enable or Scheduler.NextRun are re-indexed.
+    Outdated heap entries are skipped lazily, by comparing versions.
+    """
+
+    def __init__(self):
+        # Key: command. Value: Function
+        self.functions = {}
+        # Key: command. Value: int, increases every time the task is re-indexed
+        self.versions = {}
+        # Key: command in lowercase. Value: Index in SCHEDULER_PRIORITY
+        self.priority = {}
+        self.priority_string = None
+        # Key: command. Value: Index in config, to sort tasks with invalid NextRun
+        self.order = {}
+        # Key: command. Value: Function. Tasks with invalid NextRun
+        self.error = {}
+        # Heap of (next_run, priority, command, version)
+        self._timeline = []
+        # Heap of (priority, command, version)
+        self._ready = []
+        # Tasks before this time have been moved to `_ready`
+        self.now = DEFAULT_TIME
+
+    def set_priority(self, string):
+        """
+        Args:
+            string (str): SCHEDULER_PRIORITY, tasks not in it will never run
+        """
+        if string == self.priority_string:
+            return
+        f = Filter(regex=r"(.*)", attr=["command"])
+        f.load(string)
+        priority = {}
+        for index, (command,) in enumerate(f.filter):
+            priority.setdefault(command, index)
+        self.priority = priority
+        self.priority_string = string
+        self.rebuild()
+
+    def sync(self, data):
+        """
+        Re-index tasks that changed.
+
+        Args:
+            data (dict): `AzurLaneConfig.data`
+        """
+        for order, func_data in enumerate(data.values()):
+            if type(func_data) is not dict or "Scheduler" not in func_data:
+                continue
+            func = Function(func_data)
+            self.order[func.command] = order
+            old = self.functions.get(func.command)
+            if old is not None and old.enable == func.enable and old.next_run == func.next_run:
+                continue
+            self.functions[func.command] = func
+            self.index(func)
+        # Drop outdated entries if too many
+        if len(self._timeline) + len(self._ready) > 2 * len(self.functions) + 64:
+            self.rebuild()
+
+    def index(self, func):
+        command = func.command
+        version = self.versions.get(command, 0) + 1
+        self.versions[command] = version
+        self.error.pop(command, None)
+        if not func.enable:
+            return
+        if not isinstance(func.next_run, datetime):
+            self.error[command] = func
+            return
+        priority = self.priority.get(command.lower())
+        if priority is None:
+            return
+        if func.next_run < self.now:
+            heapq.heappush(self._ready, (priority, command, version))
+        else:
+            heapq.heappush(self._timeline, (func.next_run, priority, command, version))
+
+    def rebuild(self):
+        self._timeline = []
+        self._ready = []
+        self.error = {}
+        for func in self.functions.values():
+            self.index(func)
+
+    def get_error(self):
+        """
+        Returns:
+            list[Function]: Tasks with invalid NextRun, in config order
+        """
+        return sorted(self.error.values(), key=lambda func: self.order.get(func.command, 0))
+
+    def is_valid(self, command, version):
+        return self.versions.get(command) == version
+
+    def advance(self, now):
+        """
+        Move tasks that reached NextRun to ready queue.
+
+        Args:
+            now (datetime):
+        """
+        if now < self.now:
+            # Time goes back, when hoarding starts
+            self.now = now
+            self.rebuild()
+            return
+        self.now = now
+        timeline = self._timeline
+        while timeline and timeline[0][0] < now:
+            _, priority, command, version = heapq.heappop(timeline)
+            if self.is_valid(command, version):
+                heapq.heappush(self._ready, (priority, command, version))
+
+    @staticmethod
+    def _skip_outdated(heap, is_valid):
+        while heap and not is_valid(heap[0][-2], heap[0][-1]):
+            heapq.heappop(heap)
+
+    def peek(self, now):
+        """
+        Args:
+            now (datetime):
+
+        Returns:
+            Function: Task to run next, pending tasks first, then the nearest waiting task.
+                None if no task enabled.
+        """
+        self.advance(now)
+        if self.error:
+            return self.get_error()[0]
+        self._skip_outdated(self._ready, self.is_valid)
+        if self._ready:
+            return self.functions[self._ready[0][1]]
+        self._skip_outdated(self._timeline, self.is_valid)
+        if self._timeline:
+            return self.functions[self._timeline[0][2]]
+        return None
+
+    def pop(self, now):
+        """
+        Same as `peek()`, but the returned task is removed from index until it's re-indexed by `sync()`.
+        """
+        func = self.peek(now)
+        if func is not None:
+            self.versions[func.command] += 1
+            self.error.pop(func.command, None)
+        return func
+
+    def pending(self, now):
+        """
+        Returns:
+            list[Function]: Tasks that reached NextRun, sorted by priority
+        """
+        self.advance(now)
+        pending = self.get_error()
+        for _, command, version in sorted(self._ready):
+            if self.is_valid(command, version):
+                pending.append(self.functions[command])
+        return pending
+
+    def timeline(self, now, limit=None):
+        """
+        Args:
+            now (datetime):
+            limit (int): Max amount of tasks to return, None for all
+
+        Returns:
+            list[Function]: Tasks that haven't reached NextRun, sorted by NextRun then priority
+        """
+        self.advance(now)
+        entries = [entry for entry in self._timeline if self.is_valid(entry[2], entry[3])]
+        if limit is None:
+            entries.sort()
+        else:
+            entries = heapq.nsmallest(limit, entries)
+        return [self.functions[entry[2]] for entry in entries]
+
+
+class ConfigCache:
+    """
+    Parsed config files and compiled binding tables, shared by all AzurLaneConfig objects in this process.
+
+    Scheduler re-creates AzurLaneConfig after every task and binds on every loop,
+    with this cache, an unchanged config file is not read and updated again,
+    and binding a task is a lookup of the compiled table.
+    Everything is keyed on the (mtime_ns, size) signature of the file, see `ConfigWatcher.get_signature()`.
+    """
+    # Set to False to always read file and bind from scratch
+    enabled = True
+
+    def __init__(self):
+        # Key: config_name. Value: (signature, data)
+        self.data = {}
+        # Key: (config_name, func_list). Value: (signature, {arg: path})
+        self.binding = {}
+
+    def get_data(self, config_name, signature):
+        """
+        Returns:
+            dict: A copy of cached data, or None if file changed
+        """
+        if not self.enabled or signature is None:
+            return None
+        try:
+            cached_signature, data = self.data[config_name]
+        except KeyError:
+            return None
+        if cached_signature != signature:
+            return None
+        return deep_copy(data)
+
+    def set_data(self, config_name, signature, data):
+        if not self.enabled or signature is None:
+            return
+        self.data[config_name] = (signature, deep_copy(data))
+
+    def get_binding(self, config_name, func_list, signature):
+        """
+        Returns:
+            dict: Key: Argument name. Value: Path in data. None if file changed
+        """
+        if not self.enabled or signature is None:
+            return None
+        try:
+            cached_signature, bound = self.binding[(config_name, func_list)]
+        except KeyError:
+            return None
+        if cached_signature != signature:
+            return None
+        return bound
+
+    def set_binding(self, config_name, func_list, signature, bound):
+        if not self.enabled or signature is None:
+            return
+        # Drop tables of outdated files
+        for key in [k for k, v in self.binding.items() if k[0] == config_name and v[0] != signature]:
+            self.binding.pop(key, None)
+        self.binding[(config_name, func_list)] = (signature, bound)
+
+    def clear(self):
+        self.data.clear()
+        self.binding.clear()
+
+
+CONFIG_CACHE = ConfigCache()
+
+
 class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher):
     stop_event: threading.Event = None
     bound = {}
@@ -84,6 +341,8 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.modified = {}
         # Key: Argument name in GeneratedConfig. Value: Path in `data`.
         self.bound = {}
+        # Signature of the config file that `data` loaded from, see `ConfigWatcher.get_signature()`
+        self.data_signature = None
         # If write after every variable modification.
         self.auto_update = True
         # Force override variables
@@ -94,6 +353,8 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         # waiting_task: Run time haven't been reached, wait needed.
         self.pending_task = []
         self.waiting_task = []
+        # Index of Scheduler settings, synced in `load()`
+        self.scheduler = TaskScheduler()
         # Task to run and bind.
         # Task means the name of the function to run in AzurLaneAutoScript class.
         self.task: Function
@@ -124,11 +385,19 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.save()
 
     def load(self):
-        self.data = self.read_file(self.config_name)
+        # Get signature before reading, a file modified during reading will be read again next time
+        signature = self.get_signature()
+        data = CONFIG_CACHE.get_data(self.config_name, signature)
+        if data is None:
+            data = self.read_file(self.config_name)
+            CONFIG_CACHE.set_data(self.config_name, signature, data)
+        self.data = data
+        self.data_signature = signature
         self.config_override()
 
         for path, value in self.modified.items():
             deep_set(self.data, keys=path, value=value)
+        self.scheduler.sync(self.data)
 
     def bind(self, func, func_list=None):
         """
@@ -163,23 +432,40 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         logger.info(f"Bind task {func_list}")
 
         # Bind arguments
-        visited = set()
+        bound = CONFIG_CACHE.get_binding(self.config_name, tuple(func_list), self.data_signature)
+        if bound is None:
+            bound = self.compile_binding(func_list)
+            CONFIG_CACHE.set_binding(self.config_name, tuple(func_list), self.data_signature, bound)
         self.bound.clear()
+        self.bound.update(bound)
+        for arg, path in bound.items():
+            func, group, name = path.split('.')
+            super().__setattr__(arg, self.data[func][group][name])
+
+        # Override arguments
+        for arg, value in self.overridden.items():
+            super().__setattr__(arg, value)
+
+    def compile_binding(self, func_list):
+        """
+        Args:
+            func_list (list[str]): List of tasks to be bound, in priority order
+
+        Returns:
+            dict: Key: Argument name in GeneratedConfig. Value: Path in `data`.
+        """
+        bound = {}
+        visited = set()
         for func in func_list:
             func_data = self.data.get(func, {})
             for group, group_data in func_data.items():
-                for arg, value in group_data.items():
+                for arg in group_data.keys():
                     path = f"{group}.{arg}"
                     if path in visited:
                         continue
-                    arg = path_to_arg(path)
-                    super().__setattr__(arg, value)
-                    self.bound[arg] = f"{func}.{path}"
+                    bound[path_to_arg(path)] = f"{func}.{path}"
                     visited.add(path)
-
-        # Override arguments
-        for arg, value in self.overridden.items():
-            super().__setattr__(arg, value)
+        return bound
 
     @property
     def hoarding(self):
@@ -204,35 +490,12 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         """
         Calculate tasks, set pending_task and waiting_task
         """
-        pending = []
-        waiting = []
-        error = []
         now = datetime.now()
         if AzurLaneConfig.is_hoarding_task:
             now -= self.hoarding
-        for func in self.data.values():
-            func = Function(func)
-            if not func.enable:
-                continue
-            if not isinstance(func.next_run, datetime):
-                error.append(func)
-            elif func.next_run < now:
-                pending.append(func)
-            else:
-                waiting.append(func)
-
-        f = Filter(regex=r"(.*)", attr=["command"])
-        f.load(self.SCHEDULER_PRIORITY)
-        if pending:
-            pending = f.apply(pending)
-        if waiting:
-            waiting = f.apply(waiting)
-            waiting = sorted(waiting, key=operator.attrgetter("next_run"))
-        if error:
-            pending = error + pending
-
-        self.pending_task = pending
-        self.waiting_task = waiting
+        self.scheduler.set_priority(self.SCHEDULER_PRIORITY)
+        self.pending_task = self.scheduler.pending(now)
+        self.waiting_task = self.scheduler.timeline(now)
 
     def get_next(self):
         """
@@ -252,7 +515,7 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
 
         if self.waiting_task:
             logger.info("No task pending")
-            task = copy.deepcopy(self.waiting_task[0])
+            task = copy.copy(self.waiting_task[0])
             task.next_run = (task.next_run + self.hoarding).replace(microsecond=0)
             logger.attr("Task", task)
             return task
@@ -137,6 +137,25 @@ class ManualConfig:
     MAATOUCH_FILEPATH_LOCAL = './bin/MaaTouch/maatouchsync'
     MAATOUCH_FILEPATH_REMOTE = '/data/local/tmp/maatouchsync'
 
+    # Live screen preview in WebUI, opt-in.
+    # When enabled, each instance creates ./log/webui/<config>.preview and checks for viewers after every screenshot,
+    # frames are encoded only when someone is watching
+    SCREEN_PREVIEW = False
+    SCREEN_PREVIEW_FPS = 5
+    SCREEN_PREVIEW_WIDTH = 640
+    SCREEN_PREVIEW_QUALITY = 70
+    # Max bytes of compressed screenshots kept for error reports, see module/device/screenshot_ring.py
+    ERROR_SCREENSHOT_BUDGET = 64 * 1024 * 1024
+    # Capture the next screenshot in background while the current one is being evaluated,
+    # frames captured before the last click or swipe are dropped, see module/device/prefetch.py
+    SCREENSHOT_PREFETCH = False
+    # Reuse results of buttons, templates and OCR whose areas are unchanged since the last evaluation,
+    # see module/base/frame_diff.py
+    SCREENSHOT_DIFF = True
+    # Send clicks and swipes on a background thread, screenshots wait for them to be sent,
+    # see module/device/input_dispatcher.py
+    INPUT_ASYNC = False
+
     """
     module.campaign.gems_farming
     """
@@ -250,6 +269,9 @@ class ManualConfig:
     DETECTING_AREA = (123, 55, 1280, 720)
     SCREEN_CENTER = (SCREEN_SIZE[0] / 2, SCREEN_SIZE[1] / 2)
     DETECTION_BACKEND = 'homography'
+    # Reuse detection results of the last screenshot if camera didn't move or only panned,
+    # see module/map_detection/tracker.py
+    DETECTION_TRACKING = True
     # In event_20200723_cn B3D3, Grid have 1.2x width, images on the grid still remain the same.
     GRID_IMAGE_A_MULTIPLY = 1.0
 
@@ -389,6 +411,10 @@ class ManualConfig:
     OS_GLOBE_DETECTING_AREA = (0, 0, 1280, 720)
     OS_GLOBE_IMAGE_PAD = 700
     OS_GLOBE_IMAGE_RESIZE = 0.5
+    # Search range (x, y) around the last camera on globe, a swipe moves camera at most (1184, 751)
+    OS_GLOBE_SEARCH_WINDOW = (1300, 900)
+    # Search the entire globe if similarity around the last camera is lower than this
+    OS_GLOBE_SEARCH_THRESHOLD = 0.2
     OS_GLOBE_FIND_PEAKS_PARAMETERS = {
         'height': 100,
         # 'width': (0.9, 5),
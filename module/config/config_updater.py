@@ -1,12 +1,16 @@
+import hashlib
+import json
+import os
 import re
 import typing as t
 from copy import deepcopy
 
 from cached_property import cached_property
 
+from deploy.atomic import atomic_read_bytes
 from deploy.utils import DEPLOY_TEMPLATE, poor_yaml_read, poor_yaml_write
 from module.base.timer import timer
-from module.config.deep import deep_default, deep_get, deep_iter, deep_set
+from module.config.deep import deep_copy, deep_default, deep_get, deep_iter, deep_set
 from module.config.env import IS_ON_PHONE_CLOUD
 from module.config.server import VALID_CHANNEL_PACKAGE, VALID_PACKAGE, VALID_SERVER_LIST, to_package, to_server
 from module.config.utils import *
@@ -578,6 +582,85 @@ class ConfigGenerator:
         self.generate_deploy_template()
 
 
+class ConfigUpdatePlan:
+    """
+    args.json compiled for `ConfigUpdater.config_update()`.
+
+    Arguments are flattened into groups of (task, group, rows),
+    so updating a config is two dict lookups per group and one per argument,
+    instead of a deep_iter over args then deep_get and deep_set on every argument.
+    Defaults are parsed once here.
+    """
+
+    def __init__(self, args):
+        """
+        Args:
+            args (dict): Content of args.json
+        """
+        # list[tuple[str, str, list[tuple]]]
+        # (task, group, [(arg, default, parsed_default, option, forced, mutable), ...])
+        self.groups = []
+        for keys, data in deep_iter(args, depth=3):
+            # Skip non-dict items (leaf values like strings, numbers, etc.)
+            if not isinstance(data, dict):
+                continue
+            task, group, arg = keys
+            if not self.groups or self.groups[-1][0] != task or self.groups[-1][1] != group:
+                self.groups.append((task, group, []))
+            typ = data['type']
+            default = data['value']
+            parsed_default = parse_value(default, data=data)
+            # Values that can't be modified by user
+            forced = typ in ['lock', 'state'] or (data.get('display') == 'hide' and typ != 'stored')
+            mutable = isinstance(parsed_default, (dict, list))
+            self.groups[-1][2].append((arg, default, parsed_default, data.get('option'), forced, mutable))
+
+    def update(self, old, is_template=False):
+        """
+        Same as `parse_value()` on every argument in args, with values from old config.
+
+        Args:
+            old (dict):
+            is_template (bool):
+
+        Returns:
+            dict:
+        """
+        new = {}
+        for task, group, rows in self.groups:
+            try:
+                old_group = old[task][group]
+            except (KeyError, IndexError, TypeError):
+                old_group = None
+            new_group = {}
+            for arg, default, parsed_default, option, forced, mutable in rows:
+                if is_template or forced:
+                    value = parsed_default
+                else:
+                    try:
+                        value = old_group[arg]
+                    except (KeyError, IndexError, TypeError):
+                        value = default
+                    if value is None or value == '':
+                        value = parsed_default
+                    elif option is not None and value not in option:
+                        value = default
+                    elif isinstance(value, str):
+                        value = parse_value(value, data=PARSE_NO_OPTION)
+                if mutable and value is parsed_default:
+                    value = deep_copy(value)
+                new_group[arg] = value
+            try:
+                new[task][group] = new_group
+            except KeyError:
+                new[task] = {group: new_group}
+        return new
+
+
+# parse_value() without option check
+PARSE_NO_OPTION = {}
+
+
 class ConfigUpdater:
     # source, target, (optional)convert_func
     redirection = [
@@ -638,9 +721,33 @@ class ConfigUpdater:
     #     ]
     # ]
 
+    # Parsed args.json shared by all instances, scheduler creates a new config object after every task.
+    # (mtime_ns, args)
+    _args_cache = (None, None)
+    # (args, ConfigUpdatePlan), compiled from the args above
+    _plan_cache = (None, None)
+    # Results of read_file(), an unchanged config file is updated only once.
+    # Key: config_name. Value: ((ConfigUpdatePlan, sha1 of config file, is_template), data)
+    _update_memo = {}
+
     @cached_property
     def args(self):
-        return read_file(filepath_args())
+        file = filepath_args()
+        signature = os.stat(file).st_mtime_ns
+        cached_signature, args = ConfigUpdater._args_cache
+        if signature != cached_signature:
+            args = read_file(file)
+            ConfigUpdater._args_cache = (signature, args)
+        return args
+
+    @cached_property
+    def update_plan(self):
+        args = self.args
+        cached_args, plan = ConfigUpdater._plan_cache
+        if cached_args is not args:
+            plan = ConfigUpdatePlan(args)
+            ConfigUpdater._plan_cache = (args, plan)
+        return plan
 
     def config_update(self, old, is_template=False):
         """
@@ -651,20 +758,7 @@ class ConfigUpdater:
         Returns:
             dict:
         """
-        new = {}
-
-        for keys, data in deep_iter(self.args, depth=3):
-            # Skip non-dict items (leaf values like strings, numbers, etc.)
-            if not isinstance(data, dict):
-                continue
-            value = deep_get(old, keys=keys, default=data['value'])
-            typ = data['type']
-            display = data.get('display')
-            if is_template or value is None or value == '' \
-                    or typ in ['lock', 'state'] or (display == 'hide' and typ != 'stored'):
-                value = data['value']
-            value = parse_value(value, data=data)
-            deep_set(new, keys=keys, value=value)
+        new = self.update_plan.update(old, is_template=is_template)
 
         # AzurStatsID
         if is_template:
@@ -820,8 +914,20 @@ class ConfigUpdater:
         Returns:
             dict:
         """
-        old = read_file(filepath_config(config_name))
+        file = filepath_config(config_name)
+        content = atomic_read_bytes(file)
+        key = (self.update_plan, hashlib.sha1(content).hexdigest(), is_template)
+        try:
+            cached_key, data = ConfigUpdater._update_memo[config_name]
+            if cached_key == key:
+                return deep_copy(data)
+        except KeyError:
+            pass
+
+        print(f'read: {file}')
+        old = json.loads(content) if content else {}
         new = self.config_update(old, is_template=is_template)
+        ConfigUpdater._update_memo[config_name] = (key, deep_copy(new))
         # The updated config did not write into file, although it doesn't matters.
         # Commented for performance issue
         # self.write_file(config_name, new)
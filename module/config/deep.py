@@ -531,3 +531,23 @@ def deep_iter_patch(before, after):
         queue = new_queue
         if not queue:
             break
+
+
+def deep_copy(data):
+    """
+    Copy nested dict and list, leaf values are shared.
+    About 10x faster than copy.deepcopy() on config data,
+    leaf values in config are immutable (str, int, float, bool, datetime, None).
+
+    Args:
+        data (dict, list):
+
+    Returns:
+        dict, list:
+    """
+    typ = type(data)
+    if typ is dict:
+        return {k: deep_copy(v) if type(v) in (dict, list) else v for k, v in data.items()}
+    if typ is list:
+        return [deep_copy(v) if type(v) in (dict, list) else v for v in data]
+    return data
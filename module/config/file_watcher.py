@@ -0,0 +1,232 @@
+import os
+import select
+import sys
+import threading
+
+from module.logger import logger
+
+
+class FolderWatcher:
+    """
+    Block until something in a folder is modified, or timeout.
+
+    Wakeups are hints only, callers should check if the file they care about actually changed.
+    All watchers can be interrupted from another thread by `interrupt()`,
+    an interrupt before `wait()` makes the next `wait()` return immediately.
+
+    This base class doesn't watch the folder, it's the stat polling fallback:
+    `wait()` wakes up every `max_interval` seconds and callers check the file by themselves.
+    Event based watchers override `wait()`, `interrupt()` and `close()`.
+    """
+    max_interval = 1
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.event = threading.Event()
+
+    def wait(self, timeout):
+        """
+        Args:
+            timeout (float): Seconds
+
+        Returns:
+            bool: True if woken up by folder changes or interrupts, False if timeout
+        """
+        woken = self.event.wait(timeout=min(max(timeout, 0), self.max_interval))
+        self.event.clear()
+        return woken
+
+    def interrupt(self):
+        self.event.set()
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher(FolderWatcher):
+    """
+    inotify on Linux, through ctypes.
+    """
+    # Event based watchers may miss changes on network drives or docker volumes mounted from host,
+    # callers should not wait longer than this.
+    max_interval = 60
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+
+    def __init__(self, folder):
+        super().__init__(folder)
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        # IN_NONBLOCK and IN_CLOEXEC equal to O_NONBLOCK and O_CLOEXEC
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        # Alas writes config by writing a temp file then os.replace(), which is IN_MOVED_TO
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed on {folder}')
+        self.pipe_r, self.pipe_w = os.pipe()
+        os.set_blocking(self.pipe_r, False)
+
+    @staticmethod
+    def drain(fd):
+        try:
+            while os.read(fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd, self.pipe_r], [], [], max(timeout, 0))
+        for fd in readable:
+            self.drain(fd)
+        return bool(readable)
+
+    def interrupt(self):
+        os.write(self.pipe_w, b'\x00')
+
+    def close(self):
+        for fd in [self.fd, self.pipe_r, self.pipe_w]:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class Win32Watcher(FolderWatcher):
+    """
+    FindFirstChangeNotification on Windows, through ctypes.
+    """
+    # Same as InotifyWatcher
+    max_interval = 60
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    FILE_NOTIFY_CHANGE_SIZE = 0x00000008
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    WAIT_OBJECT_0 = 0x00000000
+    INFINITE = 0xFFFFFFFF
+
+    def __init__(self, folder):
+        super().__init__(folder)
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        kernel32.FindFirstChangeNotificationW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD]
+        kernel32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        kernel32.FindNextChangeNotification.argtypes = [wintypes.HANDLE]
+        kernel32.FindCloseChangeNotification.argtypes = [wintypes.HANDLE]
+        kernel32.CreateEventW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.SetEvent.argtypes = [wintypes.HANDLE]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        kernel32.WaitForMultipleObjects.argtypes = [
+            wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE), wintypes.BOOL, wintypes.DWORD]
+        kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+        self.kernel32 = kernel32
+
+        mask = self.FILE_NOTIFY_CHANGE_FILE_NAME | self.FILE_NOTIFY_CHANGE_SIZE | self.FILE_NOTIFY_CHANGE_LAST_WRITE
+        self.change = kernel32.FindFirstChangeNotificationW(os.path.abspath(folder), False, mask)
+        if self.change in (None, wintypes.HANDLE(-1).value):
+            raise ctypes.WinError(ctypes.get_last_error())
+        # Auto-reset event for interrupts
+        self.event = kernel32.CreateEventW(None, False, False, None)
+        if not self.event:
+            kernel32.FindCloseChangeNotification(self.change)
+            raise ctypes.WinError(ctypes.get_last_error())
+        self.handles = (wintypes.HANDLE * 2)(self.change, self.event)
+
+    def wait(self, timeout):
+        milliseconds = min(int(max(timeout, 0) * 1000), self.INFINITE - 1)
+        result = self.kernel32.WaitForMultipleObjects(2, self.handles, False, milliseconds)
+        if result == self.WAIT_OBJECT_0:
+            # Re-arm for the next change
+            self.kernel32.FindNextChangeNotification(self.change)
+            return True
+        if result == self.WAIT_OBJECT_0 + 1:
+            return True
+        return False
+
+    def interrupt(self):
+        self.kernel32.SetEvent(self.event)
+
+    def close(self):
+        self.kernel32.FindCloseChangeNotification(self.change)
+        self.kernel32.CloseHandle(self.event)
+
+
+# Key: Absolute folder path. Value: FolderWatcher
+_folder_watchers = {}
+_folder_watchers_lock = threading.Lock()
+
+
+def get_folder_watcher(folder):
+    """
+    Get a shared watcher of the folder, event based if available, otherwise stat polling.
+
+    Args:
+        folder (str):
+
+    Returns:
+        FolderWatcher:
+    """
+    folder = os.path.abspath(folder)
+    with _folder_watchers_lock:
+        try:
+            return _folder_watchers[folder]
+        except KeyError:
+            pass
+
+        watcher = None
+        if sys.platform.startswith('linux'):
+            backend = InotifyWatcher
+        elif sys.platform == 'win32':
+            backend = Win32Watcher
+        else:
+            backend = None
+        if backend is not None:
+            try:
+                watcher = backend(folder)
+            except Exception as e:
+                logger.warning(f'{backend.__name__} unavailable on {folder}, fallback to polling: {e}')
+        if watcher is None:
+            watcher = FolderWatcher(folder)
+
+        _folder_watchers[folder] = watcher
+        return watcher
+
+
+# (stop_event, watcher) that already have a thread waiting on them
+_stop_event_watched = []
+
+
+def watch_stop_event(stop_event, watcher):
+    """
+    Interrupt the watcher when stop_event is set.
+    One daemon thread per stop_event, blocked on `stop_event.wait()`, so no polling is needed.
+
+    Args:
+        stop_event (threading.Event, multiprocessing.managers.EventProxy):
+        watcher (FolderWatcher):
+    """
+    with _folder_watchers_lock:
+        for event, watched in _stop_event_watched:
+            if event is stop_event and watched is watcher:
+                return
+        _stop_event_watched.append((stop_event, watcher))
+
+    def run():
+        try:
+            stop_event.wait()
+        except (EOFError, OSError):
+            # Manager process of stop_event is gone
+            return
+        watcher.interrupt()
+
+    thread = threading.Thread(target=run, name='StopEventWatcher', daemon=True)
+    thread.start()
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 
+from module.config.file_watcher import get_folder_watcher, watch_stop_event
 from module.config.utils import filepath_config, DEFAULT_TIME
 from module.logger import logger
 
@@ -8,9 +9,11 @@ from module.logger import logger
 class ConfigWatcher:
     config_name = 'alas'
     start_mtime = DEFAULT_TIME
+    start_signature = None
 
     def start_watching(self) -> None:
         self.start_mtime = self.get_mtime()
+        self.start_signature = self.get_signature()
 
     def get_mtime(self) -> datetime:
         """
@@ -20,14 +23,52 @@ class ConfigWatcher:
         mtime = datetime.fromtimestamp(timestamp).replace(microsecond=0)
         return mtime
 
+    def get_signature(self) -> tuple:
+        """
+        Returns:
+            tuple[int, int]: (mtime_ns, size) of the file, changes on every write,
+                or None if file not exists
+        """
+        try:
+            stat = os.stat(filepath_config(self.config_name))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
     def should_reload(self) -> bool:
         """
         Returns:
             bool: Whether the file has been modified and configs should reload
         """
         mtime = self.get_mtime()
-        if mtime > self.start_mtime:
+        # mtime is in seconds, signature catches modifications within the same second
+        if mtime > self.start_mtime or self.get_signature() != self.start_signature:
             logger.info(f'Config "{self.config_name}" changed at {mtime}')
             return True
         else:
             return False
+
+    def wait_change(self, future, stop_event=None) -> bool:
+        """
+        Sleep until `future`, wake up as soon as config file is modified or stop_event is set.
+        Call `start_watching()` before this.
+
+        Args:
+            future (datetime):
+            stop_event (threading.Event):
+
+        Returns:
+            bool: True if config changed or stop_event set, False if `future` reached.
+        """
+        watcher = get_folder_watcher(os.path.dirname(filepath_config(self.config_name)))
+        if stop_event is not None:
+            watch_stop_event(stop_event, watcher)
+        while 1:
+            if stop_event is not None and stop_event.is_set():
+                return True
+            if self.should_reload():
+                return True
+            remain = (future - datetime.now()).total_seconds()
+            if remain <= 0:
+                return False
+            watcher.wait(min(remain, watcher.max_interval))
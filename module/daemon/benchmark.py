@@ -1,4 +1,6 @@
+import os
 import time
+import tracemalloc
 import typing as t
 
 import numpy as np
@@ -9,6 +11,8 @@ from module.base.utils import float2str as float2str_
 from module.base.utils import random_rectangle_point
 from module.campaign.campaign_ui import CampaignUI
 from module.daemon.daemon_base import DaemonBase
+from module.device.method.adb import load_screencap, load_screencap_png
+from module.device.method.utils import FrameBuffer
 from module.exception import RequestHumanTakeover
 from module.logger import logger
 
@@ -248,6 +252,97 @@ class Benchmark(DaemonBase, CampaignUI):
         return method
 
 
+    def record_screencap_dump(self, folder='./screenshots/screencap_dump', count=3):
+        """
+        Save raw outputs of `screencap` and `screencap -p`,
+        which can be replayed by `benchmark_screencap_decode()` without emulator.
+
+        Args:
+            folder (str):
+            count (int): Number of dumps of each format
+        """
+        os.makedirs(folder, exist_ok=True)
+        for n in range(count):
+            now = int(time.time() * 1000)
+            data = self.device.adb_shell(['screencap'], stream=True)
+            with open(os.path.join(folder, f'{now}_{n}.raw'), 'wb') as f:
+                f.write(data)
+            data = self.device.adb_shell(['screencap', '-p'], stream=True)
+            with open(os.path.join(folder, f'{now}_{n}.png'), 'wb') as f:
+                f.write(data)
+        logger.info(f'Screencap dumps saved to {folder}')
+
+
+def benchmark_screencap_decode(folder='./screenshots/screencap_dump', total=30):
+    """
+    Benchmark decoders of screencap dumps, no emulator needed.
+    `*.raw` are outputs of `screencap`, `*.png` are outputs of `screencap -p`,
+    see `Benchmark.record_screencap_dump()`.
+
+    Args:
+        folder (str):
+        total (int): Decode times of each dump
+
+    Returns:
+        list[list]: [method, time cost per frame, bytes allocated per frame]
+    """
+    dumps = {'raw': [], 'png': []}
+    for file in sorted(os.listdir(folder)):
+        ext = file.rsplit('.', maxsplit=1)[-1]
+        if ext in dumps:
+            with open(os.path.join(folder, file), 'rb') as f:
+                dumps[ext].append(f.read())
+    logger.info(f'Loaded screencap dumps: raw={len(dumps["raw"])}, png={len(dumps["png"])}')
+
+    frame_buffer = FrameBuffer(size=2)
+    decoders = [
+        # ADB, screencap -p
+        ['ADB', 'png', load_screencap_png],
+        # ADB_nc, screencap on http device, allocating a new frame each time, as it was
+        ['ADB_nc', 'raw', load_screencap],
+        # ADB_nc, screencap on http device, decoding into double buffered frames
+        ['ADB_nc_buffer', 'raw', lambda data: load_screencap(data, buffer=frame_buffer)],
+    ]
+
+    result = []
+    for method, ext, decoder in decoders:
+        if not dumps[ext]:
+            continue
+        logger.hr(f'Decode {method}', level=2)
+        image = None
+        record = []
+        for n in range(total):
+            data = dumps[ext][n % len(dumps[ext])]
+            start = time.perf_counter()
+            last, image = image, decoder(data)
+            record.append(time.perf_counter() - start)
+            # Free last frame as Screenshot does, so the buffer can be reused
+            if last is not None:
+                frame_buffer.free(last)
+        # Trace allocations in another round, tracemalloc slows down decoding
+        allocated = 0
+        for data in dumps[ext]:
+            tracemalloc.start()
+            last, image = image, decoder(data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            frame_buffer.free(last)
+            allocated += peak
+        allocated = int(allocated / len(dumps[ext]))
+        average = float(np.mean(record))
+        logger.info(f'{method}: {float2str(average)}, {allocated} bytes per frame, shape={image.shape}')
+        result.append([method, average, allocated])
+
+    table = Table(show_lines=True)
+    table.add_column('Decode', header_style="bright_cyan", style="cyan", no_wrap=True)
+    table.add_column("Time", style="magenta")
+    table.add_column("Allocated", style="green")
+    for row in result:
+        table.add_row(row[0], float2str(row[1]), f'{row[2] / 1024:.1f}KB')
+    logger.print(table, justify='center')
+    return result
+
+
 def run_benchmark(config):
     try:
         Benchmark(config, task='Benchmark').run()
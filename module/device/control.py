@@ -1,7 +1,11 @@
+import time
+from concurrent.futures import Future
+
 from module.base.button import Button
 from module.base.decorator import cached_property
 from module.base.timer import Timer
 from module.base.utils import *
+from module.device.input_dispatcher import InputDispatcher
 from module.device.method.hermit import Hermit
 from module.device.method.maatouch import MaaTouch
 from module.device.method.minitouch import Minitouch
@@ -11,10 +15,63 @@ from module.logger import logger
 
 
 class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
+    # Time in time.perf_counter() when the last input or sleep ended,
+    # screenshots captured before it are outdated, see ScreenshotPrefetch
+    action_time = 0.
+
     def handle_control_check(self, button):
         # Will be overridden in Device
         pass
 
+    def action_record(self):
+        self.action_time = time.perf_counter()
+
+    def sleep(self, second):
+        """
+        Args:
+            second(int, float, tuple):
+        """
+        super().sleep(second)
+        # Screen is expected to change while sleeping
+        self.action_record()
+
+    @cached_property
+    def input_dispatcher(self):
+        """
+        Returns:
+            InputDispatcher: None if inputs are sent synchronously.
+        """
+        if not self.config.INPUT_ASYNC:
+            return None
+        return InputDispatcher(on_done=self.action_record)
+
+    def input_call(self, method, func, *args, **kwargs):
+        """
+        Send an input command, on the dispatcher thread if INPUT_ASYNC is enabled.
+
+        Args:
+            method (str): Control method.
+            func (callable): Function that sends the command.
+
+        Returns:
+            Future: Done when the command is sent.
+        """
+        if self.input_dispatcher is not None:
+            return self.input_dispatcher.submit(method, func, *args, **kwargs)
+        future = Future()
+        future.set_running_or_notify_cancel()
+        func(*args, **kwargs)
+        self.action_record()
+        future.set_result(None)
+        return future
+
+    def input_wait(self):
+        """
+        Wait until submitted inputs are sent, call it where ordering matters, such as before screenshots.
+        """
+        if self.input_dispatcher is not None:
+            self.input_dispatcher.wait()
+
     @cached_property
     def click_methods(self):
         return {
@@ -32,6 +89,9 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
         Args:
             button (button.Button): AzurLane Button instance.
             control_check (bool):
+
+        Returns:
+            Future: Done when the click is sent.
         """
         if control_check:
             self.handle_control_check(button)
@@ -44,7 +104,7 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             self.config.Emulator_ControlMethod,
             self.click_adb
         )
-        method(x, y)
+        return self.input_call(self.config.Emulator_ControlMethod, method, x, y)
 
     def multi_click(self, button, n, interval=(0.1, 0.2)):
         self.handle_control_check(button)
@@ -72,18 +132,22 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             'Click %s @ %s, %s' % (point2str(x, y), button, duration)
         )
         method = self.config.Emulator_ControlMethod
-        if method == 'minitouch':
-            self.long_click_minitouch(x, y, duration)
-        elif method == 'uiautomator2':
-            self.long_click_uiautomator2(x, y, duration)
-        elif method == 'scrcpy':
-            self.long_click_scrcpy(x, y, duration)
-        elif method == 'MaaTouch':
-            self.long_click_maatouch(x, y, duration)
-        elif method == 'nemu_ipc':
-            self.long_click_nemu_ipc(x, y, duration)
-        else:
-            self.swipe_adb((x, y), (x, y), duration)
+
+        def send():
+            if method == 'minitouch':
+                self.long_click_minitouch(x, y, duration)
+            elif method == 'uiautomator2':
+                self.long_click_uiautomator2(x, y, duration)
+            elif method == 'scrcpy':
+                self.long_click_scrcpy(x, y, duration)
+            elif method == 'MaaTouch':
+                self.long_click_maatouch(x, y, duration)
+            elif method == 'nemu_ipc':
+                self.long_click_nemu_ipc(x, y, duration)
+            else:
+                self.swipe_adb((x, y), (x, y), duration)
+
+        return self.input_call(method, send)
 
     def swipe(self, p1, p2, duration=(0.1, 0.2), name='SWIPE', distance_check=True):
         self.handle_control_check(name)
@@ -106,18 +170,21 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
                 logger.info('Swipe distance < 10px, dropped')
                 return
 
-        if method == 'minitouch':
-            self.swipe_minitouch(p1, p2)
-        elif method == 'uiautomator2':
-            self.swipe_uiautomator2(p1, p2, duration=duration)
-        elif method == 'scrcpy':
-            self.swipe_scrcpy(p1, p2)
-        elif method == 'MaaTouch':
-            self.swipe_maatouch(p1, p2)
-        elif method == 'nemu_ipc':
-            self.swipe_nemu_ipc(p1, p2)
-        else:
-            self.swipe_adb(p1, p2, duration=duration)
+        def send():
+            if method == 'minitouch':
+                self.swipe_minitouch(p1, p2)
+            elif method == 'uiautomator2':
+                self.swipe_uiautomator2(p1, p2, duration=duration)
+            elif method == 'scrcpy':
+                self.swipe_scrcpy(p1, p2)
+            elif method == 'MaaTouch':
+                self.swipe_maatouch(p1, p2)
+            elif method == 'nemu_ipc':
+                self.swipe_nemu_ipc(p1, p2)
+            else:
+                self.swipe_adb(p1, p2, duration=duration)
+
+        return self.input_call(method, send)
 
     def swipe_vector(self, vector, box=(123, 159, 1175, 628), random_range=(0, 0, 0, 0), padding=15,
                      duration=(0.1, 0.2), whitelist_area=None, blacklist_area=None, name='SWIPE', distance_check=True):
@@ -155,20 +222,24 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             'Drag %s -> %s' % (point2str(*p1), point2str(*p2))
         )
         method = self.config.Emulator_ControlMethod
-        if method == 'minitouch':
-            self.drag_minitouch(p1, p2, point_random=point_random)
-        elif method == 'uiautomator2':
-            self.drag_uiautomator2(
-                p1, p2, segments=segments, shake=shake, point_random=point_random, shake_random=shake_random,
-                swipe_duration=swipe_duration, shake_duration=shake_duration)
-        elif method == 'scrcpy':
-            self.drag_scrcpy(p1, p2, point_random=point_random)
-        elif method == 'MaaTouch':
-            self.drag_maatouch(p1, p2, point_random=point_random)
-        elif method == 'nemu_ipc':
-            self.drag_nemu_ipc(p1, p2, point_random=point_random)
-        else:
-            logger.warning(f'Control method {method} does not support drag well, '
-                           f'falling back to ADB swipe may cause unexpected behaviour')
-            self.swipe_adb(p1, p2, duration=ensure_time(swipe_duration * 2))
-            self.click(Button(area=(), color=(), button=area_offset(point_random, p2), name=name), False)
+
+        def send():
+            if method == 'minitouch':
+                self.drag_minitouch(p1, p2, point_random=point_random)
+            elif method == 'uiautomator2':
+                self.drag_uiautomator2(
+                    p1, p2, segments=segments, shake=shake, point_random=point_random, shake_random=shake_random,
+                    swipe_duration=swipe_duration, shake_duration=shake_duration)
+            elif method == 'scrcpy':
+                self.drag_scrcpy(p1, p2, point_random=point_random)
+            elif method == 'MaaTouch':
+                self.drag_maatouch(p1, p2, point_random=point_random)
+            elif method == 'nemu_ipc':
+                self.drag_nemu_ipc(p1, p2, point_random=point_random)
+            else:
+                logger.warning(f'Control method {method} does not support drag well, '
+                               f'falling back to ADB swipe may cause unexpected behaviour')
+                self.swipe_adb(p1, p2, duration=ensure_time(swipe_duration * 2))
+                self.click(Button(area=(), color=(), button=area_offset(point_random, p2), name=name), False)
+
+        return self.input_call(method, send)
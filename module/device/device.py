@@ -189,6 +189,8 @@ class Device(Screenshot, Control, AppControl, Input):
             np.ndarray:
         """
         self.stuck_record_check()
+        # Screenshots should be taken after inputs are sent
+        self.input_wait()
 
         try:
             super().screenshot()
@@ -207,15 +209,22 @@ class Device(Screenshot, Control, AppControl, Input):
 
     def dump_hierarchy(self) -> etree._Element:
         self.stuck_record_check()
+        self.input_wait()
         return super().dump_hierarchy()
 
     def release_during_wait(self):
+        self.input_wait()
+        # Capture in flight must be done before releasing screenshot methods
+        if self.screenshot_prefetch is not None:
+            self.screenshot_prefetch.stop()
         # Scrcpy server is still sending video stream,
         # stop it during wait
         if self.config.Emulator_ScreenshotMethod == 'scrcpy':
             self._scrcpy_server_stop()
         if self.config.Emulator_ScreenshotMethod == 'nemu_ipc':
             self.nemu_ipc_release()
+        # Idle frames can be re-allocated after wait
+        self.frame_buffer.release()
 
     def get_orientation(self):
         """
@@ -328,7 +337,9 @@ class Device(Screenshot, Control, AppControl, Input):
             logger.critical('No app stop/start, because HandleError disabled')
             logger.critical('Please enable Alas.Error.HandleError or manually login to AzurLane')
             raise RequestHumanTakeover
+        self.input_wait()
         super().app_start()
+        self.action_record()
         self.stuck_record_clear()
         self.click_record_clear()
 
@@ -337,6 +348,8 @@ class Device(Screenshot, Control, AppControl, Input):
             logger.critical('No app stop/start, because HandleError disabled')
             logger.critical('Please enable Alas.Error.HandleError or manually login to AzurLane')
             raise RequestHumanTakeover
+        self.input_wait()
         super().app_stop()
+        self.action_record()
         self.stuck_record_clear()
         self.click_record_clear()
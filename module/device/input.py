@@ -10,10 +10,13 @@ class Input(Uiautomator2):
         return shown
 
     def text_input_and_confirm(self, text: str, clear: bool=False):
+        # Input box should be clicked before typing
+        self.input_wait()
         for fail_count in range(3):
             try:
                 self.u2_send_keys(text=text, clear=clear)
                 self.u2_send_action(6)
+                self.action_record()
                 break
             except EnvironmentError as e:
                 if fail_count >= 2:
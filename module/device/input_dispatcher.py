@@ -0,0 +1,166 @@
+import bisect
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from module.logger import logger
+
+
+class InputDispatcher:
+    """
+    Send input commands on a background thread, in the order they are submitted.
+
+    `Control.click()`, `swipe()` and others submit commands and return futures immediately,
+    so the bot loop doesn't wait for minitouch, MaaTouch, nemu_ipc or ADB transports.
+    Commands queued while the thread is busy are taken in one batch and sent back to back.
+    Nothing is merged or dropped, repeated clicks are intentional, such as in `multi_click()`.
+
+    Call `wait()` where ordering matters, such as before taking a screenshot.
+    If a command fails, commands queued after it are cancelled, and the error is raised in `wait()`.
+
+    ```
+    dispatcher = InputDispatcher(on_done=self.action_record)
+    future = dispatcher.submit('minitouch', self.click_minitouch, x, y)
+    dispatcher.wait()
+    ```
+    """
+    # Upper bounds of latency buckets in milliseconds
+    BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+    def __init__(self, on_done=None):
+        """
+        Args:
+            on_done (callable): Called on the dispatcher thread after each command, without arguments.
+        """
+        self.on_done = on_done
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.thread = None
+        # Number of commands submitted but not finished
+        self.unfinished = 0
+        self.error = None
+
+        # Counters for profiling
+        # Key: method, value: list of counts in each bucket, the last one is for larger values
+        self.histograms = {}
+        self.batches = 0
+
+    def submit(self, method, func, *args, **kwargs):
+        """
+        Args:
+            method (str): Control method, used to group latency stats.
+            func (callable): Function that sends the command.
+            *args:
+            **kwargs:
+
+        Returns:
+            Future: Done when the command is sent.
+        """
+        future = Future()
+        with self.condition:
+            self.pending.append((future, method, func, args, kwargs, time.perf_counter()))
+            self.unfinished += 1
+            self.condition.notify()
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name='InputDispatcher', daemon=True)
+            self.thread.start()
+        return future
+
+    def run(self):
+        while 1:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                batch = list(self.pending)
+                self.pending.clear()
+            self.batches += 1
+            for future, method, func, args, kwargs, submitted in batch:
+                self.dispatch(future, method, func, args, kwargs, submitted)
+                with self.condition:
+                    self.unfinished -= 1
+                    self.condition.notify_all()
+
+    def dispatch(self, future, method, func, args, kwargs, submitted):
+        if self.error is not None or not future.set_running_or_notify_cancel():
+            future.cancel()
+            return
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            self.error = e
+            future.set_exception(e)
+            return
+        future.set_result(None)
+        self.record(method, time.perf_counter() - submitted)
+        if self.on_done is not None:
+            self.on_done()
+
+    def wait(self):
+        """
+        Wait until all submitted commands are sent.
+
+        Raises:
+            Exception: The first error in commands since the last wait.
+        """
+        with self.condition:
+            while self.unfinished:
+                self.condition.wait()
+            error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def record(self, method, cost):
+        """
+        Args:
+            method (str):
+            cost (float): Seconds from submitting to sent.
+        """
+        histogram = self.histograms.get(method)
+        if histogram is None:
+            histogram = [0] * (len(self.BUCKETS) + 1)
+            self.histograms[method] = histogram
+        histogram[bisect.bisect_left(self.BUCKETS, cost * 1000)] += 1
+
+    def percentile(self, histogram, q):
+        """
+        Args:
+            histogram (list[int]):
+            q (float): 0 to 1.
+
+        Returns:
+            str: Upper bound of the bucket that the percentile falls in.
+        """
+        target = sum(histogram) * q
+        count = 0
+        for index, n in enumerate(histogram):
+            count += n
+            if count >= target and n:
+                if index < len(self.BUCKETS):
+                    return f'<={self.BUCKETS[index]}ms'
+                return f'>{self.BUCKETS[-1]}ms'
+        return '-'
+
+    def stats(self):
+        """
+        Returns:
+            dict: Latency from submitting to sent, since the last log.
+                Key: method, value: {'count': int, 'histogram': {bucket: count}}
+        """
+        names = [f'<={bound}ms' for bound in self.BUCKETS] + [f'>{self.BUCKETS[-1]}ms']
+        return {
+            method: {'count': sum(histogram), 'histogram': dict(zip(names, histogram))}
+            for method, histogram in self.histograms.items()
+        }
+
+    def log(self):
+        if not self.histograms:
+            return
+        commands = sum(sum(histogram) for histogram in self.histograms.values())
+        logger.info(f'Input dispatcher: {commands} commands in {self.batches} batches')
+        for method, histogram in self.histograms.items():
+            logger.info(f'Input {method}: {sum(histogram)} commands, '
+                        f'p50 {self.percentile(histogram, 0.5)}, p90 {self.percentile(histogram, 0.9)}, '
+                        f'p99 {self.percentile(histogram, 0.99)}')
+        self.histograms = {}
+        self.batches = 0
@@ -11,7 +11,7 @@ from module.base.decorator import Config
 from module.config.server import DICT_PACKAGE_TO_ACTIVITY
 from module.device.connection import Connection
 from module.device.method.utils import (ImageTruncated, PackageNotInstalled, RETRY_TRIES, handle_adb_error,
-                                        handle_unknown_host_service, remove_prefix, retry_sleep)
+                                        handle_unknown_host_service, retry_sleep)
 from module.exception import EmulatorNotRunningError, RequestHumanTakeover, ScriptError
 from module.logger import logger
 
@@ -84,10 +84,11 @@ def retry(func):
     return retry_wrapper
 
 
-def load_screencap(data):
+def load_screencap(data, buffer=None):
     """
     Args:
         data: Raw data from `screencap`
+        buffer (FrameBuffer): Decode into a reusable frame if given
 
     Returns:
         np.ndarray:
@@ -97,17 +98,50 @@ def load_screencap(data):
     channel = 4  # screencap sends an RGBA image
     width, height, _ = header  # Usually to be 1280, 720, 1
 
-    image = np.frombuffer(data, dtype=np.uint8)
-    if image is None:
-        raise ImageTruncated('Empty image after reading from buffer')
-
+    # Read pixels at the end of stream directly, without copying the stream
+    size = int(width * height * channel)
     try:
-        image = image[-int(width * height * channel):].reshape(height, width, channel)
+        image = np.frombuffer(data, dtype=np.uint8, count=size, offset=len(data) - size)
+        image = image.reshape(height, width, channel)
     except ValueError as e:
         # ValueError: cannot reshape array of size 0 into shape (720,1280,4)
+        # ValueError: offset must be non-negative and no greater than buffer length
         raise ImageTruncated(str(e))
 
-    image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    if buffer is not None:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR, dst=buffer.get((height, width, 3)))
+    else:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    if image is None:
+        raise ImageTruncated('Empty image after cv2.cvtColor')
+
+    return image
+
+
+def load_screencap_png(data):
+    """
+    Args:
+        data: PNG data from `screencap -p`, with line endings already fixed
+
+    Returns:
+        np.ndarray:
+    """
+    # fix compatibility issues for adb screencap decode problem when the data is from vmos pro
+    # When use adb screencap for a screenshot from vmos pro, there would be a header more than that from emulator
+    # which would cause image decode problem. So i check and remove the header there.
+    # Skip the prefix with an offset instead of slicing, slicing bytes is a copy.
+    prefix = b'long long=8 fun*=10\n'
+    offset = len(prefix) if data.startswith(prefix) else 0
+
+    image = np.frombuffer(data, np.uint8, offset=offset)
+    if image is None:
+        raise ImageTruncated('Empty image after reading from buffer')
+
+    image = cv2.imdecode(image, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ImageTruncated('Empty image after cv2.imdecode')
+
+    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
     if image is None:
         raise ImageTruncated('Empty image after cv2.cvtColor')
 
@@ -129,24 +163,7 @@ class Adb(Connection):
         else:
             raise ScriptError(f'Unknown method to load screenshots: {method}')
 
-        # fix compatibility issues for adb screencap decode problem when the data is from vmos pro
-        # When use adb screencap for a screenshot from vmos pro, there would be a header more than that from emulator
-        # which would cause image decode problem. So i check and remove the header there.
-        screenshot = remove_prefix(screenshot, b'long long=8 fun*=10\n')
-
-        image = np.frombuffer(screenshot, np.uint8)
-        if image is None:
-            raise ImageTruncated('Empty image after reading from buffer')
-
-        image = cv2.imdecode(image, cv2.IMREAD_COLOR)
-        if image is None:
-            raise ImageTruncated('Empty image after cv2.imdecode')
-
-        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
-        if image is None:
-            raise ImageTruncated('Empty image after cv2.cvtColor')
-
-        return image
+        return load_screencap_png(screenshot)
 
     def __process_screenshot(self, screenshot):
         for method in self.__screenshot_method_fixed:
@@ -178,7 +195,7 @@ class Adb(Connection):
         if len(data) < 500:
             logger.warning(f'Unexpected screenshot: {data}')
 
-        return load_screencap(data)
+        return load_screencap(data, buffer=self.frame_buffer)
 
     @retry
     def screenshot_adb_nc(self):
@@ -186,7 +203,7 @@ class Adb(Connection):
         if len(data) < 500:
             logger.warning(f'Unexpected screenshot: {data}')
 
-        return load_screencap(data)
+        return load_screencap(data, buffer=self.frame_buffer)
 
     @retry
     def click_adb(self, x, y):
@@ -10,7 +10,7 @@ import numpy as np
 
 from module.base.decorator import cached_property
 from module.device.env import IS_WINDOWS
-from module.device.method.utils import RETRY_TRIES, get_serial_pair, retry_sleep
+from module.device.method.utils import RETRY_TRIES, cvt_color_flip, get_serial_pair, retry_sleep
 from module.device.platform import Platform
 from module.exception import RequestHumanTakeover
 from module.logger import logger
@@ -344,16 +344,15 @@ class LDOpenGL(Platform):
     def screenshot_ldopengl(self):
         image = self.ldopengl.screenshot()
 
-        # flip image, also copy image array (no dst=image)
+        # flip image and convert BGR to RGB, into double buffered frames
         if self.orientation == 2:
             # You may randomly get orientation=2 on ldplayer, but emulators can't be upside-down
             # If device is upside-down, image is 180 degree rotated (flipped both vertically and horizontally)
             # plus the different pixel order, we only need to flip it horizontally
-            image = cv2.flip(image, 1)
+            flip = 1
         else:
             # Normal case
             # Pointer data has different pixel order (positive y-axis upwards)
             # we need to flip it vertically to the image pixel order (positive y-axis downwards)
-            image = cv2.flip(image, 0)
-        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
-        return image
+            flip = 0
+        return cvt_color_flip(image, cv2.COLOR_BGR2RGB, flip, dst=self.frame_buffer.get(image.shape))
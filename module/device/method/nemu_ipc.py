@@ -15,7 +15,7 @@ from module.config.deep import deep_get
 from module.device.env import IS_WINDOWS
 from module.device.method.minitouch import insert_swipe, random_rectangle_point
 from module.device.method.pool import JobTimeout, WORKER_POOL
-from module.device.method.utils import RETRY_TRIES, retry_sleep
+from module.device.method.utils import RETRY_TRIES, cvt_color_flip, retry_sleep
 from module.device.platform import Platform
 from module.exception import EmulatorNotRunningError, RequestHumanTakeover
 from module.logger import logger
@@ -260,6 +260,8 @@ class NemuIpcImpl:
         self.connect_id: int = 0
         self.width = 0
         self.height = 0
+        # Capture buffer, kept until resolution changes
+        self.pixels = None
 
     def connect(self, on_thread=True):
         if self.connect_id > 0:
@@ -374,16 +376,18 @@ class NemuIpcImpl:
         width_ptr = ctypes.pointer(ctypes.c_int(self.width))
         height_ptr = ctypes.pointer(ctypes.c_int(self.height))
         length = self.width * self.height * 4
-        pixels_pointer = ctypes.pointer((ctypes.c_ubyte * length)())
+        if self.pixels is None or len(self.pixels) != length:
+            self.pixels = (ctypes.c_ubyte * length)()
+        pixels = self.pixels
 
         ret = self.lib.nemu_capture_display(
-            self.connect_id, self.display_id, length, width_ptr, height_ptr, pixels_pointer,
+            self.connect_id, self.display_id, length, width_ptr, height_ptr, ctypes.byref(pixels),
         )
         if ret > 0:
             raise NemuIpcError('nemu_capture_display failed during screenshot()')
 
-        # Return pixels_pointer instead of image to avoid passing image through jobs
-        return pixels_pointer
+        # Return pixels instead of image to avoid passing image through jobs
+        return pixels
 
     @retry
     def screenshot(self, timeout=0.5):
@@ -394,15 +398,20 @@ class NemuIpcImpl:
 
         Returns:
             np.ndarray: Image array in RGBA color space
-                Note that image is upside down
+                Note that image is upside down,
+                and it's a view of the capture buffer, which will be overwritten by the next capture
         """
         if self.connect_id == 0:
             self.connect()
 
-        pixels_pointer = self.run_func(self._screenshot, timeout=timeout)
+        try:
+            pixels = self.run_func(self._screenshot, timeout=timeout)
+        except JobTimeout:
+            # Timed out capture may still be writing into the buffer, leave it there
+            self.pixels = None
+            raise
 
-        # image = np.ctypeslib.as_array(pixels_pointer, shape=(self.height, self.width, 4))
-        image = np.ctypeslib.as_array(pixels_pointer.contents).reshape((self.height, self.width, 4))
+        image = np.frombuffer(pixels, dtype=np.uint8).reshape((self.height, self.width, 4))
         return image
 
     def convert_xy(self, x, y):
@@ -602,9 +611,9 @@ class NemuIpc(Platform):
     def screenshot_nemu_ipc(self):
         image = self.nemu_ipc.screenshot()
 
-        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
-        cv2.flip(image, 0, dst=image)
-        return image
+        # Drop alpha channel and flip upside down image, into double buffered frames
+        height, width = image.shape[:2]
+        return cvt_color_flip(image, cv2.COLOR_BGRA2BGR, 0, dst=self.frame_buffer.get((height, width, 3)))
 
     def click_nemu_ipc(self, x, y):
         down = ensure_time((0.010, 0.020))
@@ -2,9 +2,12 @@ import os
 import random
 import re
 import socket
+import threading
 import time
 import typing as t
 
+import cv2
+import numpy as np
 import uiautomator2 as u2
 import uiautomator2cache
 from adbutils import AdbTimeout
@@ -183,6 +186,152 @@ class ImageTruncated(Exception):
     pass
 
 
+class FrameBuffer:
+    """
+    Preallocated frame buffers that screenshot methods decode into,
+    so a capture doesn't allocate a new 1280x720 array every time.
+
+    Ownership is tracked explicitly, a buffer is reused only after everyone holding it has freed it.
+    Screenshot copies frames out of the buffers with `detach()` unless zero-copy is enabled,
+    see `Screenshot.screenshot_zero_copy()`.
+    `get()` returns a buffer held once by the caller, consumers that keep the frame call `hold()`,
+    and `free()` when they are done with it, such as:
+    - Screenshot frees a frame when a new frame replaces `self.image`.
+    - ScreenshotRing frees a frame when its encoder finishes with it.
+    - ScreenshotPrefetch frees frames that are dropped as stale.
+    Images not from this FrameBuffer are ignored by `hold()` and `free()`.
+    A frame that is never freed is just not reused, a new array is allocated instead.
+
+    ```
+    buffer = FrameBuffer()
+    image = buffer.get((720, 1280, 3))
+    cv2.cvtColor(raw, cv2.COLOR_BGRA2BGR, dst=image)
+    ...
+    buffer.free(image)
+    ```
+    """
+
+    def __init__(self, size=2):
+        """
+        Args:
+            size (int): Number of buffers to keep, 2 for double buffering
+        """
+        self.size = size
+        self.shape = None
+        self.dtype = None
+        # Key: id(buffer), value: [buffer, number of holds]
+        self.buffers = {}
+        self.lock = threading.Lock()
+
+    def get(self, shape, dtype=np.uint8):
+        """
+        Args:
+            shape (tuple[int]):
+            dtype:
+
+        Returns:
+            np.ndarray: An uninitialized array that can be written in place, held once by the caller.
+        """
+        shape = tuple(shape)
+        with self.lock:
+            if shape != self.shape or dtype != self.dtype:
+                self.shape = shape
+                self.dtype = dtype
+                self.buffers = {}
+
+            for entry in self.buffers.values():
+                if entry[1] <= 0:
+                    entry[1] = 1
+                    return entry[0]
+
+            buffer = np.empty(shape, dtype=dtype)
+            if len(self.buffers) < self.size:
+                self.buffers[id(buffer)] = [buffer, 1]
+            return buffer
+
+    def _entry(self, image):
+        entry = self.buffers.get(id(image))
+        if entry is not None and entry[0] is image:
+            return entry
+        return None
+
+    def hold(self, image):
+        """
+        Args:
+            image (np.ndarray): A frame to keep, it won't be reused until `free()` is called.
+        """
+        with self.lock:
+            entry = self._entry(image)
+            if entry is not None:
+                entry[1] += 1
+
+    def free(self, image):
+        """
+        Args:
+            image (np.ndarray): A frame that is no longer used by the caller.
+        """
+        with self.lock:
+            entry = self._entry(image)
+            if entry is not None and entry[1] > 0:
+                entry[1] -= 1
+
+    def detach(self, image):
+        """
+        Args:
+            image (np.ndarray): A frame held by the caller.
+
+        Returns:
+            np.ndarray: If image is from this FrameBuffer, a copy owned by the caller, and image is freed.
+                Otherwise image itself.
+        """
+        with self.lock:
+            if self._entry(image) is None:
+                return image
+        detached = image.copy()
+        self.free(image)
+        return detached
+
+    def release(self):
+        with self.lock:
+            self.shape = None
+            self.dtype = None
+            self.buffers = {}
+
+
+def cvt_color_flip(image, code, flip, dst, rows=64):
+    """
+    Flip an image and convert its color space into `dst` in one pass, without intermediate images.
+    Same as `cv2.cvtColor(cv2.flip(image, flip), code)`.
+
+    Image is processed in strips of rows, each strip is converted into its flipped position
+    and flipped in place while it's still in cache.
+
+    ```
+    image = cvt_color_flip(raw, cv2.COLOR_BGRA2BGR, 0, dst=self.frame_buffer.get((720, 1280, 3)))
+    ```
+
+    Args:
+        image (np.ndarray): Source image, such as a view of a buffer filled by emulator.
+        code (int): cv2.COLOR_* conversion code.
+        flip (int): 0 to flip vertically, 1 horizontally, -1 both.
+        dst (np.ndarray): Output image, should not overlap with `image`.
+        rows (int): Number of rows in each strip.
+
+    Returns:
+        np.ndarray: dst
+    """
+    height = image.shape[0]
+    for start in range(0, height, rows):
+        end = min(start + rows, height)
+        if flip == 1:
+            strip = dst[start:end]
+        else:
+            strip = dst[height - end:height - start]
+        cv2.cvtColor(image[start:end], code, dst=strip)
+        cv2.flip(strip, flip, dst=strip)
+    return dst
+
+
 def retry_sleep(trial):
     # First trial
     if trial == 0:
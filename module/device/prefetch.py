@@ -0,0 +1,128 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from module.logger import logger
+
+
+class ScreenshotPrefetch:
+    """
+    Capture the next screenshot in a background thread while the current one is being evaluated.
+
+    There is at most one capture in flight, it's requested right after a frame is taken,
+    so the capture latency overlaps the state machine instead of adding to it.
+    A frame is fresh only if its capture started after the last click, swipe, sleep or other input,
+    and no earlier than one screenshot interval before `get()` is called.
+    Stale frames are dropped and captured again, so a frame is never older than a frame captured on demand
+    by more than one screenshot interval, and never older than the last input.
+
+    ```
+    prefetch = ScreenshotPrefetch(capture=self._screenshot_capture, timer=self._screenshot_interval,
+                                  free=self.frame_buffer.free)
+    image = prefetch.get(action_time=self.action_time)
+    ```
+    """
+
+    def __init__(self, capture, timer, free=None):
+        """
+        Args:
+            capture (callable): Function that captures and pre-processes a frame, returns np.ndarray.
+            timer (Timer): Minimum interval between 2 captures.
+            free (callable): Called with frames that are dropped, such as `FrameBuffer.free`.
+        """
+        self.capture = capture
+        self.timer = timer
+        self.free = free
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ScreenshotPrefetch')
+        self.future = None
+
+        # Counters for profiling
+        self.frames = 0
+        self.stale = 0
+        self.waited = 0.
+        self.last_log = time.perf_counter()
+
+    def _capture(self):
+        """
+        Returns:
+            tuple[float, np.ndarray]: Capture start time in time.perf_counter(), image
+        """
+        self.timer.wait()
+        self.timer.reset()
+        start = time.perf_counter()
+        return start, self.capture()
+
+    def request(self):
+        """
+        Start capturing the next frame if there isn't one in flight.
+        """
+        if self.future is None:
+            self.future = self.executor.submit(self._capture)
+
+    def get(self, action_time=0.):
+        """
+        Args:
+            action_time (float): Time in time.perf_counter() when the last input or sleep ended.
+
+        Returns:
+            np.ndarray: A frame captured after `action_time`, and within one screenshot interval before now.
+        """
+        start = time.perf_counter()
+        # Frames captured long before, such as before a wait without inputs, are outdated too
+        oldest = max(action_time, start - self.timer.limit)
+        while 1:
+            self.request()
+            future, self.future = self.future, None
+            # Exceptions of screenshot methods are raised here
+            captured, image = future.result()
+            if captured >= oldest:
+                break
+            self.stale += 1
+            self._free(image)
+
+        self.waited += time.perf_counter() - start
+        self.frames += 1
+        self.request()
+        if start - self.last_log > 60:
+            self.log()
+        return image
+
+    def stop(self):
+        """
+        Wait for the capture in flight and drop it,
+        call it before doing anything else on screenshot methods, such as releasing them.
+        """
+        future, self.future = self.future, None
+        if future is not None:
+            try:
+                _, image = future.result()
+            except Exception:
+                # Raised again on the next capture if it's not temporary
+                return
+            self._free(image)
+
+    def _free(self, image):
+        if self.free is not None:
+            self.free(image)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counters since the last log.
+                fps: Frames taken per second, which is the effective loop rate.
+                wait: Average milliseconds waiting for a frame, 0 if captures are fully overlapped.
+        """
+        duration = max(time.perf_counter() - self.last_log, 1e-6)
+        frames = max(self.frames, 1)
+        return {
+            'frames': self.frames,
+            'stale': self.stale,
+            'fps': round(self.frames / duration, 2),
+            'wait': round(self.waited / frames * 1000, 3),
+        }
+
+    def log(self):
+        stats = self.stats()
+        logger.info(f'Screenshot prefetch: {stats["fps"]} fps, {stats["stale"]}/{stats["frames"]} stale dropped, '
+                    f'wait {stats["wait"]}ms per frame')
+        self.frames, self.stale, self.waited = 0, 0, 0.
+        self.last_log = time.perf_counter()
@@ -0,0 +1,268 @@
+import mmap
+import os
+import struct
+import threading
+import time
+
+import cv2
+
+from module.logger import logger
+
+PREVIEW_FOLDER = './log/webui'
+PREVIEW_MAGIC = b'ALASPREV'
+# magic, capacity
+PREVIEW_HEADER = struct.Struct('<8sI')
+# seq, index, length, frame_time
+#   seq: Number of frames written
+#   index: Buffer of the last frame, 0 or 1
+#   frame_time: Timestamp of the last frame
+PREVIEW_FRAME = struct.Struct('<QIId')
+# viewer_time: Timestamp of the last viewer heartbeat, written by WebUI
+PREVIEW_VIEWER = struct.Struct('<d')
+PREVIEW_FRAME_OFFSET = PREVIEW_HEADER.size
+PREVIEW_VIEWER_OFFSET = PREVIEW_FRAME_OFFSET + PREVIEW_FRAME.size
+PREVIEW_DATA_START = 64
+
+
+class PreviewSlot:
+    """
+    The latest encoded preview frame of an Alas instance, in a memory-mapped file.
+
+    File layout:
+        PREVIEW_HEADER, PREVIEW_FRAME, PREVIEW_VIEWER
+        Two buffers of `capacity` bytes, starting at PREVIEW_DATA_START
+
+    The instance process writes frames into the buffer that is not the last frame, then publishes it by
+    updating PREVIEW_FRAME. WebUI reads the last frame without locking, and drops it if two more frames
+    were written while reading.
+    WebUI also writes a heartbeat when someone is watching, nothing is encoded if no one is.
+    """
+
+    def __init__(self, config_name, capacity=512 * 1024, folder=PREVIEW_FOLDER):
+        """
+        Args:
+            config_name (str):
+            capacity (int): Max bytes of an encoded frame.
+            folder (str):
+        """
+        self.file = os.path.join(folder, f'{config_name}.preview')
+        self.capacity = capacity
+        self.size = PREVIEW_DATA_START + capacity * 2
+        self.mm = None
+
+    def create(self):
+        try:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            with open(self.file, 'wb') as f:
+                f.write(PREVIEW_HEADER.pack(PREVIEW_MAGIC, self.capacity))
+                f.truncate(self.size)
+        except OSError as e:
+            # File may be mapped by another process on Windows
+            logger.warning(f'Failed to create preview slot {self.file}: {e}')
+
+    def open(self):
+        """
+        Open the slot, create it if not exists.
+
+        Returns:
+            bool: If opened a valid slot.
+        """
+        if self.mm is not None:
+            return True
+        for _ in range(2):
+            try:
+                with open(self.file, 'r+b') as f:
+                    mm = mmap.mmap(f.fileno(), self.size)
+            except (FileNotFoundError, ValueError, OSError):
+                self.create()
+                continue
+            magic, capacity = PREVIEW_HEADER.unpack_from(mm, 0)
+            if magic == PREVIEW_MAGIC and capacity == self.capacity:
+                self.mm = mm
+                return True
+            mm.close()
+            self.create()
+        return False
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def write(self, data):
+        """
+        Args:
+            data (bytes): Encoded image.
+
+        Returns:
+            bool: If written, frames larger than capacity are dropped.
+        """
+        if len(data) > self.capacity or not self.open():
+            return False
+        seq, index, _, _ = PREVIEW_FRAME.unpack_from(self.mm, PREVIEW_FRAME_OFFSET)
+        index = 1 - index if seq else 0
+        start = PREVIEW_DATA_START + self.capacity * index
+        self.mm[start:start + len(data)] = data
+        PREVIEW_FRAME.pack_into(self.mm, PREVIEW_FRAME_OFFSET, seq + 1, index, len(data), time.time())
+        return True
+
+    def read(self, since=0):
+        """
+        Args:
+            since (int): Sequence number of the last frame that has been read.
+
+        Returns:
+            tuple[int, bytes]: Sequence number, encoded image.
+                Image is None if there is no newer frame.
+        """
+        if not self.open():
+            return since, None
+        seq, index, length, _ = PREVIEW_FRAME.unpack_from(self.mm, PREVIEW_FRAME_OFFSET)
+        if seq == since or not seq:
+            return since, None
+        start = PREVIEW_DATA_START + self.capacity * index
+        data = self.mm[start:start + length]
+        # Overwritten while reading
+        if PREVIEW_FRAME.unpack_from(self.mm, PREVIEW_FRAME_OFFSET)[0] - seq >= 2:
+            return since, None
+        return seq, data
+
+    def heartbeat(self):
+        """
+        Called by viewers periodically.
+        """
+        if self.open():
+            PREVIEW_VIEWER.pack_into(self.mm, PREVIEW_VIEWER_OFFSET, time.time())
+
+    def watched(self, timeout=5):
+        """
+        Args:
+            timeout (int, float): Seconds since the last heartbeat.
+
+        Returns:
+            bool: If anyone is watching.
+        """
+        if not self.open():
+            return False
+        viewer_time, = PREVIEW_VIEWER.unpack_from(self.mm, PREVIEW_VIEWER_OFFSET)
+        return time.time() - viewer_time < timeout
+
+
+class PreviewEncoder:
+    """
+    Encode screenshots into a PreviewSlot for WebUI live preview.
+
+    `submit()` is called after every screenshot. If no one is watching, it returns after a timestamp check.
+    Otherwise, at most `fps` frames per second are downsampled in the bot thread, which is a copy
+    detached from the frame buffers, then encoded in a background thread.
+    A frame waiting for encoding is replaced by a newer one, so the bot loop never waits.
+    """
+
+    def __init__(self, slot, fps=5, width=640, quality=70, ext='.jpg'):
+        """
+        Args:
+            slot (PreviewSlot):
+            fps (int, float): Max frames per second.
+            width (int): Width of preview frames.
+            quality (int): JPEG or WebP quality, 1 to 100.
+            ext (str): '.jpg' or '.webp'
+        """
+        self.slot = slot
+        self.interval = 1 / fps
+        self.width = width
+        self.ext = ext
+        if ext == '.webp':
+            self.params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+        else:
+            self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+
+        self.pending = None
+        self.event = threading.Event()
+        self.thread = None
+        self.last_submit = 0.
+        self.watched = False
+        self.watch_checked = 0.
+
+        # Counters for profiling
+        self.encoded = 0
+        self.dropped = 0
+        self.encoded_bytes = 0
+        self.cost_resize = 0.
+        self.cost_encode = 0.
+        self.last_log = time.time()
+
+    def submit(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot in RGB.
+
+        Returns:
+            bool: If the frame is taken.
+        """
+        now = time.time()
+        if now - self.watch_checked > 1:
+            self.watch_checked = now
+            self.watched = self.slot.watched()
+        if not self.watched:
+            return False
+        if now - self.last_submit < self.interval:
+            return False
+        self.last_submit = now
+
+        start = time.perf_counter()
+        height, width = image.shape[:2]
+        size = (self.width, max(round(height * self.width / width), 1))
+        small = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        self.cost_resize += time.perf_counter() - start
+
+        if self.pending is not None:
+            self.dropped += 1
+        self.pending = small
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name='PreviewEncoder', daemon=True)
+            self.thread.start()
+        self.event.set()
+
+        if now - self.last_log > 60:
+            self.log()
+        return True
+
+    def run(self):
+        while 1:
+            self.event.wait()
+            self.event.clear()
+            image, self.pending = self.pending, None
+            if image is None:
+                continue
+            start = time.perf_counter()
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+            success, data = cv2.imencode(self.ext, image, self.params)
+            self.cost_encode += time.perf_counter() - start
+            if not success or not self.slot.write(data.tobytes()):
+                self.dropped += 1
+                continue
+            self.encoded += 1
+            self.encoded_bytes += data.nbytes
+
+    def stats(self):
+        """
+        Returns:
+            dict: Counters since the last log, costs are in milliseconds per frame.
+        """
+        taken = max(self.encoded + self.dropped, 1)
+        encoded = max(self.encoded, 1)
+        return {
+            'encoded': self.encoded,
+            'dropped': self.dropped,
+            'resize': round(self.cost_resize / taken * 1000, 3),
+            'encode': round(self.cost_encode / encoded * 1000, 3),
+            'kb': round(self.encoded_bytes / encoded / 1024, 1),
+        }
+
+    def log(self):
+        stats = self.stats()
+        logger.info(f'Preview: {stats["encoded"]} frames, {stats["dropped"]} dropped, '
+                    f'resize {stats["resize"]}ms, encode {stats["encode"]}ms, {stats["kb"]}KB per frame')
+        self.encoded, self.dropped, self.encoded_bytes = 0, 0, 0
+        self.cost_resize, self.cost_encode = 0., 0.
+        self.last_log = time.time()
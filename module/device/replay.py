@@ -0,0 +1,346 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+import module.base.timer as timer_module
+from module.base.decorator import cached_property
+from module.base.utils import ensure_int, ensure_time, image_size, load_image, point2str, random_rectangle_point
+from module.device.device import Device
+from module.exception import ScriptError
+from module.logger import logger
+
+REPLAY_SCRIPT = 'replay.json'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class ReplayEnd(Exception):
+    pass
+
+
+class ReplayClock:
+    """
+    Virtual clock for `Timer`, so timers in replays expire after the same amount of screenshots as on devices,
+    no matter how fast the frames are replayed.
+    Sleeps advance the clock instead of blocking.
+    """
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        return self.now
+
+    def sleep(self, second):
+        if second > 0:
+            self.now += second
+
+    @contextmanager
+    def patch(self):
+        origin = timer_module.time, timer_module.sleep
+        timer_module.time, timer_module.sleep = self.time, self.sleep
+        try:
+            yield self
+        finally:
+            timer_module.time, timer_module.sleep = origin
+
+
+class ReplayState:
+    """
+    A state in replay script.
+
+    Examples:
+        "main": {
+            "frames": ["main.png"],
+            "click": {"MAIN_GOTO_CAMPAIGN": "campaign_menu"},
+            "swipe": "main",
+            "after": 0,
+            "next": null
+        }
+        `frames`: Image files relative to the replay folder or Alas root folder, played in loop.
+        `click`: Key: button name, `str(button)`. Value: state to go after clicking it.
+            Clicks on other buttons are ignored, like clicking on nothing.
+        `swipe`: State to go after a swipe or drag.
+        `after`, `next`: Go to state `next` after `after` screenshots in this state,
+            replay ends if `next` is null.
+    """
+
+    def __init__(self, name, data, folder, frames):
+        """
+        Args:
+            name (str):
+            data (dict):
+            folder (str): Replay folder
+            frames (dict): Key: file, value: np.ndarray. Loaded frames shared between states.
+        """
+        self.name = name
+        files = data.get('frames', [])
+        if isinstance(files, str):
+            files = [files]
+        if not files:
+            raise ScriptError(f'Replay state {name} has no frames')
+        self.frames = [self.load(file, folder, frames) for file in files]
+        self.click = data.get('click', {})
+        self.swipe = data.get('swipe', None)
+        self.after = int(data.get('after', 0))
+        self.next = data.get('next', None)
+
+    @staticmethod
+    def load(file, folder, frames):
+        path = os.path.join(folder, file)
+        if not os.path.exists(path):
+            path = file
+        path = os.path.abspath(path)
+        if path in frames:
+            return frames[path]
+        image = load_image(path)
+        if image_size(image) != (1280, 720):
+            raise ScriptError(f'Replay frame {file} is not 1280x720')
+        # Frames are shared across screenshots, tasks should never write on them
+        image.setflags(write=False)
+        frames[path] = image
+        return image
+
+    def __str__(self):
+        return self.name
+
+
+class ReplayDevice(Device):
+    """
+    A device that plays recorded frames instead of connecting to emulator,
+    to measure the CPU cost of state-machine loops without emulator.
+
+    The replay folder contains frames and an optional `replay.json`:
+        {
+            "start": "main",
+            "states": {"main": {...}, ...}
+        }
+    See `ReplayState` for the format of states.
+    Without `replay.json`, all images in folder are played in order, one image per screenshot.
+    Frames can be any 1280x720 screenshots, such as those saved in ./log/error
+
+    Clicks, swipes and app start/stop are recorded in `self.events` and trigger state transitions.
+    Time between the end of a screenshot and the start of the next one is the cost of one loop iteration,
+    recorded in `self.iteration_cost`.
+
+    Examples:
+        device = ReplayDevice(config, './screenshots/replay/ui_navigation')
+        with device.clock.patch():
+            UI(config, device=device).ui_ensure(page_campaign)
+        print(device.iteration_cost)
+    """
+
+    def __init__(self, config, folder, script=None, limit=1000, screenshot_cost=0.05, trace_malloc=False):
+        """
+        Args:
+            config (AzurLaneConfig):
+            folder (str): Replay folder.
+            script (dict): Replay script, None to read `replay.json` in folder.
+            limit (int): Max screenshots, ReplayEnd will be raised when exceeded.
+            screenshot_cost (float): Virtual seconds a screenshot takes.
+            trace_malloc (bool): True to record memory peak of each loop iteration in `self.iteration_alloc`,
+                which slows down the replay.
+        """
+        # No connection to emulator
+        self.config = config
+        self.folder = folder
+        self.limit = limit
+        self.screenshot_cost = screenshot_cost
+        self.trace_malloc = trace_malloc
+        self.clock = ReplayClock()
+
+        if script is None:
+            file = os.path.join(folder, REPLAY_SCRIPT)
+            if os.path.exists(file):
+                with open(file, 'r', encoding='utf-8') as f:
+                    script = json.load(f)
+            else:
+                script = self.script_from_folder(folder)
+        frames = {}
+        self.states = {
+            name: ReplayState(name, data, folder=folder, frames=frames)
+            for name, data in script['states'].items()
+        }
+        for state in self.states.values():
+            for name in list(state.click.values()) + [state.swipe, state.next]:
+                if name is not None and name not in self.states:
+                    raise ScriptError(f'Replay state {state} goes to an unknown state: {name}')
+        self.state = self.states[script['start']]
+        self.state_frames = 0
+        logger.info(f'Replay loaded: {folder}, {len(self.states)} states, {len(frames)} frames')
+
+        self.screenshot_count = 0
+        self.events = []
+        self.iteration_cost = []
+        self.iteration_alloc = []
+        self._iteration_start = None
+
+        # Recorded frames are trusted
+        self._screen_size_checked = True
+        self._screen_black_checked = True
+        # Screenshot interval is waited on the virtual clock
+        self._screenshot_interval = timer_module.Timer(0.1)
+        self.screenshot_interval_set()
+
+    @staticmethod
+    def script_from_folder(folder):
+        """
+        Play all images in folder in order.
+
+        Returns:
+            dict:
+        """
+        files = sorted([file for file in os.listdir(folder) if file.lower().endswith(IMAGE_EXTENSIONS)])
+        if not files:
+            raise ScriptError(f'No frames in replay folder: {folder}')
+        states = {}
+        for index, file in enumerate(files):
+            states[file] = {'frames': [file], 'after': 1, 'next': files[index + 1] if index + 1 < len(files) else None}
+        return {'start': files[0], 'states': states}
+
+    @cached_property
+    def screenshot_method_override(self) -> str:
+        return 'replay'
+
+    @cached_property
+    def screenshot_methods(self):
+        return {'replay': self.screenshot_replay}
+
+    @cached_property
+    def screenshot_prefetch(self):
+        # Replay states advance on every capture, prefetching would skip frames
+        return None
+
+    def transit(self, name):
+        """
+        Args:
+            name (str): State name, None to end replay.
+
+        Raises:
+            ReplayEnd:
+        """
+        if name is None:
+            raise ReplayEnd(f'Replay ended at state {self.state}')
+        logger.info(f'Replay state: {self.state} -> {name}')
+        self.state = self.states[name]
+        self.state_frames = 0
+
+    def screenshot_replay(self):
+        state = self.state
+        if state.after and self.state_frames >= state.after:
+            self.transit(state.next)
+            state = self.state
+        image = state.frames[self.state_frames % len(state.frames)]
+        self.state_frames += 1
+        self.clock.sleep(self.screenshot_cost)
+        return image
+
+    def screenshot(self):
+        """
+        Returns:
+            np.ndarray:
+
+        Raises:
+            ReplayEnd:
+        """
+        if self._iteration_start is not None:
+            self.iteration_cost.append(time.perf_counter() - self._iteration_start)
+            if self.trace_malloc:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.iteration_alloc.append(peak)
+            self._iteration_start = None
+        if self.screenshot_count >= self.limit:
+            raise ReplayEnd(f'Replay reached screenshot limit: {self.limit}')
+        self.screenshot_count += 1
+
+        super().screenshot()
+
+        if self.trace_malloc:
+            # Restart tracing to reset the peak
+            tracemalloc.start()
+        self._iteration_start = time.perf_counter()
+        return self.image
+
+    def replay_stop(self):
+        """
+        Stop timing the current iteration, call it after task ended.
+        """
+        if self.trace_malloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._iteration_start = None
+
+    def event(self, kind, name):
+        """
+        Args:
+            kind (str): click, swipe, app_start, app_stop
+            name (str): Button name
+        """
+        self.events.append((self.screenshot_count, kind, name))
+        if kind == 'click':
+            state = self.state.click.get(name)
+            if state is not None:
+                self.transit(state)
+        elif kind == 'swipe':
+            if self.state.swipe is not None:
+                self.transit(self.state.swipe)
+
+    def click(self, button, control_check=True):
+        if control_check:
+            self.handle_control_check(button)
+        x, y = ensure_int(*random_rectangle_point(button.button))
+        logger.info('Click %s @ %s' % (point2str(x, y), button))
+        self.event('click', str(button))
+
+    def multi_click(self, button, n, interval=(0.1, 0.2)):
+        self.handle_control_check(button)
+        for _ in range(n):
+            self.sleep(interval)
+            self.click(button, control_check=False)
+
+    def long_click(self, button, duration=(1, 1.2)):
+        self.handle_control_check(button)
+        duration = ensure_time(duration)
+        logger.info('Click %s, %s' % (button, duration))
+        self.sleep(duration)
+        self.event('click', str(button))
+
+    def swipe(self, p1, p2, duration=(0.1, 0.2), name='SWIPE', distance_check=True):
+        self.handle_control_check(name)
+        p1, p2 = ensure_int(p1, p2)
+        logger.info('Swipe %s -> %s' % (point2str(*p1), point2str(*p2)))
+        if distance_check and np.linalg.norm(np.subtract(p1, p2)) < 10:
+            logger.info('Swipe distance < 10px, dropped')
+            return
+        self.event('swipe', name)
+
+    def drag(self, p1, p2, *args, name='DRAG', **kwargs):
+        self.handle_control_check(name)
+        p1, p2 = ensure_int(p1, p2)
+        logger.info('Drag %s -> %s' % (point2str(*p1), point2str(*p2)))
+        self.event('swipe', name)
+
+    def sleep(self, second):
+        self.clock.sleep(ensure_time(second))
+
+    def stuck_record_check(self):
+        # Stuck detection needs real time, replays are not stuck
+        return False
+
+    def app_is_running(self):
+        return True
+
+    def app_start(self):
+        self.event('app_start', '')
+
+    def app_stop(self):
+        self.event('app_stop', '')
+
+    def get_orientation(self):
+        return 0
+
+    def release_during_wait(self):
+        self.frame_buffer.release()
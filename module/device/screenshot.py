@@ -1,18 +1,17 @@
 import os
 import time
-from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 from PIL import Image
 # 此文件定义了截图处理逻辑。
-# 管理各种截图捕获方式，并包含后台编码线程用于将图像序列化并通过 Base64 供 WebUI 实时渲染预览。
-import base64
-import threading
-import queue as _queue
+# 管理各种截图捕获方式，后台预取截图见 module/device/prefetch.py，供 WebUI 实时预览的后台编码线程见 module/device/preview.py。
 
 import cv2
 import numpy as np
 
 from module.base.decorator import cached_property
+from module.base.frame_cache import FRAME_CACHE
+from module.base.frame_diff import FRAME_DIFF
 from module.base.timer import Timer
 from module.base.utils import get_color, image_size, limit_in, save_image
 from module.device.method.adb import Adb
@@ -21,7 +20,11 @@ from module.device.method.droidcast import DroidCast
 from module.device.method.ldopengl import LDOpenGL
 from module.device.method.nemu_ipc import NemuIpc
 from module.device.method.scrcpy import Scrcpy
+from module.device.method.utils import FrameBuffer
 from module.device.method.wsa import WSA
+from module.device.prefetch import ScreenshotPrefetch
+from module.device.preview import PreviewEncoder, PreviewSlot
+from module.device.screenshot_ring import ScreenshotRing
 from module.exception import RequestHumanTakeover, ScriptError
 from module.logger import logger
 
@@ -35,6 +38,10 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
     _screenshot_interval = Timer(0.1)
     _last_save_time = {}
     image: np.ndarray
+    # Increased on every new frame, frames may reuse the same array, see FrameBuffer
+    frame_count = 0
+    # Frames are copied out of FrameBuffer unless set by `screenshot_zero_copy()`
+    _frame_zero_copy = False
 
     @cached_property
     def screenshot_methods(self):
@@ -55,29 +62,42 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
     def screenshot_method_override(self) -> str:
         return ''
 
+    @cached_property
+    def frame_buffer(self) -> FrameBuffer:
+        """
+        Double buffered frames for screenshot methods that can decode in place.
+        Frames are copied out before they become `self.image`, see `screenshot_zero_copy()`.
+        With zero-copy, `self.image` is kept untouched while the next frame is being decoded into the other buffer,
+        and with prefetch, one more buffer for the frame in flight.
+        """
+        return FrameBuffer(size=3 if self.config.SCREENSHOT_PREFETCH else 2)
+
     def screenshot(self):
         """
         Returns:
             np.ndarray:
         """
-        self._screenshot_interval.wait()
-        self._screenshot_interval.reset()
+        # Prefetch only after the screen is checked, checks need frames captured on demand
+        prefetch = self.screenshot_prefetch
+        if prefetch is not None and not (self._screen_size_checked and self._screen_black_checked):
+            prefetch.stop()
+            prefetch = None
+        if prefetch is None:
+            self._screenshot_interval.wait()
+            self._screenshot_interval.reset()
 
         for _ in range(2):
-            if self.screenshot_method_override:
-                method = self.screenshot_method_override
+            if prefetch is None:
+                self._frame_set(self._screenshot_capture())
             else:
-                method = self.config.Emulator_ScreenshotMethod
-            method = self.screenshot_methods.get(method, self.screenshot_adb)
-
-            self.image = method()
-
-            if self.config.Emulator_ScreenshotDedithering:
-                # This will take 40-60ms
-                cv2.fastNlMeansDenoising(self.image, self.image, h=17, templateWindowSize=1, searchWindowSize=2)
-            self.image = self._handle_orientated_image(self.image)
+                self._frame_set(prefetch.get(action_time=self.action_time))
+            self.frame_count += 1
+            # Images derived from the last frame are no longer valid, frames may reuse the same array
+            FRAME_CACHE.clear()
+            FRAME_DIFF.detach()
 
             if self.config.Error_SaveError:
+                self.frame_buffer.hold(self.image)
                 self.screenshot_deque.append({'time': datetime.now(), 'image': self.image})
 
             if self.check_screen_size() and self.check_screen_black():
@@ -85,8 +105,109 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             else:
                 continue
 
+        FRAME_CACHE.clear(self.image)
+        if self.config.SCREENSHOT_DIFF:
+            FRAME_DIFF.update(self.image)
+        if self.preview is not None:
+            self.preview.submit(self.image)
         return self.image
 
+    @contextmanager
+    def screenshot_zero_copy(self):
+        """
+        Use frame buffers as `self.image` without copying, in hot loops that don't keep frames.
+
+        Frames taken in this block are valid only until the next screenshot, later frames are decoded into
+        the same arrays. Copy frames that are kept longer, including images stored by detections and records.
+        The last frame is copied out when the block ends.
+
+        Examples:
+            ```
+            with self.device.screenshot_zero_copy():
+                for _ in self.loop():
+                    if self.appear(BUTTON):
+                        break
+            ```
+        """
+        zero_copy = self._frame_zero_copy
+        self._frame_zero_copy = True
+        try:
+            yield
+        finally:
+            self._frame_zero_copy = zero_copy
+            image = getattr(self, 'image', None)
+            if not zero_copy and image is not None:
+                detached = self.frame_buffer.detach(image)
+                if detached is not image:
+                    self.image = detached
+                    # Results of the buffer are not reused on the copy
+                    FRAME_CACHE.clear(detached)
+                    FRAME_DIFF.detach()
+
+    def _frame_set(self, image):
+        """
+        Set a new frame as `self.image`, the last frame is freed so its buffer can be reused.
+        Frames are copied out of frame buffers, so images kept by callers never change,
+        unless in `screenshot_zero_copy()`.
+
+        Args:
+            image (np.ndarray):
+        """
+        if not self._frame_zero_copy:
+            image = self.frame_buffer.detach(image)
+        last = getattr(self, 'image', None)
+        self.image = image
+        if last is not None and last is not image:
+            self.frame_buffer.free(last)
+
+    def _screenshot_capture(self):
+        """
+        Capture a frame and pre-process it, may run in the prefetch thread.
+
+        Returns:
+            np.ndarray:
+        """
+        if self.screenshot_method_override:
+            method = self.screenshot_method_override
+        else:
+            method = self.config.Emulator_ScreenshotMethod
+        method = self.screenshot_methods.get(method, self.screenshot_adb)
+
+        image = method()
+        if self.config.Emulator_ScreenshotDedithering:
+            # This will take 40-60ms
+            cv2.fastNlMeansDenoising(image, image, h=17, templateWindowSize=1, searchWindowSize=2)
+        rotated = self._handle_orientated_image(image)
+        if rotated is not image:
+            self.frame_buffer.free(image)
+        return rotated
+
+    @cached_property
+    def screenshot_prefetch(self):
+        """
+        Returns:
+            ScreenshotPrefetch: None if disabled.
+        """
+        if not self.config.SCREENSHOT_PREFETCH:
+            return None
+        return ScreenshotPrefetch(capture=self._screenshot_capture, timer=self._screenshot_interval,
+                                  free=self.frame_buffer.free)
+
+    @cached_property
+    def preview(self):
+        """
+        Returns:
+            PreviewEncoder: None if disabled.
+        """
+        if not self.config.SCREEN_PREVIEW:
+            return None
+        return PreviewEncoder(
+            PreviewSlot(self.config.config_name),
+            fps=self.config.SCREEN_PREVIEW_FPS,
+            width=self.config.SCREEN_PREVIEW_WIDTH,
+            quality=self.config.SCREEN_PREVIEW_QUALITY,
+        )
+
     @property
     def has_cached_image(self):
         return hasattr(self, 'image') and self.image is not None
@@ -99,7 +220,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
         Returns:
             np.ndarray:
         """
-        width, height = image_size(self.image)
+        width, height = image_size(image)
         if width == 1280 and height == 720:
             return image
 
@@ -119,6 +240,10 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
 
     @cached_property
     def screenshot_deque(self):
+        """
+        Returns:
+            ScreenshotRing: Iterates dicts of {'time': datetime, 'image': np.ndarray}
+        """
         try:
             length = int(self.config.Error_ScreenshotLength)
         except ValueError:
@@ -126,7 +251,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             raise RequestHumanTakeover
         # Limit in 1~400
         length = max(1, min(length, 400))
-        return deque(maxlen=length)
+        return ScreenshotRing(length, budget=self.config.ERROR_SCREENSHOT_BUDGET, free=self.frame_buffer.free)
 
     def save_screenshot(self, genre='items', interval=None, to_base_folder=False):
         """Save a screenshot. Use millisecond timestamp as file name.
@@ -229,7 +354,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             elif not orientated and (width == 720 and height == 1280):
                 logger.info('Received orientated screenshot, handling')
                 self.get_orientation()
-                self.image = self._handle_orientated_image(self.image)
+                self._frame_set(self._handle_orientated_image(self.image))
                 orientated = True
                 width, height = image_size(self.image)
                 if width == 720 and height == 1280:
@@ -0,0 +1,216 @@
+import threading
+import time
+import zlib
+from collections import deque
+
+import numpy as np
+
+from module.logger import logger
+
+
+class FrameGroup:
+    """
+    A keyframe and the frames after it, each stored as XOR against its previous frame, zlib compressed.
+    Consecutive screenshots are mostly the same, so delta frames are tiny.
+    """
+
+    def __init__(self, shape, dtype):
+        self.shape = shape
+        self.dtype = dtype
+        # list of (time, compressed bytes)
+        self.frames = []
+        self.nbytes = 0
+        # Number of leading frames that are evicted but still needed to decode the others
+        self.skip = 0
+
+    def __len__(self):
+        return len(self.frames) - self.skip
+
+    def append(self, frame_time, data):
+        self.frames.append((frame_time, data))
+        self.nbytes += len(data)
+
+    def decode(self):
+        """
+        Yields:
+            tuple[datetime, np.ndarray]: time, image
+        """
+        image = np.empty(self.shape, dtype=self.dtype)
+        flat = image.reshape(-1)
+        for index, (frame_time, data) in enumerate(self.frames):
+            delta = np.frombuffer(zlib.decompress(data), dtype=self.dtype)
+            if index == 0:
+                flat[:] = delta
+            else:
+                np.bitwise_xor(flat, delta, out=flat)
+            if index >= self.skip:
+                yield frame_time, image.copy()
+
+
+class ScreenshotRing:
+    """
+    Screenshots kept for error reports, compressed by a background encoder, and limited by both
+    number of frames and bytes.
+
+    `append()` only queues a reference of the frame, the encoder thread compresses frames into groups of
+    a keyframe and XOR deltas, then calls `free()` on the frame, so frame buffers are reused again.
+    Frames are decoded one by one when iterating, which happens only in `save_error_log()`.
+
+    If only 1 frame is kept, the latest frame is kept as it is, nothing is encoded.
+    """
+
+    def __init__(self, length, budget=64 * 1024 * 1024, group_size=30, pending=8, level=1, free=None):
+        """
+        Args:
+            length (int): Max number of frames to keep.
+            budget (int): Max bytes of compressed frames, the latest group is always kept.
+            group_size (int): Number of frames in a group, starts from a keyframe.
+            pending (int): Max number of frames waiting for encoding, older ones are dropped if the encoder is behind.
+            level (int): zlib compression level.
+            free (callable): Called with a frame when it is no longer referenced, such as `FrameBuffer.free`.
+        """
+        self.length = length
+        self.budget = budget
+        self.group_size = group_size
+        self.level = level
+        self.free = free
+        self.groups = deque()
+        self.nbytes = 0
+        self.pending = deque(maxlen=pending)
+        self.latest = None
+        self.lock = threading.Lock()
+        self.encode_lock = threading.Lock()
+        self.event = threading.Event()
+        self.thread = None
+        # Copy of the last encoded frame, deltas are against it
+        self.last = None
+        # Counters for profiling
+        self.encoded = 0
+        self.dropped = 0
+        self.cost = 0.
+
+    def append(self, data):
+        """
+        Args:
+            data (dict): {'time': datetime, 'image': np.ndarray}
+        """
+        if self.length <= 1:
+            data, self.latest = self.latest, data
+            if data is not None:
+                self._free(data['image'])
+            return
+        with self.lock:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+                self._free(self.pending.popleft()['image'])
+            self.pending.append(data)
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name='ScreenshotRing', daemon=True)
+            self.thread.start()
+        self.event.set()
+
+    def run(self):
+        while 1:
+            self.event.wait()
+            self.event.clear()
+            self.flush()
+
+    def flush(self):
+        """
+        Encode all pending frames.
+        """
+        with self.encode_lock:
+            while 1:
+                with self.lock:
+                    if not self.pending:
+                        return
+                    data = self.pending.popleft()
+                try:
+                    self._encode(data['time'], data['image'])
+                finally:
+                    self._free(data['image'])
+
+    def _free(self, image):
+        if self.free is not None:
+            self.free(image)
+
+    def _encode(self, frame_time, image):
+        start = time.perf_counter()
+        group = self.groups[-1] if self.groups else None
+        is_key = group is None or len(group.frames) >= self.group_size \
+            or group.shape != image.shape or group.dtype != image.dtype
+        if is_key:
+            self.last = np.array(image, copy=True)
+            data = zlib.compress(self.last.data, self.level)
+            group = FrameGroup(image.shape, image.dtype)
+        else:
+            delta = np.bitwise_xor(self.last, image)
+            np.copyto(self.last, image)
+            data = zlib.compress(delta.data, self.level)
+
+        with self.lock:
+            if is_key:
+                self.groups.append(group)
+            group.append(frame_time, data)
+            self.nbytes += len(data)
+            self._evict()
+        self.encoded += 1
+        self.cost += time.perf_counter() - start
+
+    def _evict(self):
+        # Number of frames
+        while sum(len(group) for group in self.groups) > self.length:
+            first = self.groups[0]
+            first.skip += 1
+            if not len(first):
+                self.groups.popleft()
+                self.nbytes -= first.nbytes
+        # Bytes
+        while self.nbytes > self.budget and len(self.groups) > 1:
+            first = self.groups.popleft()
+            self.nbytes -= first.nbytes
+
+    def __len__(self):
+        if self.length <= 1:
+            return 1 if self.latest is not None else 0
+        with self.lock:
+            return sum(len(group) for group in self.groups) + len(self.pending)
+
+    def __iter__(self):
+        """
+        Yields:
+            dict: {'time': datetime, 'image': np.ndarray}, from the oldest to the latest.
+        """
+        if self.length <= 1:
+            if self.latest is not None:
+                yield self.latest
+            return
+        self.flush()
+        with self.lock:
+            groups = [(group, group.skip, len(group.frames)) for group in self.groups]
+        for group, skip, count in groups:
+            # Groups may grow or be evicted while decoding, decode what they had
+            frames = FrameGroup(group.shape, group.dtype)
+            frames.frames = group.frames[:count]
+            frames.skip = skip
+            for frame_time, image in frames.decode():
+                yield {'time': frame_time, 'image': image}
+
+    def stats(self):
+        """
+        Returns:
+            dict:
+        """
+        encoded = max(self.encoded, 1)
+        return {
+            'frames': len(self),
+            'kb': round(self.nbytes / 1024, 1),
+            'encoded': self.encoded,
+            'dropped': self.dropped,
+            'encode': round(self.cost / encoded * 1000, 3),
+        }
+
+    def log(self):
+        stats = self.stats()
+        logger.info(f'Error screenshots: {stats["frames"]} frames in {stats["kb"]}KB, '
+                    f'{stats["dropped"]} dropped, encode {stats["encode"]}ms per frame')
@@ -123,6 +123,8 @@ class RewardDorm(UI):
         # Long tap to feed. This requires minitouch.
         timeout = Timer(count // 5 + 5).start()
         x, y = random_rectangle_point(button.button)
+        # Touch events are sent directly, previous clicks should be sent first
+        self.device.input_wait()
         builder = self.device.minitouch_builder
         builder.down(x, y).commit()
         builder.send()
@@ -147,6 +149,8 @@ class RewardDorm(UI):
     def _dorm_feed_long_tap(self, button, count):
         timeout = Timer(count // 5 + 5).start()
         x, y = random_rectangle_point(button.button)
+        # Touch events are sent directly, previous clicks should be sent first
+        self.device.input_wait()
         builder = self.device.maatouch_builder
         builder.down(x, y).commit()
         builder.send()
@@ -171,6 +175,8 @@ class RewardDorm(UI):
     def _dorm_feed_long_tap(self, button, count):
         timeout = Timer(count // 5 + 5).start()
         x, y = random_rectangle_point(button.button)
+        # Touch events are sent directly, previous clicks should be sent first
+        self.device.input_wait()
         self.device.u2.touch.down(x, y)
 
         while 1:
@@ -192,6 +198,8 @@ class RewardDorm(UI):
     def _dorm_feed_long_tap(self, button, count):
         timeout = Timer(count // 5 + 5).start()
         x, y = random_rectangle_point(button.button)
+        # Touch events are sent directly, previous clicks should be sent first
+        self.device.input_wait()
 
         while 1:
             self.device.nemu_ipc.down(x, y)
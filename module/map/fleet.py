@@ -680,11 +680,12 @@ class Fleet(Camera, AmbushHandler):
                     wall=False,
                     portal=self.config.MAP_HAS_PORTAL,
                 )
-            for grid in diff:
-                self.map.find_path_initial(grid, has_ambush=False)
-                accessible = accessible.add(self.map.select(cost=0)).add(self.map.select(cost=1))
-                if siren:
-                    accessible = accessible.add(self.map.select(cost=2))
+            if diff:
+                # Path finding from all missing enemies at once
+                cost, _ = self.map.path_finder.search(diff.location, has_ambush=False, route=False)
+                reachable = np.min(cost, axis=0) <= (2 if siren else 1)
+                accessible = SelectedGrids([
+                    grid for grid, reach in zip(self.map.path_finder.grids, reachable.tolist()) if reach])
             # Revert path findings
             if self.config.MAP_HAS_WALL:
                 self.map.grid_connection_initial(
@@ -2,7 +2,8 @@ import copy
 
 from module.base.utils import location2node, node2location
 from module.logger import logger
-from module.map.map_grids import SelectedGrids
+from module.map.map_grids import GridColumns, SelectedGrids
+from module.map.path_finder import PathFinder
 from module.map.utils import *
 from module.map_detection.grid_info import GridInfo
 
@@ -35,6 +36,8 @@ class CampaignMap:
         self.poor_map_data = False
         self.camera_sight = (-3, -1, 3, 2)
         self.grid_connection = {}
+        self._path_finder = None
+        self._columns = None
 
     def __iter__(self):
         return iter(self.grids.values())
@@ -72,6 +75,8 @@ class CampaignMap:
                 grid = self.grid_class()
                 grid.location = (x, y)
                 self.grids[(x, y)] = grid
+        self._columns = None
+        self._path_finder = None
 
         # camera_data can be generate automatically, but it's better to set it manually.
         self.camera_data = [location2node(loca) for loca in camera_2d((0, 0, *self._shape), sight=self.camera_sight)]
@@ -300,8 +305,20 @@ class CampaignMap:
                 self[start].is_portal = False
                 self[start].portal_link = None
 
+        # Re-compile on next path finding
+        self._path_finder = None
         return True
 
+    @property
+    def path_finder(self):
+        """
+        Returns:
+            PathFinder: Compiled from current grid_connection.
+        """
+        if self._path_finder is None:
+            self._path_finder = PathFinder(list(self.grids.values()), self.grid_connection)
+        return self._path_finder
+
     def fixup_submarine_fleet(self):
         # fixup submarine spawn point
         # If a grid is_submarine, the lower grid may detected as is_fleet, because they have the same ammo icon
@@ -539,40 +556,32 @@ class CampaignMap:
             has_enemy (bool): False if only sea and land are considered
         """
         location = location_ensure(location)
-        ambush_cost = 10 if has_ambush else 1
-        for grid in self:
-            grid.cost = 9999
-            grid.connection = None
-        start = self[location]
-        start.cost = 0
-        visited = [start]
-        visited = set(visited)
-
-        while 1:
-            new = visited.copy()
-            for grid in visited:
-                for arr in self.grid_connection[grid.location]:
-                    arr = self[arr]
-                    if arr.is_land or arr.is_mechanism_block:
-                        continue
-                    cost = ambush_cost if arr.may_ambush else 1
-                    cost += grid.cost
-
-                    if cost < arr.cost:
-                        arr.cost = cost
-                        arr.connection = grid.location
-                    elif cost == arr.cost:
-                        if abs(arr.location[0] - grid.location[0]) == 1:
-                            arr.connection = grid.location
-                    if arr.is_sea or not has_enemy:
-                        new.add(arr)
-            if len(new) == len(visited):
-                break
-            visited = new
+        cost, prev = self.path_finder.search([location], has_ambush=has_ambush, has_enemy=has_enemy)
+        self._set_path(cost[0], prev[0])
 
         # self.show_cost()
         # self.show_connection()
 
+    def _set_path(self, cost, prev, attr=None):
+        """
+        Write path finding results to grids.
+
+        Args:
+            cost (np.ndarray): Shape (n,), cost of each grid in `path_finder.grids`.
+            prev (np.ndarray): Shape (n,), index of previous grid, -1 if none.
+            attr (str): Attribute name to save cost, such as `cost_1`.
+                None to save `cost` and `connection`.
+        """
+        grids = self.path_finder.grids
+        if attr is not None:
+            for grid, c in zip(grids, cost.tolist()):
+                grid.__setattr__(attr, c)
+            return
+        locations = self.path_finder.locations
+        for grid, c, p in zip(grids, cost.tolist(), prev.tolist()):
+            grid.cost = c
+            grid.connection = locations[p] if p >= 0 else None
+
     def find_path_initial_multi_fleet(self, location_dict, current, has_ambush):
         """
         Args:
@@ -581,13 +590,15 @@ class CampaignMap:
             has_ambush (bool): MAP_HAS_AMBUSH
         """
         location_dict = sorted(location_dict.items(), key=lambda kv: (int(kv[1] == current),))
-        for fleet, location in location_dict:
-            if location == ():
-                continue
-            self.find_path_initial(location, has_ambush=has_ambush)
-            attr = f'cost_{fleet}'
-            for grid in self:
-                grid.__setattr__(attr, grid.cost)
+        location_dict = [(fleet, location) for fleet, location in location_dict if location != ()]
+        if not location_dict:
+            return
+        cost, prev = self.path_finder.search(
+            [location for _, location in location_dict], has_ambush=has_ambush)
+        for n, (fleet, _) in enumerate(location_dict):
+            self._set_path(cost[n], prev[n], attr=f'cost_{fleet}')
+        # `cost` and `connection` are from the current fleet, which is sorted to the last
+        self._set_path(cost[-1], prev[-1])
 
     def _find_path(self, location):
         """
@@ -803,16 +814,17 @@ class CampaignMap:
         Returns:
             SelectedGrids:
         """
-        result = []
-        for grid in self:
-            flag = True
-            for k, v in kwargs.items():
-                if grid.__getattribute__(k) != v:
-                    flag = False
-            if flag:
-                result.append(grid)
-
-        return SelectedGrids(result)
+        return SelectedGrids(self.columns.select(False, **kwargs))
+
+    @property
+    def columns(self):
+        """
+        Returns:
+            GridColumns:
+        """
+        if self._columns is None or len(self._columns.grids) != len(self.grids):
+            self._columns = GridColumns(list(self.grids.values()))
+        return self._columns
 
     def to_selected(self, grids):
         """
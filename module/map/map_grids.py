@@ -1,11 +1,136 @@
 import operator
 import typing as t
 
+import numpy as np
+
+# Increases on every attribute write of a ColumnTracked object, cached columns are outdated once it changes
+GRID_VERSION = 0
+# Value types that can be compared in numpy columns, and their type codes
+COLUMN_TYPES = {bool: 0, int: 1, float: 2}
+# SelectedGrids smaller than this are selected by looping, building columns costs more than that
+COLUMN_MIN_GRIDS = 16
+
+
+class ColumnTracked:
+    """
+    Objects whose attributes can be cached in `GridColumns`.
+    Any attribute write invalidates all cached columns, including writes in `GridInfo.merge()` and `reset()`.
+    """
+
+    def __setattr__(self, key, value):
+        global GRID_VERSION
+        GRID_VERSION += 1
+        object.__setattr__(self, key, value)
+
+
+class GridColumns:
+    """
+    Attribute columns of a fixed sequence of grids, to select grids with vectorized mask operations.
+
+    Map logic selects grids dozens of times per round, mostly between two scans,
+    so an attribute is read from all grids once, then each query is a numpy comparison.
+    Columns and masks are cached until any ColumnTracked object is written.
+    Columns of values other than bool, int and float, such as `enemy_genre`, are compared one by one.
+    """
+
+    def __init__(self, grids):
+        """
+        Args:
+            grids (list, tuple): Grids of ColumnTracked.
+        """
+        self.grids = grids
+        self.array = np.empty(len(grids), dtype=object)
+        self.array[:] = grids
+        self.version = GRID_VERSION
+        # Key: attribute name. Value: (list of values, type codes, values in float), codes are None if not numeric
+        self.columns = {}
+        # Key: (strict, kwargs items). Value: np.ndarray of bool
+        self.masks = {}
+
+    def ensure_version(self):
+        if self.version != GRID_VERSION:
+            self.version = GRID_VERSION
+            self.columns = {}
+            self.masks = {}
+
+    def column(self, attr):
+        """
+        Args:
+            attr (str): Attribute name.
+
+        Returns:
+            tuple[list, np.ndarray, np.ndarray]: values, type codes, values in float
+        """
+        try:
+            return self.columns[attr]
+        except KeyError:
+            pass
+        values = [grid.__getattribute__(attr) for grid in self.grids]
+        codes, numeric = None, None
+        try:
+            codes = np.array([COLUMN_TYPES[type(v)] for v in values], dtype=np.int8)
+            numeric = np.array(values, dtype=np.float64)
+        except KeyError:
+            pass
+        column = (values, codes, numeric)
+        self.columns[attr] = column
+        return column
+
+    def mask(self, strict, attr, value):
+        """
+        Args:
+            strict (bool): True to match value types, same as `SelectedGrids.select()`.
+                False to compare values only, same as `CampaignMap.select()`.
+            attr (str): Attribute name.
+            value: Attribute value.
+
+        Returns:
+            np.ndarray: Mask of grids, bool.
+        """
+        values, codes, numeric = self.column(attr)
+        code = COLUMN_TYPES.get(type(value))
+        if codes is not None and code is not None:
+            mask = numeric == value
+            if strict:
+                mask &= codes == code
+            return mask
+        if strict:
+            return np.array([type(v) == type(value) and not v != value for v in values], dtype=bool)
+        else:
+            return np.array([not v != value for v in values], dtype=bool)
+
+    def select(self, strict, **kwargs):
+        """
+        Args:
+            strict (bool): See `mask()`.
+            **kwargs: Attributes of Grid.
+
+        Returns:
+            list: Selected grids, in original order.
+        """
+        self.ensure_version()
+        # True == 1 but they are different in strict mode
+        key = (strict, tuple((k, type(v), v) for k, v in kwargs.items()))
+        try:
+            mask = self.masks.get(key)
+        except TypeError:
+            # Unhashable value
+            key, mask = None, None
+        if mask is None:
+            mask = np.ones(len(self.grids), dtype=bool)
+            for k, v in kwargs.items():
+                mask &= self.mask(strict, k, v)
+            if key is not None:
+                self.masks[key] = mask
+        return self.array[mask].tolist()
+
 
 class SelectedGrids:
     def __init__(self, grids):
         self.grids = grids
         self.indexes: t.Dict[tuple, SelectedGrids] = {}
+        # (grids, GridColumns), GridColumns is None if grids can't be columned
+        self._columns: t.Optional[tuple] = None
 
     def __iter__(self):
         return iter(self.grids)
@@ -72,6 +197,10 @@ class SelectedGrids:
         Returns:
             SelectedGrids:
         """
+        columns = self.columns
+        if columns is not None:
+            return SelectedGrids(columns.select(True, **kwargs))
+
         def matched(obj):
             flag = True
             for k, v in kwargs.items():
@@ -82,6 +211,24 @@ class SelectedGrids:
 
         return SelectedGrids([grid for grid in self.grids if matched(grid)])
 
+    @property
+    def columns(self):
+        """
+        Returns:
+            GridColumns: None if grids are too few or not all ColumnTracked.
+        """
+        grids = self.grids
+        if self._columns is not None:
+            cached, columns = self._columns
+            # `grids` may be replaced or modified
+            if cached is grids and (columns is None or len(columns.array) == len(grids)):
+                return columns
+        columns = None
+        if len(grids) >= COLUMN_MIN_GRIDS and all(isinstance(grid, ColumnTracked) for grid in grids):
+            columns = GridColumns(grids)
+        self._columns = (grids, columns)
+        return columns
+
     def create_index(self, *attrs):
         indexes = {}
         # index_keys = [(grid.__getattribute__(attr) for attr in attrs) for grid in self.grids]
@@ -0,0 +1,227 @@
+import heapq
+
+import numpy as np
+
+# Cost of unreachable grids, same as the default value of GridInfo.cost
+COST_UNREACHABLE = 9999
+
+
+class PathFinder:
+    """
+    Grid connections of a CampaignMap compiled into NumPy arrays, for fast path finding.
+
+    Map topology (grids, walls, portals) is compiled once after `CampaignMap.grid_connection_initial()`,
+    grid states (enemies, lands, mechanism blocks) are gathered on every query,
+    because they change as map detection goes.
+
+    Edge cost is the cost to enter the destination grid: `ambush_cost` on grids that may ambush, 1 on others.
+
+    Routes are the same as `CampaignMap.find_path_initial()` always gave.
+    It relaxed all visited grids round by round, in the iteration order of the visited set,
+    an equal-cost step replaced the previous grid only if it was horizontal,
+    and it stopped once no new grid was visited, even if costs were not the lowest yet.
+    Both the ties and the early stop depend on that order, and map scripts that route fleets
+    around ambushes and sirens rely on the routes.
+    `_search()` pops grids from a heap ordered by (round, position in the visited set of that round),
+    and relaxes a grid again only if its cost decreased, instead of relaxing all visited grids in every round.
+    Queries that only need costs use Dijkstra ordered by cost.
+    """
+
+    def __init__(self, grids, grid_connection):
+        """
+        Args:
+            grids (list[GridInfo]): All grids in map.
+            grid_connection (dict): Key: tuple(int), grid location.
+                Value: set[tuple(int)], locations that can be reached from key.
+        """
+        self.grids = grids
+        self.locations = [grid.location for grid in grids]
+        self.index = {location: i for i, location in enumerate(self.locations)}
+        self.size = len(grids)
+
+        neighbor, horizontal, offset = [], [], [0]
+        for location in self.locations:
+            for arr in grid_connection.get(location, ()):
+                j = self.index.get(arr)
+                if j is None:
+                    continue
+                neighbor.append(j)
+                horizontal.append(abs(location[0] - arr[0]) == 1)
+            offset.append(len(neighbor))
+        # Neighbors of grid i are neighbor[offset[i]:offset[i + 1]], in the iteration order of grid_connection
+        self.offset = np.array(offset, dtype=np.int32)
+        self.neighbor = np.array(neighbor, dtype=np.int32)
+        # If the move to neighbor changes column
+        self.horizontal = np.array(horizontal, dtype=bool)
+        # Same connections as list[list[tuple(int, bool)]], (index, horizontal),
+        # the search loop visits one grid at a time, and NumPy scalar access is slower than lists.
+        self.connection = [
+            list(zip(self.neighbor[start:end].tolist(), self.horizontal[start:end].tolist()))
+            for start, end in zip(offset[:-1], offset[1:])
+        ]
+
+    def gather(self):
+        """
+        Read current grid states.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: blocked, expandable, ambush. Shape (self.size,), dtype bool.
+        """
+        blocked = np.array([grid.is_land or grid.is_mechanism_block for grid in self.grids], dtype=bool)
+        expandable = np.array([grid.is_sea for grid in self.grids], dtype=bool)
+        ambush = np.array([grid.may_ambush for grid in self.grids], dtype=bool)
+        return blocked, expandable, ambush
+
+    def _search(self, source, weight, blocked, expandable):
+        """
+        Args:
+            source (int): Index of start grid.
+            weight (list[int]): Cost to enter each grid.
+            blocked (list[bool]): Grids that can't be entered.
+            expandable (list[bool]): Grids that can be passed through, start grid is always expandable.
+
+        Returns:
+            tuple[list[int], list[int]]: cost, previous grid index, -1 if none.
+        """
+        locations = self.locations
+        index = self.index
+        connection = self.connection
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        cost = [COST_UNREACHABLE] * self.size
+        prev = [-1] * self.size
+        cost[source] = 0
+        # Round that grid was visited, -1 if not visited
+        visited_round = [-1] * self.size
+        visited_round[source] = 0
+        # Visited grids that are not relaxed since their cost decreased
+        dirty = [False] * self.size
+        dirty[source] = True
+        # Dirty grids to relax in next round
+        pending = [source]
+        # Grids visited in last round, only they can visit new grids
+        frontier = [source]
+        # Visited set, only to have the same iteration order as before.
+        # A set of locations iterates in the same order as a set of GridInfo, which hashes its location
+        visited = {locations[source]}
+        n_round = 0
+        while 1:
+            n_round += 1
+            last = not any(
+                expandable[j] and not blocked[j] and visited_round[j] < 0
+                for i in frontier for j, _ in connection[i]
+            )
+            position = dict(zip(visited, range(len(visited))))
+            if last:
+                # No new grid will be visited, this is the last round.
+                # Relax all visited grids, equal-cost horizontal steps of unchanged grids may replace previous grids
+                pending = [index[location] for location in visited]
+                for i in pending:
+                    dirty[i] = True
+            heap = [(position[locations[i]], i) for i in pending]
+            heapq.heapify(heap)
+            pending = []
+            frontier = []
+            new = visited.copy()
+            while heap:
+                pos, i = heappop(heap)
+                dirty[i] = False
+                c = cost[i]
+                for j, horizontal in connection[i]:
+                    if blocked[j]:
+                        continue
+                    arr = c + weight[j]
+                    if arr < cost[j]:
+                        cost[j] = arr
+                        prev[j] = i
+                        if not dirty[j] and visited_round[j] >= 0:
+                            dirty[j] = True
+                            if visited_round[j] < n_round and position[locations[j]] > pos:
+                                # Not iterated in this round yet
+                                heappush(heap, (position[locations[j]], j))
+                            else:
+                                pending.append(j)
+                    elif arr == cost[j]:
+                        if horizontal:
+                            prev[j] = i
+                    if expandable[j] and visited_round[j] < 0:
+                        visited_round[j] = n_round
+                        dirty[j] = True
+                        pending.append(j)
+                        frontier.append(j)
+                        new.add(locations[j])
+            if last:
+                break
+            visited = new
+
+        return cost, prev
+
+    def _search_cost(self, source, weight, blocked, expandable):
+        """
+        Dijkstra, lowest costs without routes.
+        Costs within the steps of `_search()` are the same,
+        far grids may get lower costs than `_search()`, which may stop before costs are the lowest.
+
+        Args:
+            source (int): Index of start grid.
+            weight (list[int]): Cost to enter each grid.
+            blocked (list[bool]): Grids that can't be entered.
+            expandable (list[bool]): Grids that can be passed through, start grid is always expandable.
+
+        Returns:
+            list[int]: cost
+        """
+        connection = self.connection
+        cost = [COST_UNREACHABLE] * self.size
+        cost[source] = 0
+        done = [False] * self.size
+        heap = [(0, source)]
+        while heap:
+            c, i = heapq.heappop(heap)
+            if done[i]:
+                continue
+            done[i] = True
+            if i != source and not expandable[i]:
+                continue
+            for j, _ in connection[i]:
+                if blocked[j]:
+                    continue
+                arr = c + weight[j]
+                if arr < cost[j]:
+                    cost[j] = arr
+                    heapq.heappush(heap, (arr, j))
+        return cost
+
+    def search(self, sources, has_ambush=True, has_enemy=True, route=True):
+        """
+        Path finding from multiple sources, on the same grid states.
+
+        Args:
+            sources (list[tuple(int)]): Locations of start grids.
+            has_ambush (bool): MAP_HAS_AMBUSH
+            has_enemy (bool): False if only sea and land are considered
+            route (bool): False if only costs are needed, previous grids are all -1.
+                Costs are the lowest, see `_search_cost()`.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: cost and previous grid index, shape (len(sources), self.size).
+                Previous grid index is -1 on start grids and unreachable grids.
+        """
+        blocked, expandable, ambush = self.gather()
+        if not has_enemy:
+            expandable[:] = True
+        ambush_cost = 10 if has_ambush else 1
+        weight = np.where(ambush, ambush_cost, 1).tolist()
+        blocked = blocked.tolist()
+        expandable = expandable.tolist()
+
+        cost = np.full((len(sources), self.size), COST_UNREACHABLE, dtype=np.int32)
+        prev = np.full((len(sources), self.size), -1, dtype=np.int32)
+        for n, location in enumerate(sources):
+            if route:
+                c, p = self._search(self.index[location], weight, blocked, expandable)
+                cost[n] = c
+                prev[n] = p
+            else:
+                cost[n] = self._search_cost(self.index[location], weight, blocked, expandable)
+        return cost, prev
@@ -1,7 +1,8 @@
 from module.base.utils import location2node
+from module.map.map_grids import ColumnTracked
 
 
-class GridInfo:
+class GridInfo(ColumnTracked):
     """
     Class that gather basic information of a grid in map_v1.
 
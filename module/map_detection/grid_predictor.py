@@ -6,6 +6,24 @@ from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 from module.template.assets import *
 
+# Area of the enemy scale icon on the upper-left of grid
+ENEMY_SCALE_AREA = (-0.415 - 0.7, -0.62 - 0.7, -0.415, -0.62)
+
+
+def hsv_range(h=(0, 360), s=(0, 100), v=(0, 100)):
+    """
+    Args:
+        h (tuple): Hue.
+        s (tuple): Saturation.
+        v (tuple): Value.
+
+    Returns:
+        tuple[tuple, tuple]: lower and upper of `cv2.inRange()` in opencv HSV.
+    """
+    lower = (h[0] / 2, s[0] * 2.55, v[0] * 2.55)
+    upper = (h[1] / 2 + 1, s[1] * 2.55 + 1, v[1] * 2.55 + 1)
+    return lower, upper
+
 
 class GridPredictor:
     def __init__(self, location, image, corner, config):
@@ -110,6 +128,22 @@ class GridPredictor:
                 self.is_siren = True
                 self.enemy_scale = 0
 
+    @property
+    def feature_cache(self):
+        """
+        Rescaled crops, color masks and pixel counts derived from `self.image`,
+        shared by predict methods and filled in batches by `GridBatch`.
+        Cache is dropped once `self.image` is replaced.
+
+        Returns:
+            dict: Key: tuple, (kind, area, ...), value: np.ndarray or int
+        """
+        cache = self.__dict__.get('_feature_cache')
+        if cache is None or cache[0] is not self.image:
+            cache = (self.image, {})
+            self.__dict__['_feature_cache'] = cache
+        return cache[1]
+
     def relative_crop(self, area, shape=None):
         """Crop image and rescale to target shape. Eliminate the effect of perspective.
 
@@ -119,12 +153,43 @@ class GridPredictor:
 
         Returns:
             np.ndarray: Shape (height, width, channel).
+                Rescaled crops are cached and read-only, don't modify them in place.
         """
+        if shape is not None:
+            key = ('crop', tuple(area), tuple(shape))
+            cache = self.feature_cache
+            try:
+                return cache[key]
+            except KeyError:
+                pass
         area = self._image_center + np.array(area) * self._image_a
         image = crop(self.image, area=np.rint(area).astype(int), copy=False)
         if shape is not None:
             # Follow the default re-sampling filter in pillow, which is BICUBIC.
             image = cv2.resize(image, shape, interpolation=cv2.INTER_CUBIC)
+            image.setflags(write=False)
+            cache[key] = image
+        return image
+
+    def relative_color(self, area, color, shape=(50, 50)):
+        """
+        Args:
+            area (tuple): upper_left_x, upper_left_y, bottom_right_x, bottom_right_y, such as (-1, -1, 1, 1).
+            color (tuple): Target RGB.
+            shape (tuple): Output image shape, (width, height).
+
+        Returns:
+            np.ndarray: `color_similarity_2d` of the rescaled crop, cached and read-only.
+        """
+        key = ('color', tuple(area), tuple(color), tuple(shape))
+        cache = self.feature_cache
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        image = color_similarity_2d(self.relative_crop(area, shape=shape), color=color)
+        image.setflags(write=False)
+        cache[key] = image
         return image
 
     def relative_rgb_count(self, area, color, shape=(50, 50), threshold=221):
@@ -138,9 +203,15 @@ class GridPredictor:
         Returns:
             int: Number of matched pixels.
         """
-        mask = color_similarity_2d(self.relative_crop(area, shape=shape), color=color)
-        cv2.inRange(mask, threshold, 255, dst=mask)
+        key = ('rgb', tuple(area), tuple(color), tuple(shape), threshold)
+        cache = self.feature_cache
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        mask = cv2.inRange(self.relative_color(area, color=color, shape=shape), threshold, 255)
         count = cv2.countNonZero(mask)
+        cache[key] = count
         return count
 
     def relative_hsv_count(self, area, h=(0, 360), s=(0, 100), v=(0, 100), shape=(50, 50)):
@@ -155,13 +226,18 @@ class GridPredictor:
         Returns:
             int: Number of matched pixels.
         """
-        image = self.relative_crop(area, shape=shape)
-        cv2.cvtColor(image, cv2.COLOR_RGB2HSV, dst=image)
-        lower = (h[0] / 2, s[0] * 2.55, v[0] * 2.55)
-        upper = (h[1] / 2 + 1, s[1] * 2.55 + 1, v[1] * 2.55 + 1)
+        key = ('hsv', tuple(area), tuple(h), tuple(s), tuple(v), tuple(shape))
+        cache = self.feature_cache
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        image = cv2.cvtColor(self.relative_crop(area, shape=shape), cv2.COLOR_RGB2HSV)
+        lower, upper = hsv_range(h, s, v)
         # Don't set `dst`, output image is (50, 50) but `image` is (50, 50, 3)
         image = cv2.inRange(image, lower, upper)
         count = cv2.countNonZero(image)
+        cache[key] = count
         return count
 
     def predict_enemy_scale(self):
@@ -171,9 +247,8 @@ class GridPredictor:
         Returns:
             int: 1: Small, 2: Middle, 3: Large, 0: Unknown.
         """
-        image = self.relative_crop((-0.415 - 0.7, -0.62 - 0.7, -0.415, -0.62), shape=(50, 50))
-        red = color_similarity_2d(image, (255, 130, 132))
-        yellow = color_similarity_2d(image, (255, 235, 156))
+        red = self.relative_color(ENEMY_SCALE_AREA, (255, 130, 132), shape=(50, 50))
+        yellow = self.relative_color(ENEMY_SCALE_AREA, (255, 235, 156), shape=(50, 50))
 
         if TEMPLATE_ENEMY_L.match(red, similarity=0.75):
             scale = 3
@@ -190,15 +265,13 @@ class GridPredictor:
         if self.config.MAP_SIREN_HAS_BOSS_ICON:
             if self.enemy_scale:
                 return ''
-            image = self.relative_crop((-0.55, -0.2, 0.45, 0.2), shape=(50, 20))
-            image = color_similarity_2d(image, color=(255, 150, 24))
+            image = self.relative_color((-0.55, -0.2, 0.45, 0.2), color=(255, 150, 24), shape=(50, 20))
             if image[image > 221].shape[0] > 200:
                 if TEMPLATE_ENEMY_BOSS.match(image, similarity=0.6):
                     return 'Siren_Siren'
         if self.config.MAP_SIREN_HAS_BOSS_ICON_SMALL:
             if self.relative_hsv_count(area=(0.03, -0.15, 0.63, 0.15), h=(32 - 3, 32 + 3), shape=(50, 20)) > 100:
-                image = self.relative_crop((0.03, -0.15, 0.63, 0.15), shape=(50, 20))
-                image = color_similarity_2d(image, color=(255, 150, 33))
+                image = self.relative_color((0.03, -0.15, 0.63, 0.15), color=(255, 150, 33), shape=(50, 20))
                 if TEMPLATE_ENEMY_BOSS.match(image, similarity=0.7):
                     return 'Siren_Siren'
 
@@ -229,15 +302,13 @@ class GridPredictor:
         if self.enemy_genre == 'Siren_Siren':
             return False
 
-        image = self.relative_crop((-0.55, -0.2, 0.45, 0.2), shape=(50, 20))
-        image = color_similarity_2d(image, color=(255, 77, 82))
+        image = self.relative_color((-0.55, -0.2, 0.45, 0.2), color=(255, 77, 82), shape=(50, 20))
         if TEMPLATE_ENEMY_BOSS.match(image, similarity=0.75):
             return True
 
         # Small boss icon
         if self.relative_hsv_count(area=(0.03, -0.15, 0.63, 0.15), h=(358 - 3, 358 + 3), shape=(50, 20)) > 100:
-            image = self.relative_crop((0.03, -0.15, 0.63, 0.15), shape=(50, 20))
-            image = color_similarity_2d(image, color=(255, 77, 82))
+            image = self.relative_color((0.03, -0.15, 0.63, 0.15), color=(255, 77, 82), shape=(50, 20))
             if TEMPLATE_ENEMY_BOSS.match(image, similarity=0.7):
                 return True
 
@@ -247,13 +318,11 @@ class GridPredictor:
         return self.relative_rgb_count(area=(-0.5, -1, 0.5, 0), color=(255, 255, 60), shape=(50, 50)) > 35
 
     def predict_fleet(self):
-        image = self.relative_crop((-1, -2, -0.5, -1.5), shape=(50, 50))
-        image = color_similarity_2d(image, color=(255, 255, 255))
+        image = self.relative_color((-1, -2, -0.5, -1.5), color=(255, 255, 255), shape=(50, 50))
         return TEMPLATE_FLEET_AMMO.match(image)
 
     def predict_submarine(self):
-        image = self.relative_crop((-0.86, 0.08, -0.36, 0.58), shape=(50, 50))
-        image = color_similarity_2d(image, color=(255, 243, 156))
+        image = self.relative_color((-0.86, 0.08, -0.36, 0.58), color=(255, 243, 156), shape=(50, 50))
         return TEMPLATE_SUBMARINE.match(image)
 
     def predict_caught_by_siren(self):
@@ -281,8 +350,7 @@ class GridPredictor:
         if count < 600:
             return False
 
-        image = self.relative_crop((-0.5, -3.5, 0.5, -2.5), shape=(60, 60))
-        image = color_similarity_2d(image, color=(24, 255, 107))
+        image = self.relative_color((-0.5, -3.5, 0.5, -2.5), color=(24, 255, 107), shape=(60, 60))
         if not TEMPLATE_FLEET_CURRENT.match(image):
             return False
 
@@ -349,3 +417,119 @@ class GridPredictor:
         res = cv2.matchTemplate(piece_2, piece_1, cv2.TM_CCOEFF_NORMED)
         _, sim, _, point = cv2.minMaxLoc(res)
         return sim > similarity
+
+
+class GridBatch:
+    """
+    Compute features of many grids at once.
+
+    Crops of the same relative area have the same shape on every grid, so they are stacked into one image,
+    color masks and pixel counts of all grids are done in a few array operations instead of a few per grid.
+    Color conversions are per-pixel, results are identical to those of `GridPredictor`,
+    and they are written into `GridPredictor.feature_cache`, so per grid predictions take them directly.
+
+    Examples:
+        GridBatch(grids).prefetch()
+        for grid in grids:
+            grid.predict()
+    """
+
+    def __init__(self, grids):
+        """
+        Args:
+            grids (list[GridPredictor]):
+        """
+        self.grids = list(grids)
+
+    def _missing(self, key):
+        return [grid for grid in self.grids if key not in grid.feature_cache]
+
+    @staticmethod
+    def _stack_crop(grids, area, shape):
+        return np.concatenate([grid.relative_crop(area, shape=shape) for grid in grids], axis=0)
+
+    @staticmethod
+    def _split(grids, key, image):
+        for grid, piece in zip(grids, np.split(image, len(grids), axis=0)):
+            piece.setflags(write=False)
+            grid.feature_cache[key] = piece
+
+    @staticmethod
+    def _count(grids, key, mask):
+        count = np.count_nonzero(mask.reshape(len(grids), -1), axis=1)
+        for grid, c in zip(grids, count.tolist()):
+            grid.feature_cache[key] = c
+
+    def relative_color(self, area, color, shape=(50, 50)):
+        """
+        Batched `GridPredictor.relative_color()`
+
+        Returns:
+            list[np.ndarray]:
+        """
+        key = ('color', tuple(area), tuple(color), tuple(shape))
+        grids = self._missing(key)
+        if grids:
+            self._split(grids, key, color_similarity_2d(self._stack_crop(grids, area, shape), color=color))
+        return [grid.feature_cache[key] for grid in self.grids]
+
+    def relative_rgb_count(self, area, color, shape=(50, 50), threshold=221):
+        """
+        Batched `GridPredictor.relative_rgb_count()`
+
+        Returns:
+            list[int]:
+        """
+        key = ('rgb', tuple(area), tuple(color), tuple(shape), threshold)
+        grids = self._missing(key)
+        if grids:
+            color_key = ('color', tuple(area), tuple(color), tuple(shape))
+            if all(color_key in grid.feature_cache for grid in grids):
+                image = np.concatenate([grid.feature_cache[color_key] for grid in grids], axis=0)
+            else:
+                image = color_similarity_2d(self._stack_crop(grids, area, shape), color=color)
+                self._split(grids, color_key, image)
+            self._count(grids, key, cv2.inRange(image, threshold, 255))
+        return [grid.feature_cache[key] for grid in self.grids]
+
+    def relative_hsv_count(self, area, h=(0, 360), s=(0, 100), v=(0, 100), shape=(50, 50)):
+        """
+        Batched `GridPredictor.relative_hsv_count()`
+
+        Returns:
+            list[int]:
+        """
+        key = ('hsv', tuple(area), tuple(h), tuple(s), tuple(v), tuple(shape))
+        grids = self._missing(key)
+        if grids:
+            image = cv2.cvtColor(self._stack_crop(grids, area, shape), cv2.COLOR_RGB2HSV)
+            lower, upper = hsv_range(h, s, v)
+            self._count(grids, key, cv2.inRange(image, lower, upper))
+        return [grid.feature_cache[key] for grid in self.grids]
+
+    def prefetch(self):
+        """
+        Batch the features that `GridPredictor.predict()` reads on every grid.
+        Grids that override `predict()` are skipped.
+        """
+        grids = [grid for grid in self.grids if type(grid).predict is GridPredictor.predict]
+        if not grids:
+            return
+        batch = GridBatch(grids)
+        config = grids[0].config
+
+        batch.relative_color(ENEMY_SCALE_AREA, (255, 130, 132), shape=(50, 50))
+        batch.relative_color(ENEMY_SCALE_AREA, (255, 235, 156), shape=(50, 50))
+        if config.MAP_SIREN_HAS_BOSS_ICON:
+            batch.relative_color((-0.55, -0.2, 0.45, 0.2), color=(255, 150, 24), shape=(50, 20))
+        if config.MAP_SIREN_HAS_BOSS_ICON_SMALL:
+            batch.relative_hsv_count(area=(0.03, -0.15, 0.63, 0.15), h=(32 - 3, 32 + 3), shape=(50, 20))
+        batch.relative_color((-0.55, -0.2, 0.45, 0.2), color=(255, 77, 82), shape=(50, 20))
+        batch.relative_hsv_count(area=(0.03, -0.15, 0.63, 0.15), h=(358 - 3, 358 + 3), shape=(50, 20))
+        batch.relative_color((-0.86, 0.08, -0.36, 0.58), color=(255, 243, 156), shape=(50, 50))
+        batch.relative_color((-1, -2, -0.5, -1.5), color=(255, 255, 255), shape=(50, 50))
+        if config.MAP_HAS_MYSTERY:
+            batch.relative_rgb_count(area=(-0.3, -2, 0.3, -0.6), color=(148, 255, 247), shape=(20, 50))
+        batch.relative_hsv_count(area=(-0.5, -3.5, 0.5, -2.5), h=(141 - 3, 141 + 10), shape=(50, 50))
+        if config.MAP_HAS_MISSILE_ATTACK:
+            batch.relative_rgb_count(area=(-0.5, -1, 0.5, 0), color=(255, 255, 60), shape=(50, 50))
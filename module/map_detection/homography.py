@@ -8,6 +8,7 @@ from module.config.config import AzurLaneConfig
 from module.exception import MapDetectionError
 from module.logger import logger
 from module.map_detection.perspective import Perspective
+from module.map_detection.tracker import TranslationTracker
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 
@@ -63,6 +64,9 @@ class Homography:
         """
         self.config = config
         self.homo_loaded = False
+        self.tracker = TranslationTracker()
+        # Detection state of the last frame, to be reused in tracking
+        self._track_state = None
 
     @cached_property
     def ui_mask_homo_stroke(self):
@@ -152,6 +156,9 @@ class Homography:
         self.homo_invt = cv2.invert(homo)[1]
         self.homo_size = tuple(size.tolist())
         self.homo_loaded = True
+        # Sea surface changed, previous frames are no longer comparable
+        self.tracker.reset()
+        self._track_state = None
 
     def detect(self, image):
         """
@@ -162,6 +169,7 @@ class Homography:
             bool: If success.
         """
         start_time = time.time()
+        cost = {}
         self.image = image
 
         # Image initialization
@@ -176,32 +184,54 @@ class Homography:
         kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
         cv2.morphologyEx(image_edge, cv2.MORPH_CLOSE, kernel, dst=image_edge)
         # Image.fromarray(image_edge, mode='L').show()
+        cost['edge'] = time.time()
+
+        # Reuse the last detection if camera only panned
+        shift = None
+        if self.config.DETECTION_TRACKING:
+            shift = self.tracker.update(image_edge)
+            cost['track'] = time.time()
+        prev, self._track_state = self._track_state, None
+        tracked = shift is not None and prev is not None and self.search_tile_tracked(image_edge, prev, shift)
 
         # Find free tile
-        if self.search_tile_center(image_edge, threshold_good=self.config.HOMO_CENTER_GOOD_THRESHOLD,
-                                   threshold=self.config.HOMO_CENTER_THRESHOLD):
+        if tracked:
+            pass
+        elif self.search_tile_center(image_edge, threshold_good=self.config.HOMO_CENTER_GOOD_THRESHOLD,
+                                     threshold=self.config.HOMO_CENTER_THRESHOLD):
             pass
         elif self.search_tile_corner(image_edge, threshold=self.config.HOMO_CORNER_THRESHOLD):
             pass
         elif self.search_tile_rectangle(image_edge, threshold=self.config.HOMO_RECTANGLE_THRESHOLD):
             pass
         else:
+            self.tracker.reset()
             raise MapDetectionError('Failed to find a free tile')
 
         self.homo_loca %= self.config.HOMO_TILE
+        cost['tile'] = time.time()
 
         # Detect map edges
-        self.lower_edge, self.upper_edge, self.left_edge, self.right_edge = False, False, False, False
-        self._map_edge_count = (0, 0)
-        if self.config.HOMO_EDGE_DETECT:
-            # image_edge = cv2.bitwise_and(cv2.dilate(image_edge, kernel),
-            #                              cv2.inRange(image_trans, *self.config.HOMO_EDGE_COLOR_RANGE))
-            # image_edge = cv2.bitwise_and(image_edge, self.ui_mask_homo_stroke)
-            cv2.dilate(image_edge, kernel, dst=image_edge)
-            cv2.inRange(image_trans, *self.config.HOMO_EDGE_COLOR_RANGE, dst=image_trans)
-            cv2.bitwise_and(image_edge, image_trans, dst=image_edge)
-            cv2.bitwise_and(image_edge, self.ui_mask_homo_stroke, dst=image_edge)
-            self.detect_edges(image_edge, hough_th=self.config.HOMO_EDGE_HOUGHLINES_THRESHOLD)
+        if tracked and self.tracker.is_still(shift):
+            # Camera didn't move, edges are the same
+            self.lower_edge, self.upper_edge, self.left_edge, self.right_edge, self._map_edge_count = prev[2:]
+        else:
+            self.lower_edge, self.upper_edge, self.left_edge, self.right_edge = False, False, False, False
+            self._map_edge_count = (0, 0)
+            if self.config.HOMO_EDGE_DETECT:
+                # image_edge = cv2.bitwise_and(cv2.dilate(image_edge, kernel),
+                #                              cv2.inRange(image_trans, *self.config.HOMO_EDGE_COLOR_RANGE))
+                # image_edge = cv2.bitwise_and(image_edge, self.ui_mask_homo_stroke)
+                cv2.dilate(image_edge, kernel, dst=image_edge)
+                cv2.inRange(image_trans, *self.config.HOMO_EDGE_COLOR_RANGE, dst=image_trans)
+                cv2.bitwise_and(image_edge, image_trans, dst=image_edge)
+                cv2.bitwise_and(image_edge, self.ui_mask_homo_stroke, dst=image_edge)
+                self.detect_edges(image_edge, hough_th=self.config.HOMO_EDGE_HOUGHLINES_THRESHOLD)
+        cost['map_edge'] = time.time()
+        self._track_state = (
+            self.homo_loca.copy(), np.copy(self.map_inner),
+            self.lower_edge, self.upper_edge, self.left_edge, self.right_edge, self._map_edge_count
+        )
 
         # Log
         time_cost = round(time.time() - start_time, 3)
@@ -213,6 +243,51 @@ class Homography:
             '/' if self.left_edge else ' ', '_' if self.upper_edge else ' ', '\\' if self.right_edge else ' ',
             point2str(*self.homo_loca, length=3))
                     )
+        last = start_time
+        breakdown = []
+        for name, stamp in cost.items():
+            breakdown.append(f'{name} {float2str(stamp - last)}s')
+            last = stamp
+        logger.attr_align('homo_cost', ', '.join(breakdown))
+
+    def search_tile_tracked(self, image, prev, shift, pad=8):
+        """
+        Search for the center of empty tile around where it should be after a camera pan,
+        instead of searching the entire image.
+
+        Args:
+            image (np.ndarray): Monochrome image.
+            prev (tuple): Detection state of the last frame, see `detect()`.
+            shift (np.ndarray): Camera movement on sea surface, from `TranslationTracker.update()`
+            pad (int): Search range around the expected location, in pixel.
+
+        Returns:
+            bool: If success.
+        """
+        tile = np.array(self.config.HOMO_TILE)
+        offset = np.array(self.config.HOMO_CENTER_OFFSET)
+        template = ASSETS.tile_center_image
+        height, width = template.shape
+        # Tile centers are on a lattice, start from the one nearest to where the last match was
+        loca = (prev[0] + shift) % tile + offset
+        nearest = loca + np.round((prev[1] + shift - loca) / tile) * tile
+        candidates = [nearest + np.multiply(step, tile) for step in [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]]
+        for point in candidates:
+            x, y = np.round(point).astype(int)
+            area = (x - pad, y - pad, x + width + pad, y + height + pad)
+            if area[0] < 0 or area[1] < 0 or area[2] > image.shape[1] or area[3] > image.shape[0]:
+                continue
+            result = cv2.matchTemplate(crop(image, area, copy=False), template, cv2.TM_CCOEFF_NORMED)
+            _, similarity, _, loca = cv2.minMaxLoc(result)
+            if similarity > self.config.HOMO_CENTER_GOOD_THRESHOLD:
+                loca = np.add(loca, area[:2])
+                self.homo_loca = loca - offset
+                self.map_inner = loca
+                logger.attr_align('tile_center', f'{float2str(similarity)} (tracked, '
+                                                 f'shift {point2str(*shift, length=3)})')
+                return True
+
+        return False
 
     def search_tile_center(self, image, threshold_good=0.9, threshold=0.8, encourage=1.0):
         """
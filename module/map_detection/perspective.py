@@ -9,6 +9,7 @@ from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.exception import MapDetectionError
 from module.logger import logger
+from module.map_detection.tracker import TranslationTracker
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 
@@ -57,6 +58,8 @@ class Perspective:
             config (AzurLaneConfig):
         """
         self.config = config
+        self.tracker = TranslationTracker()
+        self._loaded = False
 
     def load(self, image):
         """
@@ -69,6 +72,16 @@ class Perspective:
         # Image initialisation
         image = self.load_image(image)
 
+        # Reuse the last detection if camera didn't move
+        # Camera pans are not pure translations on screen, so lines can't be reused with an offset
+        if self.config.DETECTION_TRACKING:
+            shift = self.tracker.update(image)
+            if self._loaded and self.tracker.is_still(shift):
+                logger.info('%ss  Perspective reused, camera not moved (track %s)' % (
+                    float2str(time.time() - start_time), float2str(self.tracker.last_response)))
+                return
+        self._loaded = False
+
         # Lines detection
         inner_h = self.detect_lines(
             image,
@@ -148,6 +161,8 @@ class Perspective:
         # print(self.vertical)
         # print(self.left_edge, self.right_edge)
 
+        self._loaded = True
+
         # Log
         time_cost = round(time.time() - start_time, 3)
         logger.info('%ss  %s   Horizontal: %s (%s inner, %s edge)' % (
@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+
+
+class TranslationTracker:
+    """
+    Check if a frame is a pure translation of the previous one,
+    by phase correlation on downscaled edge maps.
+
+    Camera on map doesn't move in most screenshots of `track_movable` and `round_wait`,
+    and it only pans when it moves, so detection results of the last frame can be reused with an offset.
+
+    Examples:
+        tracker = TranslationTracker()
+        shift = tracker.update(image_edge)
+        if shift is not None:
+            # Reuse
+        else:
+            # Full detection
+    """
+
+    def __init__(self, scale=4, response=0.2, response_still=0.8):
+        """
+        Args:
+            scale (int): Downscale factor of edge maps.
+            response (float): Min phase correlation response of a translation, 0 to 1.
+            response_still (float): Min response to consider camera not moved.
+                Tiles are periodic, a pan of whole tiles may correlate at zero shift with a mediocre response.
+        """
+        self.scale = scale
+        self.response = response
+        self.response_still = response_still
+        self.image = None
+        self.window = None
+        # Response of the last update, for logging
+        self.last_response = 0.
+
+    def reset(self):
+        self.image = None
+
+    def update(self, image):
+        """
+        Args:
+            image (np.ndarray): Monochrome edge map of the current frame.
+
+        Returns:
+            np.ndarray: Movement (x, y) in pixels from the previous frame to the current,
+                content at `p` in the previous frame is at `p + shift` in the current.
+                None if not a pure translation or no previous frame.
+        """
+        small = cv2.resize(image, None, fx=1 / self.scale, fy=1 / self.scale, interpolation=cv2.INTER_AREA)
+        small = small.astype(np.float32)
+        prev, self.image = self.image, small
+        if prev is None or prev.shape != small.shape:
+            self.last_response = 0.
+            return None
+        if self.window is None or self.window.shape != small.shape:
+            self.window = cv2.createHanningWindow(small.shape[::-1], cv2.CV_32F)
+
+        (x, y), response = cv2.phaseCorrelate(prev, small, self.window)
+        self.last_response = response
+        if response < self.response:
+            return None
+        return np.array((x, y)) * self.scale
+
+    def is_still(self, shift):
+        """
+        Args:
+            shift (np.ndarray): Result of the last `update()`
+
+        Returns:
+            bool: If camera didn't move.
+        """
+        return shift is not None and np.linalg.norm(shift) < 1 and self.last_response >= self.response_still
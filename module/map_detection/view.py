@@ -7,6 +7,7 @@ from module.logger import logger
 from module.map.map_grids import SelectedGrids
 from module.map_detection.detector import MapDetector
 from module.map_detection.grid import Grid
+from module.map_detection.grid_predictor import GridBatch
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 
@@ -102,6 +103,7 @@ class View(MapDetector):
         Predict grid info.
         """
         start_time = time.time()
+        GridBatch(self.grids.values()).prefetch()
         for grid in self:
             grid.predict()
         logger.attr_align('predict', len(self.grids.keys()), front=float2str(time.time() - start_time) + 's')
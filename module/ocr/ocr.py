@@ -5,8 +5,11 @@ from typing import TYPE_CHECKING
 import module.config.server as server
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.frame_cache import FRAME_CACHE
+from module.base.frame_diff import FRAME_DIFF
 from module.base.utils import *
 from module.logger import logger
+from module.ocr.ocr_cache import OCR_CACHE
 from module.ocr.rpc import ModelProxyFactory
 from module.webui.setting import State
 
@@ -22,6 +25,9 @@ else:
 class Ocr:
     SHOW_LOG = True
     SHOW_REVISE_WARNING = False
+    # Reuse results of identical pre-processed crops in the same request, see OcrCache
+    # Set to False in subclasses whose results should always come from model
+    USE_CACHE = True
 
     def __init__(self, buttons, lang='azur_lane', letter=(255, 255, 255), threshold=128, alphabet=None, name=None):
         """
@@ -69,6 +75,28 @@ class Ocr:
 
         return image.astype(np.uint8)
 
+    def pre_process_area(self, image, area):
+        """
+        Crop an area from screenshot and pre-process it.
+        If `pre_process()` is not overridden, letters extracted from the same area
+        of the same screenshot are shared through FRAME_CACHE.
+
+        Args:
+            image (np.ndarray): Screenshot
+            area (tuple):
+
+        Returns:
+            np.ndarray: Shape (width, height)
+        """
+        if type(self).pre_process is not Ocr.pre_process:
+            return self.pre_process(crop(image, area))
+
+        image = FRAME_CACHE.get(
+            image, ('letters', tuple(area), tuple(self.letter), self.threshold),
+            lambda: extract_letters(crop(image, area, copy=False), letter=self.letter, threshold=self.threshold)
+        )
+        return image.astype(np.uint8)
+
     def after_process(self, result):
         """
         Args:
@@ -90,24 +118,51 @@ class Ocr:
         """
         start_time = time.time()
 
+        if direct_ocr or not self.USE_CACHE:
+            result_list = self.ocr_result(image, direct_ocr=direct_ocr)
+        else:
+            # Reuse results if OCR areas are unchanged since they were recognized, see FrameDiff
+            buttons = [tuple(area) for area in self.buttons]
+            alphabet = tuple(self.alphabet) if isinstance(self.alphabet, list) else self.alphabet
+            key = ('ocr', id(self), tuple(buttons), tuple(self.letter), self.threshold, alphabet, self.lang)
+            area = (min(a[0] for a in buttons), min(a[1] for a in buttons),
+                    max(a[2] for a in buttons), max(a[3] for a in buttons))
+            result_list = FRAME_DIFF.get(image, key, area, lambda: self.ocr_result(image), kind='ocr', keep=(self,))
+            if isinstance(result_list, list):
+                result_list = list(result_list)
+
+        if self.SHOW_LOG:
+            logger.attr(name='%s %ss' % (self.name, float2str(time.time() - start_time)),
+                        text=str(result_list))
+
+        return result_list
+
+    def ocr_result(self, image, direct_ocr=False):
+        """
+        Args:
+            image (np.ndarray, list[np.ndarray]):
+            direct_ocr (bool): True to skip preprocess.
+
+        Returns:
+            Result of `after_process()`, or a list of them if there are multiple buttons.
+        """
         if direct_ocr:
             image_list = [self.pre_process(i) for i in image]
         else:
-            image_list = [self.pre_process(crop(image, area)) for area in self.buttons]
+            image_list = [self.pre_process_area(image, area) for area in self.buttons]
 
         # This will show the images feed to OCR model
         # self.cnocr.debug(image_list)
 
-        result_list = self.cnocr.atomic_ocr_for_single_lines(image_list, self.alphabet)
+        if self.USE_CACHE:
+            result_list = OCR_CACHE.atomic_ocr_for_single_lines(self.cnocr, self.lang, image_list, self.alphabet)
+        else:
+            result_list = self.cnocr.atomic_ocr_for_single_lines(image_list, self.alphabet)
         result_list = [''.join(result) for result in result_list]
         result_list = [self.after_process(result) for result in result_list]
 
         if len(self.buttons) == 1:
             result_list = result_list[0]
-        if self.SHOW_LOG:
-            logger.attr(name='%s %ss' % (self.name, float2str(time.time() - start_time)),
-                        text=str(result_list))
-
         return result_list
 
 
@@ -130,7 +185,26 @@ class OcrYuv(Ocr):
         Returns:
             np.ndarray: Shape (width, height)
         """
-        y = rgb2luma(image)
+        return self.pre_process_luma(rgb2luma(image))
+
+    def pre_process_area(self, image, area):
+        """
+        Y channel of the same area of the same screenshot is shared through FRAME_CACHE,
+        if `pre_process()` is not overridden.
+        """
+        if type(self).pre_process is not OcrYuv.pre_process:
+            return super().pre_process_area(image, area)
+
+        return self.pre_process_luma(FRAME_CACHE.crop(image, area, 'luma'))
+
+    def pre_process_luma(self, y):
+        """
+        Args:
+            y (np.ndarray): Y channel, shape (height, width)
+
+        Returns:
+            np.ndarray: Shape (width, height)
+        """
         letter_y = (np.ones(y.shape) * self.letter_y).astype(np.uint8)
         diff = cv2.absdiff(y, letter_y)
         diff = cv2.multiply(diff, 255.0 / self.threshold)
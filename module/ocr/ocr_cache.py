@@ -0,0 +1,105 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+
+class OcrCache:
+    """
+    Results of `atomic_ocr_for_single_lines`, keyed by the content of pre-processed crops.
+
+    Counters like action points, oil, coins and timers are OCR'd again and again while their pixels
+    don't change, identical requests skip model inference.
+    cnocr pads all crops in one call to the widest one, and padding changes predictions,
+    so results are cached per request (all crops of one call), not per crop.
+    Results of a request depend only on its crops, lang and alphabet, so cached results never go stale.
+    Cache is an LRU of at most `size` requests, each result is a few characters per crop.
+
+    ```
+    result_list = OCR_CACHE.atomic_ocr_for_single_lines(self.cnocr, self.lang, image_list, self.alphabet)
+    ```
+    """
+
+    def __init__(self, size=1024):
+        """
+        Args:
+            size (int): Max number of results kept.
+        """
+        self.size = size
+        self.cache = OrderedDict()
+        self.hit = 0
+        self.miss = 0
+
+    @staticmethod
+    def key(lang, alphabet, image_list):
+        """
+        Args:
+            lang (str):
+            alphabet (str, list, None):
+            image_list (list[np.ndarray]): Pre-processed crops
+
+        Returns:
+            tuple:
+        """
+        if alphabet is not None and not isinstance(alphabet, str):
+            alphabet = tuple(alphabet)
+        digest = hashlib.blake2b(digest_size=16)
+        shapes = []
+        for image in image_list:
+            image = np.ascontiguousarray(image)
+            digest.update(image.data)
+            shapes.append((image.shape, image.dtype.str))
+        return lang, alphabet, tuple(shapes), digest.digest()
+
+    def atomic_ocr_for_single_lines(self, cnocr, lang, image_list, alphabet=None):
+        """
+        Args:
+            cnocr (AlOcr, ModelProxy): Model to run cache misses.
+            lang (str):
+            image_list (list[np.ndarray]):
+            alphabet (str, list, None):
+
+        Returns:
+            list[list[str]]: Same as `AlOcr.atomic_ocr_for_single_lines()`
+        """
+        key = self.key(lang, alphabet, image_list)
+        try:
+            result_list = self.cache[key]
+            self.cache.move_to_end(key)
+            self.hit += 1
+            return [list(result) for result in result_list]
+        except KeyError:
+            self.miss += 1
+
+        result_list = cnocr.atomic_ocr_for_single_lines(image_list, alphabet)
+        self.cache[key] = tuple(tuple(result) for result in result_list)
+        while len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+        return result_list
+
+    def clear(self):
+        self.cache.clear()
+
+    @property
+    def hit_rate(self):
+        total = self.hit + self.miss
+        return self.hit / total if total else 0.
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit and miss counters, for profiling
+        """
+        return {
+            'hit': self.hit,
+            'miss': self.miss,
+            'hit_rate': round(self.hit_rate, 3),
+            'cached': len(self.cache),
+        }
+
+    def stats_reset(self):
+        self.hit = 0
+        self.miss = 0
+
+
+OCR_CACHE = OcrCache()
@@ -1,12 +1,68 @@
 import argparse
 import multiprocessing
-import pickle
+import struct
+import time
+from collections import deque
+
+import numpy as np
 
 from module.logger import logger
 from module.webui.setting import State
 
 process: multiprocessing.Process = None
 
+# Crops are sent as raw bytes instead of pickles, in frame:
+# count, (height, width, channels) * count, pixel bytes of all images
+FRAME_COUNT = struct.Struct('<I')
+FRAME_SHAPE = struct.Struct('<III')
+# Requests of the same (lang, alphabet) that arrive within this window are inferred in one batch
+BATCH_WINDOW = 0.005
+BATCH_MAX_IMAGES = 64
+
+
+def pack_images(img_list):
+    """
+    Args:
+        img_list (list[np.ndarray]): uint8 images, shape (height, width) or (height, width, channels)
+
+    Returns:
+        bytes:
+    """
+    header = [FRAME_COUNT.pack(len(img_list))]
+    body = []
+    for image in img_list:
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        channels = image.shape[2] if image.ndim == 3 else 0
+        header.append(FRAME_SHAPE.pack(height, width, channels))
+        body.append(image.data)
+    return b''.join(header + body)
+
+
+def unpack_images(data):
+    """
+    Args:
+        data (bytes): Output of `pack_images()`
+
+    Returns:
+        list[np.ndarray]: Read-only views of data, pixels are not copied.
+    """
+    count, = FRAME_COUNT.unpack_from(data, 0)
+    offset = FRAME_COUNT.size
+    shapes = []
+    for _ in range(count):
+        shapes.append(FRAME_SHAPE.unpack_from(data, offset))
+        offset += FRAME_SHAPE.size
+    img_list = []
+    for height, width, channels in shapes:
+        shape = (height, width, channels) if channels else (height, width)
+        size = height * width * max(channels, 1)
+        if offset + size > len(data):
+            raise ValueError('Image frame truncated')
+        img_list.append(np.frombuffer(data, dtype=np.uint8, count=size, offset=offset).reshape(shape))
+        offset += size
+    return img_list
+
 
 class ModelProxy:
     client = None
@@ -46,9 +102,9 @@ class ModelProxy:
 
         """
         if self.online:
-            img_str = img_fp.dumps()
+            frame = pack_images([img_fp])
             try:
-                return self.client("ocr", self.lang, img_str)
+                return self.client("ocr", self.lang, frame)
             except:
                 self.online = False
         from module.ocr.models import OCR_MODEL
@@ -63,9 +119,9 @@ class ModelProxy:
 
         """
         if self.online:
-            img_str = img_fp.dumps()
+            frame = pack_images([img_fp])
             try:
-                return self.client("ocr_for_single_line", self.lang, img_str)
+                return self.client("ocr_for_single_line", self.lang, frame)
             except:
                 self.online = False
         from module.ocr.models import OCR_MODEL
@@ -80,9 +136,9 @@ class ModelProxy:
 
         """
         if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
+            frame = pack_images(img_list)
             try:
-                return self.client("ocr_for_single_lines", self.lang, img_str_list)
+                return self.client("ocr_for_single_lines", self.lang, frame)
             except:
                 self.online = False
         from module.ocr.models import OCR_MODEL
@@ -107,9 +163,9 @@ class ModelProxy:
 
         """
         if self.online:
-            img_str = img_fp.dumps()
+            frame = pack_images([img_fp])
             try:
-                return self.client("atomic_ocr", self.lang, img_str, cand_alphabet)
+                return self.client("atomic_ocr", self.lang, frame, cand_alphabet)
             except:
                 self.online = False
         from module.ocr.models import OCR_MODEL
@@ -125,9 +181,9 @@ class ModelProxy:
 
         """
         if self.online:
-            img_str = img_fp.dumps()
+            frame = pack_images([img_fp])
             try:
-                return self.client("atomic_ocr_for_single_line", self.lang, img_str, cand_alphabet)
+                return self.client("atomic_ocr_for_single_line", self.lang, frame, cand_alphabet)
             except:
                 self.online = False
         from module.ocr.models import OCR_MODEL
@@ -143,9 +199,9 @@ class ModelProxy:
 
         """
         if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
+            frame = pack_images(img_list)
             try:
-                return self.client("atomic_ocr_for_single_lines", self.lang, img_str_list, cand_alphabet)
+                return self.client("atomic_ocr_for_single_lines", self.lang, frame, cand_alphabet)
             except:
                 self.online = False
         from module.ocr.models import OCR_MODEL
@@ -160,9 +216,9 @@ class ModelProxy:
 
         """
         if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
+            frame = pack_images(img_list)
             try:
-                return self.client("debug", self.lang, img_str_list)
+                return self.client("debug", self.lang, frame)
             except:
                 self.online = False
         from module.ocr.models import OCR_MODEL
@@ -182,6 +238,175 @@ class ModelProxyFactory:
         ModelProxy.close()
 
 
+class OcrMetrics:
+    """
+    Queue depth, latency and batch size of OCR server.
+    """
+
+    def __init__(self, history=1000, interval=60):
+        """
+        Args:
+            history (int): Number of recent requests and batches to keep.
+            interval (int): Seconds between metric logs.
+        """
+        self.requests = 0
+        self.images = 0
+        self.batches = 0
+        self.queue_depth = 0
+        self.queue_depth_max = 0
+        self.latency = deque(maxlen=history)
+        self.batch_size = deque(maxlen=history)
+        self.interval = interval
+        self.last_log = time.time()
+
+    def enqueue(self, images):
+        self.requests += 1
+        self.images += images
+        self.queue_depth += images
+        self.queue_depth_max = max(self.queue_depth_max, self.queue_depth)
+
+    def batch(self, images, latency_list):
+        """
+        Args:
+            images (int): Number of images inferred in the batch.
+            latency_list (list[float]): Seconds from enqueue to result of each request in batch.
+        """
+        self.batches += 1
+        self.queue_depth -= images
+        self.batch_size.append(images)
+        self.latency.extend(latency_list)
+
+    def summary(self):
+        """
+        Returns:
+            dict:
+        """
+        latency = np.array(self.latency) * 1000 if self.latency else np.zeros(1)
+        p50, p90, p99 = np.percentile(latency, [50, 90, 99])
+        return {
+            'requests': self.requests,
+            'images': self.images,
+            'batches': self.batches,
+            'queue_depth': self.queue_depth,
+            'queue_depth_max': self.queue_depth_max,
+            'batch_size_avg': round(float(np.mean(self.batch_size)), 2) if self.batch_size else 0.,
+            'latency_p50_ms': round(float(p50), 2),
+            'latency_p90_ms': round(float(p90), 2),
+            'latency_p99_ms': round(float(p99), 2),
+        }
+
+    def log(self, force=False):
+        now = time.time()
+        if not force and now - self.last_log < self.interval:
+            return
+        self.last_log = now
+        logger.info(f'Ocr server metrics: {self.summary()}')
+
+
+class OcrBatcher:
+    """
+    Coalesce `atomic_ocr_for_single_lines` requests from many clients into micro-batches.
+
+    cnocr pads every image in a model call to the widest one, and padding changes predictions.
+    To keep results independent of other requests, only requests whose crops all have the same shape
+    are batched, and they are queued by (lang, alphabet, shape), so nothing in a batch is padded.
+    Requests that mix crop shapes are inferred alone, same as calling the model directly.
+
+    Each request waits in its queue for at most `window` seconds,
+    then all requests in the queue are inferred in one model call.
+    While the model is busy, new requests keep queueing, so batches grow as load grows.
+    Server runs in gevent, requests are greenlets and model calls are serialized.
+    """
+
+    def __init__(self, model, window=BATCH_WINDOW, max_images=BATCH_MAX_IMAGES):
+        """
+        Args:
+            model (OcrModel):
+            window (float): Seconds to wait for more requests.
+            max_images (int): Max images in one model call.
+        """
+        self.model = model
+        self.window = window
+        self.max_images = max_images
+        # Key: (lang, alphabet, image shape), value: list of (img_list, AsyncResult, enqueue time)
+        self.queues = {}
+        self.metrics = OcrMetrics()
+
+    def submit(self, lang, img_list, cand_alphabet=None):
+        """
+        Args:
+            lang (str):
+            img_list (list[np.ndarray]):
+            cand_alphabet (str):
+
+        Returns:
+            list[list[str]]: Same as `AlOcr.atomic_ocr_for_single_lines()`
+        """
+        import gevent
+        from gevent.event import AsyncResult
+
+        if not img_list:
+            return []
+        shapes = set(image.shape for image in img_list)
+        if len(shapes) > 1:
+            return self.infer(lang, img_list, cand_alphabet)
+
+        key = (lang, cand_alphabet, shapes.pop())
+        result = AsyncResult()
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self.queues[key] = []
+            gevent.spawn_later(self.window, self.flush, key)
+        queue.append((img_list, result, time.perf_counter()))
+        self.metrics.enqueue(len(img_list))
+        return result.get()
+
+    def infer(self, lang, img_list, cand_alphabet=None):
+        """
+        Run one request alone.
+        """
+        start = time.perf_counter()
+        self.metrics.enqueue(len(img_list))
+        try:
+            cnocr = self.model.__getattribute__(lang)
+            return cnocr.atomic_ocr_for_single_lines(img_list, cand_alphabet)
+        finally:
+            self.metrics.batch(len(img_list), [time.perf_counter() - start])
+            self.metrics.log()
+
+    def flush(self, key):
+        """
+        Run all queued requests of (lang, alphabet, shape).
+        """
+        lang, cand_alphabet, _ = key
+        requests = self.queues.pop(key, [])
+        while requests:
+            # Split by max_images, a single request is never split
+            batch, images = [], 0
+            while requests and (not batch or images + len(requests[0][0]) <= self.max_images):
+                batch.append(requests.pop(0))
+                images += len(batch[-1][0])
+
+            img_list = [image for request in batch for image in request[0]]
+            try:
+                cnocr = self.model.__getattribute__(lang)
+                result_list = cnocr.atomic_ocr_for_single_lines(img_list, cand_alphabet)
+            except Exception as e:
+                logger.exception(e)
+                self.metrics.batch(images, [])
+                for _, result, _ in batch:
+                    result.set_exception(e)
+                continue
+
+            now = time.perf_counter()
+            self.metrics.batch(images, [now - start for _, _, start in batch])
+            index = 0
+            for request, result, _ in batch:
+                result.set(result_list[index:index + len(request)])
+                index += len(request)
+        self.metrics.log()
+
+
 def start_ocr_server(port=22268):
     import zerorpc
     import zmq
@@ -189,21 +414,32 @@ def start_ocr_server(port=22268):
     from module.ocr.models import OcrModel
 
     class OCRServer(OcrModel):
+        """
+        Images are framed by `pack_images()`,
+        `atomic_ocr_for_single_lines` requests are batched across clients by `OcrBatcher`.
+        """
+
+        def __init__(self):
+            self.batcher = OcrBatcher(self)
+
         def hello(self):
             return "hello"
 
+        def stats(self):
+            return self.batcher.metrics.summary()
+
         def ocr(self, lang, img_fp):
-            img_fp = pickle.loads(img_fp)
+            img_fp = unpack_images(img_fp)[0]
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.ocr(img_fp)
 
         def ocr_for_single_line(self, lang, img_fp):
-            img_fp = pickle.loads(img_fp)
+            img_fp = unpack_images(img_fp)[0]
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.ocr_for_single_line(img_fp)
 
         def ocr_for_single_lines(self, lang, img_list):
-            img_list = [pickle.loads(img_fp) for img_fp in img_list]
+            img_list = unpack_images(img_list)
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.ocr_for_single_lines(img_list)
 
@@ -212,22 +448,21 @@ def start_ocr_server(port=22268):
             return cnocr.set_cand_alphabet(cand_alphabet)
 
         def atomic_ocr(self, lang, img_fp, cand_alphabet):
-            img_fp = pickle.loads(img_fp)
+            img_fp = unpack_images(img_fp)[0]
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.atomic_ocr(img_fp, cand_alphabet)
 
         def atomic_ocr_for_single_line(self, lang, img_fp, cand_alphabet):
-            img_fp = pickle.loads(img_fp)
+            img_fp = unpack_images(img_fp)[0]
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.atomic_ocr_for_single_line(img_fp, cand_alphabet)
 
         def atomic_ocr_for_single_lines(self, lang, img_list, cand_alphabet):
-            img_list = [pickle.loads(img_fp) for img_fp in img_list]
-            cnocr: AlOcr = self.__getattribute__(lang)
-            return cnocr.atomic_ocr_for_single_lines(img_list, cand_alphabet)
+            img_list = unpack_images(img_list)
+            return self.batcher.submit(lang, img_list, cand_alphabet)
 
         def debug(self, lang, img_list):
-            img_list = [pickle.loads(img_fp) for img_fp in img_list]
+            img_list = unpack_images(img_list)
             cnocr: AlOcr = self.__getattribute__(lang)
             return cnocr.debug(img_list)
 
@@ -76,7 +76,7 @@ class GlobeCamera(GlobeOperation, ZoneManager):
             continue
 
         self._globe_init()
-        self.globe.load(self.device.image)
+        self.globe.load(self.device.image, near=getattr(self, 'globe_camera', None))
         self.globe_camera = self.globe.center_loca
         center = self.camera_to_zone(self.globe.center_loca)
         logger.attr('Globe_center', center.zone_id)
@@ -1,11 +1,13 @@
 import time
 
+from module.base.asset_pack import source_signature
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.logger import logger
 from module.map_detection.homography import Homography
 from module.map_detection.perspective import Perspective
 from module.map_detection.utils import *
+from module.os.globe_index import GlobeIndex
 
 GLOBE_MAP = './assets/map_detection/os_globe_map.png'
 GLOBE_MAP_SHAPE = (2570, 1696)
@@ -24,6 +26,7 @@ class GlobeDetection:
         0.062s      similarity: 0.354
     """
     globe = None
+    index: GlobeIndex
     homo_center: tuple
     center_loca: tuple
 
@@ -47,13 +50,14 @@ class GlobeDetection:
         logger.info('Loading OS globe map')
 
         # Load GLOBE_MAP
-        image = load_image(GLOBE_MAP)
-        image = self.find_peaks(image, para=self.config.OS_GLOBE_FIND_PEAKS_PARAMETERS)
-        pad = self.config.OS_GLOBE_IMAGE_PAD
-        image = np.pad(image, ((pad, pad), (pad, pad)), mode='constant', constant_values=0)
-        image = image.astype(np.uint8)
-        image = cv2.resize(image, None, fx=self.config.OS_GLOBE_IMAGE_RESIZE, fy=self.config.OS_GLOBE_IMAGE_RESIZE)
-        self.globe = image
+        source, params = source_signature(GLOBE_MAP), self.globe_params()
+        index = GlobeIndex.load(source=source, params=params)
+        if index is None:
+            logger.info('Globe index not found, building in memory. '
+                        'Run `python -m dev_tools.globe_index` to skip this')
+            index = GlobeIndex.build(self.globe_image(), source=source, params=params)
+        self.index = index
+        self.globe = index.image
 
         # Load homography
         backup = self.config.temporary(
@@ -65,6 +69,30 @@ class GlobeDetection:
         self._globe_map_loaded = True
         return True
 
+    def globe_params(self):
+        """
+        Returns:
+            dict: Parameters of pre-processing globe map, an index built with other parameters is outdated.
+        """
+        return {
+            'pad': self.config.OS_GLOBE_IMAGE_PAD,
+            'resize': self.config.OS_GLOBE_IMAGE_RESIZE,
+            'find_peaks': self.config.OS_GLOBE_FIND_PEAKS_PARAMETERS,
+        }
+
+    def globe_image(self):
+        """
+        Returns:
+            np.ndarray: GLOBE_MAP in monochrome, padded and resized, map borders in white, others in black.
+        """
+        image = load_image(GLOBE_MAP)
+        image = self.find_peaks(image, para=self.config.OS_GLOBE_FIND_PEAKS_PARAMETERS)
+        pad = self.config.OS_GLOBE_IMAGE_PAD
+        image = np.pad(image, ((pad, pad), (pad, pad)), mode='constant', constant_values=0)
+        image = image.astype(np.uint8)
+        image = cv2.resize(image, None, fx=self.config.OS_GLOBE_IMAGE_RESIZE, fy=self.config.OS_GLOBE_IMAGE_RESIZE)
+        return image
+
     def screen2globe(self, points):
         return perspective_transform(points, data=self.homography.homo_data)
 
@@ -109,10 +137,12 @@ class GlobeDetection:
         image = cv2.warpPerspective(image, self.homography.homo_data, self.homography.homo_size)
         return image
 
-    def load(self, image):
+    def load(self, image, near=None):
         """
         Args:
             image (np.ndarray):
+            near (tuple): Last known camera on globe, to search around it.
+                None to search the entire globe.
         """
         self.load_globe_map()
         start_time = time.time()
@@ -121,9 +151,16 @@ class GlobeDetection:
         local = local.astype(np.uint8)
         local = cv2.resize(local, None, fx=self.config.OS_GLOBE_IMAGE_RESIZE, fy=self.config.OS_GLOBE_IMAGE_RESIZE)
 
-        result = cv2.matchTemplate(self.globe, local, cv2.TM_CCOEFF_NORMED)
-        _, similarity, _, loca = cv2.minMaxLoc(result)
-        loca = np.array(loca) / self.config.OS_GLOBE_IMAGE_RESIZE
+        resize = self.config.OS_GLOBE_IMAGE_RESIZE
+        similarity = 0.
+        if near is not None:
+            near = (np.array(near) - self.homo_center + self.config.OS_GLOBE_IMAGE_PAD) * resize
+            window = np.multiply(self.config.OS_GLOBE_SEARCH_WINDOW, resize)
+            similarity, loca = self.index.match(local, near=near, window=window)
+        if similarity < self.config.OS_GLOBE_SEARCH_THRESHOLD:
+            # Camera moved too far, or there's no last camera
+            similarity, loca = self.index.match(local)
+        loca = np.array(loca) / resize
         loca = tuple(self.homo_center + loca - self.config.OS_GLOBE_IMAGE_PAD)
         self.center_loca = loca
 
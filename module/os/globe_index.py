@@ -0,0 +1,190 @@
+import json
+import os
+import struct
+
+import cv2
+import numpy as np
+
+from module.base.asset_pack import PACK_FOLDER, PACK_HEADER, align, data_start
+from module.logger import logger
+
+GLOBE_INDEX_FILE = os.path.join(PACK_FOLDER, 'os_globe.index').replace('\\', '/')
+GLOBE_INDEX_MAGIC = b'ALASGLOB'
+GLOBE_INDEX_VERSION = 1
+# Downscale factors of pyramid levels, relative to the pre-processed globe map
+GLOBE_INDEX_FACTORS = (1, 4)
+
+
+class GlobeIndex:
+    """
+    Image pyramid of the pre-processed globe map.
+
+    It's built by `dev_tools/globe_index.py` and memory-mapped at runtime, so `find_peaks()`
+    on the 2570x1696 globe map is no longer done in every process.
+    Local views are matched coarse to fine, on the smallest level first, then refined on larger
+    levels in a small window around the coarse result.
+
+    Index layout:
+        header: magic, version, index length
+        index: JSON, {'source': [size, mtime_ns], 'params': {...}, 'levels': [[factor, offset, shape], ...]}
+        data: uint8 arrays, each aligned to 64 bytes, offsets are relative to the start of data
+    """
+
+    def __init__(self, levels, source=None, params=None):
+        """
+        Args:
+            levels (list[tuple[int, np.ndarray]]): (factor, image), from the largest to the smallest.
+            source (list[int]): Signature of globe map, see `source_signature()`.
+            params (dict): Parameters of pre-processing.
+        """
+        self.levels = levels
+        self.source = source
+        self.params = params
+
+    @classmethod
+    def build(cls, image, source=None, params=None, factors=GLOBE_INDEX_FACTORS):
+        """
+        Args:
+            image (np.ndarray): Pre-processed globe map, monochrome.
+            source (list[int]):
+            params (dict):
+            factors (tuple[int]):
+
+        Returns:
+            GlobeIndex:
+        """
+        levels = []
+        for factor in factors:
+            if factor == 1:
+                level = image
+            else:
+                # INTER_AREA keeps thin borders as faint lines instead of dropping them
+                level = cv2.resize(image, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+            levels.append((factor, np.ascontiguousarray(level, dtype=np.uint8)))
+        return cls(levels, source=source, params=params)
+
+    def save(self, file=GLOBE_INDEX_FILE):
+        chunks = []
+        length = 0
+        rows = []
+        for factor, image in self.levels:
+            rows.append([factor, length, list(image.shape)])
+            chunks.append(image.tobytes())
+            padding = align(image.nbytes) - image.nbytes
+            if padding:
+                chunks.append(b'\x00' * padding)
+            length += image.nbytes + padding
+
+        index = json.dumps({'source': self.source, 'params': self.params, 'levels': rows}).encode('utf-8')
+        header = PACK_HEADER.pack(GLOBE_INDEX_MAGIC, GLOBE_INDEX_VERSION, len(index))
+        padding = data_start(len(index)) - len(header) - len(index)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        with open(file, 'wb') as f:
+            f.write(header)
+            f.write(index)
+            f.write(b'\x00' * padding)
+            for chunk in chunks:
+                f.write(chunk)
+        logger.info(f'Globe index saved: {file}, {length / 1048576:.1f}MB')
+
+    @classmethod
+    def load(cls, source=None, params=None, file=GLOBE_INDEX_FILE):
+        """
+        Args:
+            source (list[int]): Expected signature of globe map.
+            params (dict): Expected parameters of pre-processing.
+            file (str):
+
+        Returns:
+            GlobeIndex: Levels are read-only arrays on memory map.
+                None if index not exists or it's built from another globe map or parameters.
+        """
+        if not os.path.exists(file):
+            return None
+        try:
+            mmap = np.memmap(file, dtype=np.uint8, mode='r')
+            magic, version, length = PACK_HEADER.unpack_from(mmap, 0)
+            if magic != GLOBE_INDEX_MAGIC or version != GLOBE_INDEX_VERSION:
+                logger.warning(f'Globe index {file} is outdated, please rebuild it')
+                return None
+            start = PACK_HEADER.size
+            index = json.loads(bytes(mmap[start:start + length]).decode('utf-8'))
+        except (ValueError, struct.error) as e:
+            logger.warning(f'Failed to load globe index {file}: {e}')
+            return None
+        # Params are compared after a JSON round trip, tuples become lists
+        if index['source'] != source or index['params'] != json.loads(json.dumps(params)):
+            logger.warning(f'Globe index {file} is outdated, please rebuild it')
+            return None
+
+        start = data_start(length)
+        levels = [
+            (factor, np.ndarray(shape=tuple(shape), dtype=np.uint8, buffer=mmap, offset=start + offset))
+            for factor, offset, shape in index['levels']
+        ]
+        return cls(levels, source=index['source'], params=index['params'])
+
+    @property
+    def image(self):
+        """
+        Returns:
+            np.ndarray: The largest level.
+        """
+        return self.levels[0][1]
+
+    @staticmethod
+    def search(globe, template, center=None, radius=None):
+        """
+        Args:
+            globe (np.ndarray):
+            template (np.ndarray):
+            center (np.ndarray): Expected top-left corner of template on globe, None to search the entire globe.
+            radius (np.ndarray): Search range (x, y) around `center`.
+
+        Returns:
+            tuple[float, np.ndarray]: similarity, top-left corner of template on globe.
+        """
+        height, width = template.shape
+        x0, y0, x1, y1 = 0, 0, globe.shape[1] - width, globe.shape[0] - height
+        if center is not None:
+            upper_left = np.round(np.subtract(center, radius)).astype(int)
+            bottom_right = np.round(np.add(center, radius)).astype(int)
+            x0, y0 = max(x0, upper_left[0]), max(y0, upper_left[1])
+            x1, y1 = min(x1, bottom_right[0]), min(y1, bottom_right[1])
+            if x0 > x1 or y0 > y1:
+                # Window out of globe
+                x0, y0, x1, y1 = 0, 0, globe.shape[1] - width, globe.shape[0] - height
+
+        result = cv2.matchTemplate(globe[y0:y1 + height, x0:x1 + width], template, cv2.TM_CCOEFF_NORMED)
+        _, similarity, _, loca = cv2.minMaxLoc(result)
+        return similarity, np.add(loca, (x0, y0))
+
+    def match(self, local, near=None, window=None):
+        """
+        Args:
+            local (np.ndarray): Local view, pre-processed the same as globe map.
+            near (np.ndarray): Expected top-left corner of local view on the largest level,
+                None to search the entire globe.
+            window (tuple): Search range (x, y) around `near` on the largest level.
+
+        Returns:
+            tuple[float, np.ndarray]: similarity, top-left corner of local view on the largest level.
+        """
+        similarity, loca, prev = 0., None, None
+        for factor, globe in reversed(self.levels):
+            if factor == 1:
+                template = local
+            else:
+                template = cv2.resize(local, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+            if loca is not None:
+                # Refine around the result of the smaller level, which is accurate to 1px on that level
+                similarity, loca = self.search(globe, template, center=loca / factor, radius=np.full(2, prev / factor))
+            elif near is not None:
+                similarity, loca = self.search(globe, template, center=np.divide(near, factor),
+                                               radius=np.divide(window, factor))
+            else:
+                similarity, loca = self.search(globe, template)
+            loca = loca * factor
+            prev = factor * 2
+
+        return similarity, loca
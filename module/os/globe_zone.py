@@ -1,4 +1,5 @@
 import numpy as np
+from scipy.spatial import cKDTree
 
 from module.base.decorator import cached_property
 from module.exception import ScriptError
@@ -58,6 +59,77 @@ class Zone:
         return self.zone_id == other.zone_id
 
 
+def parse_name(n):
+    """
+    Normalize zone names for comparison.
+    """
+    n = str(n).replace(' ', '').lower()
+    return n
+
+
+class ZoneIndex:
+    """
+    Lookup tables of zones, built once.
+
+    `ZoneManager` used to sort all zones by distance, scan names in 4 languages and select zones
+    by attributes on every call, now they are KD-tree queries and dict lookups.
+    """
+
+    def __init__(self, zones):
+        """
+        Args:
+            zones (SelectedGrids): All zones.
+        """
+        self.zones = zones
+        self.zone_id = {}
+        self.name = {}
+        for zone in zones:
+            self.zone_id[zone.zone_id] = zone
+            for name in [zone.cn, zone.en, zone.jp, zone.tw]:
+                # Same as scanning zones in order, the first zone having the name wins
+                self.name.setdefault(parse_name(name), zone)
+
+        # Key: region, None for all zones. Value: (KDTree of zone locations, list of zones)
+        self.tree = {}
+        regions = [None] + sorted(set(zone.region for zone in zones))
+        for region in regions:
+            selected = [zone for zone in zones if region is None or zone.region == region]
+            # Manhattan distance, same as `SelectedGrids.sort_by_camera_distance()`
+            self.tree[region] = (cKDTree(np.array([zone.location for zone in selected])), selected)
+
+        ports = [zone for zone in zones if zone.is_azur_port]
+        # Key: zone_id. Value: list of azur ports, ports in the same region first, then the others by distance
+        self.port_order = {}
+        for zone in zones:
+            same = [port for port in ports if port.region == zone.region]
+            other = [port for port in ports if port.region != zone.region]
+            other = sorted(other, key=lambda port: np.sum(np.abs(port.location - zone.location)))
+            self.port_order[zone.zone_id] = same + other
+
+        center = [zone for zone in zones if zone.region == 5]
+        # Key: hazard_level. Value: list of zones, 10 for center zones
+        self.hazard_level = {10: center}
+        for zone in zones:
+            if zone.region != 5:
+                self.hazard_level.setdefault(zone.hazard_level, []).append(zone)
+
+    def nearest(self, camera, region=None):
+        """
+        Args:
+            camera (tuple): Point in os_globe_map.png
+            region (int): Limit zone in specific region.
+
+        Returns:
+            Zone: None if no zones in region.
+        """
+        try:
+            tree, zones = self.tree[region]
+        except KeyError:
+            return None
+        _, index = tree.query(camera, p=1)
+        return zones[index]
+
+
 class ZoneManager:
     zone: Zone
 
@@ -69,6 +141,14 @@ class ZoneManager:
         """
         return SelectedGrids([Zone(zone_id, info) for zone_id, info in DIC_OS_MAP.items()])
 
+    @cached_property
+    def zone_index(self):
+        """
+        Returns:
+            ZoneIndex:
+        """
+        return ZoneIndex(self.zones)
+
     def camera_to_zone(self, camera, region=None):
         """
         Args:
@@ -78,12 +158,10 @@ class ZoneManager:
         Returns:
             Zone:
         """
-        if region is None:
-            zones = self.zones
-        else:
-            zones = self.zones.select(region=region)
-        zones = zones.sort_by_camera_distance(camera=camera)
-        return zones[0]
+        zone = self.zone_index.nearest(camera, region=region)
+        if zone is None:
+            raise IndexError(f'No zones in region {region}')
+        return zone
 
     def name_to_zone(self, name):
         """
@@ -102,29 +180,20 @@ class ZoneManager:
             return name
         elif isinstance(name, int):
             try:
-                return self.zones.select(zone_id=name)[0]
-            except IndexError:
+                return self.zone_index.zone_id[name]
+            except KeyError:
                 raise ScriptError(f'Unable to find OS globe zone: {name}')
         elif isinstance(name, str) and name.isdigit():
             try:
-                return self.zones.select(zone_id=int(name))[0]
-            except IndexError:
+                return self.zone_index.zone_id[int(name)]
+            except KeyError:
                 raise ScriptError(f'Unable to find OS globe zone: {name}')
         else:
-            def parse_name(n):
-                n = str(n).replace(' ', '').lower()
-                return n
-
             name = parse_name(name)
-            for zone in self.zones:
-                if name == parse_name(zone.cn):
-                    return zone
-                if name == parse_name(zone.en):
-                    return zone
-                if name == parse_name(zone.jp):
-                    return zone
-                if name == parse_name(zone.tw):
-                    return zone
+            try:
+                return self.zone_index.name[name]
+            except KeyError:
+                pass
             # Normal arbiter, Hard arbiter, BOSS after hard arbiter cleared
             # 普通难度：仲裁者·XXX, 困难难度：仲裁者·XXX, 困难模拟战：仲裁机关
             for keyword in ['普通', '困难', '仲裁']:
@@ -154,14 +223,11 @@ class ZoneManager:
             Zone:
         """
         zone = self.name_to_zone(zone)
-        ports = self.zones.select(is_azur_port=True).delete(SelectedGrids([self.zone]))
-        # In same region
-        for port in ports:
-            if zone.region == port.region:
+        for port in self.zone_index.port_order[zone.zone_id]:
+            # Not the current zone
+            if port != self.zone:
                 return port
-        # In different region
-        ports = ports.sort_by_camera_distance(camera=tuple(zone.location))
-        return ports[0]
+        raise IndexError(f'No azur port other than current zone {self.zone}')
 
     def zone_select(self, hazard_level):
         """
@@ -173,9 +239,7 @@ class ZoneManager:
         Returns:
             SelectedGrids: SelectedGrids containing zone objects.
         """
-        if 1 <= hazard_level <= 6:
-            return self.zones.select(hazard_level=hazard_level).delete(self.zones.select(region=5))
-        elif hazard_level == 10:
-            return self.zones.select(region=5)
+        if 1 <= hazard_level <= 6 or hazard_level == 10:
+            return SelectedGrids(list(self.zone_index.hazard_level.get(hazard_level, [])))
         else:
             raise ScriptError(f'Invalid hazard_level of zones: {hazard_level}')
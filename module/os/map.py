@@ -704,7 +704,7 @@ class OSMap(OSFleet, Map, GlobeCamera, StorageHandler, StrategicSearchHandler):
         else:
             month_key = f"{year:04d}-{month:02d}"
         
-        data = cl1_db.get_stats(instance_name, month_key)
+        data = cl1_db.get_counters(instance_name, month_key)
         return int(data.get('battle_count', 0))
     
     def os_auto_search_daemon(self, drop=None, strategic=False, interrupt=None, skip_first_screenshot=True):
@@ -2,13 +2,13 @@ from module.base.mask import Mask
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.logger import logger
-from module.map.map_grids import SelectedGrids
+from module.map.map_grids import ColumnTracked, GridColumns, SelectedGrids
 from module.map_detection.utils import fit_points
 
 MASK_RADAR = Mask('./assets/mask/MASK_OS_RADAR.png')
 
 
-class RadarGrid:
+class RadarGrid(ColumnTracked):
     is_enemy = False  # Red gun
     is_resource = False  # green box to get items
     is_exclamation = False  # Yellow exclamation mark '!'
@@ -173,6 +173,7 @@ class Radar:
                     continue
                 grid_center = np.round(delta * (x, y) + center).astype(int)
                 self.grids[(x, y)] = RadarGrid(location=(x, y), image=None, center=grid_center, config=self.config)
+        self.columns = GridColumns(list(self.grids.values()))
 
     def __iter__(self):
         return iter(self.grids.values())
@@ -221,16 +222,7 @@ class Radar:
         Returns:
             SelectedGrids:
         """
-        result = []
-        for grid in self:
-            flag = True
-            for k, v in kwargs.items():
-                if grid.__getattribute__(k) != v:
-                    flag = False
-            if flag:
-                result.append(grid)
-
-        return SelectedGrids(result)
+        return SelectedGrids(self.columns.select(False, **kwargs))
 
     def predict_port_outside(self, image):
         """
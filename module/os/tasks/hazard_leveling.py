@@ -217,7 +217,7 @@ class OpsiHazard1Leveling(CoinTaskMixin, OSMap):
                 instance_name = getattr(self.config, 'config_name', 'default')
                 cl1_db.increment_akashi_encounter(instance_name)
                 month_key = datetime.now().strftime('%Y-%m')
-                data = cl1_db.get_stats(instance_name, month_key)
+                data = cl1_db.get_counters(instance_name, month_key)
                 logger.attr('cl1_akashi_monthly', data.get('akashi_encounters', 0))
             except Exception:
                 logger.exception('Failed to persist CL1 akashi monthly count')
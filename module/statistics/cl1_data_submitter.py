@@ -70,7 +70,7 @@ class Cl1DataSubmitter:
         month_key = f"{year:04d}-{month:02d}"
         
         # 从数据库读取加密存储的统计数据
-        data = cl1_db.get_stats(self._instance_name, month_key)
+        data = cl1_db.get_counters(self._instance_name, month_key)
         
         return {
             'month': month_key,
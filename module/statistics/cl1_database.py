@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
+import atexit
 import sqlite3
 import json
-import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from Crypto.Cipher import AES
 from Crypto.Protocol.KDF import PBKDF2
 from Crypto.Hash import SHA256
@@ -12,10 +14,30 @@ from Crypto.Hash import SHA256
 from module.base.device_id import get_device_id
 from module.logger import logger
 
+# 计数器字段，以列的形式存储
+COUNTERS = ('battle_count', 'akashi_encounters', 'akashi_ap')
+# 追加写入的条目类型，值为 get_stats() 中对应的列表名
+ENTRY_KINDS = {
+    'akashi_ap': 'akashi_ap_entries',
+    'ap_snapshot': 'ap_snapshots',
+}
+# 写缓冲的最长保留时间（秒）
+FLUSH_INTERVAL = 10
+
+
 class Cl1Database:
     """
     CL1 数据加密 SQLite 数据库管理类。
     所有实例共享一个数据库文件，但数据经过 AES-GCM 加密，并由 device_id 保护。
+
+    存储结构:
+    - cl1_counters: 每个实例、月份一行，计数器以列存储，
+      sealed 列为计数器的加密副本，读取时校验以防篡改。
+    - cl1_entries: 明石行动力购买条目与行动力快照，每条一行，逐行加密，只追加不改写。
+
+    单个持久连接（WAL 模式），写入先进入内存缓冲，
+    在 FLUSH_INTERVAL 秒后、任务结束时、读取完整数据时或进程退出时批量写入。
+    这样每场战斗的开销是常数，不再随当月记录的增长而增长。
     """
     def __init__(self, db_path: Optional[Path] = None):
         if db_path is None:
@@ -26,10 +48,21 @@ class Cl1Database:
             self.db_path = db_path
             self.db_dir = self.db_path.parent
 
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # 写缓冲
+        # Key: (instance, month). Value: {counter: delta}
+        self._pending_counters: Dict[Tuple[str, str], Dict[str, int]] = {}
+        # (instance, month, kind, entry)
+        self._pending_entries: List[Tuple[str, str, str, Dict[str, Any]]] = []
+        self._flush_timer: Optional[threading.Timer] = None
+
         self._ensure_dir()
-        self._init_db()
+        self._move_legacy_db()
         self._encryption_key = self._derive_key()
+        self._init_db()
         self._auto_migrate()
+        atexit.register(self.flush)
 
     def _ensure_dir(self):
         try:
@@ -37,24 +70,97 @@ class Cl1Database:
         except Exception as e:
             logger.error(f"Failed to create database directory: {e}")
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """持久连接，由 self._lock 保护，可在缓冲写入定时器线程中使用"""
+        if self._conn is None:
+            # isolation_level=None 以手动控制事务
+            conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False, isolation_level=None)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+            except sqlite3.DatabaseError as e:
+                logger.warning(f"Failed to enable WAL mode for CL1 database: {e}")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @contextmanager
+    def _transaction(self):
+        """写事务，立即获取写锁，避免多个 Alas 实例同时读改写计数器"""
+        with self._lock:
+            conn = self.conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            else:
+                conn.execute('COMMIT')
+
     def _init_db(self):
-        """初始化数据库表"""
+        """初始化数据库表，并迁移旧版整月加密数据"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                # 存储各实例、月份的加密数据
-                # encrypted_blob 包含 nonce + tag + ciphertext
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS cl1_data (
+            with self._transaction() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cl1_counters (
                         instance TEXT,
                         month TEXT,
-                        encrypted_blob BLOB,
+                        battle_count INTEGER NOT NULL DEFAULT 0,
+                        akashi_encounters INTEGER NOT NULL DEFAULT 0,
+                        akashi_ap INTEGER NOT NULL DEFAULT 0,
+                        sealed BLOB,
                         PRIMARY KEY (instance, month)
                     )
                 ''')
-                conn.commit()
+                # encrypted_blob 包含 nonce + tag + ciphertext
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cl1_entries (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        instance TEXT,
+                        month TEXT,
+                        kind TEXT,
+                        encrypted_blob BLOB
+                    )
+                ''')
+                conn.execute('''
+                    CREATE INDEX IF NOT EXISTS cl1_entries_month ON cl1_entries (instance, month, kind)
+                ''')
         except Exception as e:
             logger.exception(f"Failed to initialize CL1 database: {e}")
+            return
+        self._migrate_monthly_blob()
+
+    def _migrate_monthly_blob(self):
+        """
+        迁移旧版 cl1_data 表（每个实例、月份一个加密的完整 JSON），
+        迁移成功的行会被删除，无法解密的行保留在原表中。
+        """
+        try:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'cl1_data'").fetchone()
+                if not row:
+                    return
+                rows = self.conn.execute("SELECT instance, month, encrypted_blob FROM cl1_data").fetchall()
+                for instance, month, blob in rows:
+                    data = self._decrypt(blob)
+                    if data is None:
+                        logger.warning(f"Failed to migrate CL1 data of {instance} {month}, kept in cl1_data")
+                        continue
+                    with self._transaction() as conn:
+                        self._write_month(conn, instance, month, data)
+                        conn.execute("DELETE FROM cl1_data WHERE instance = ? AND month = ?", (instance, month))
+                    logger.info(f"Migrated CL1 data of {instance} {month} to row storage")
+        except Exception as e:
+            logger.exception(f"Failed to migrate CL1 monthly data: {e}")
 
     def _derive_key(self) -> bytes:
         """基于 device_id 派生 256 位 AES 密钥"""
@@ -91,21 +197,140 @@ class Cl1Database:
             logger.error(f"Unexpected decryption error: {e}")
             return None
 
+    def _seal(self, instance: str, month: str, counters: Dict[str, int]) -> bytes:
+        """计数器的加密副本，绑定实例与月份，防止篡改或整行替换"""
+        data = {'instance': instance, 'month': month}
+        data.update(counters)
+        return self._encrypt(data)
+
+    def _read_counters(self, conn: sqlite3.Connection, instance: str, month: str) -> Dict[str, int]:
+        """读取数据库中的计数器，不包含写缓冲。校验失败视为无数据"""
+        row = conn.execute(
+            "SELECT battle_count, akashi_encounters, akashi_ap, sealed FROM cl1_counters "
+            "WHERE instance = ? AND month = ?", (instance, month)).fetchone()
+        empty = dict.fromkeys(COUNTERS, 0)
+        if not row:
+            return empty
+        counters = dict(zip(COUNTERS, row[:3]))
+        sealed = self._decrypt(row[3])
+        if sealed is None:
+            return empty
+        expected = {'instance': instance, 'month': month}
+        expected.update(counters)
+        if sealed != expected:
+            logger.error(f"CL1 counters of {instance} {month} mismatch with sealed data, tamper detected")
+            return empty
+        return counters
+
+    def _write_counters(self, conn: sqlite3.Connection, instance: str, month: str, counters: Dict[str, int]):
+        conn.execute('''
+            INSERT INTO cl1_counters (instance, month, battle_count, akashi_encounters, akashi_ap, sealed)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(instance, month) DO UPDATE SET
+                battle_count = excluded.battle_count,
+                akashi_encounters = excluded.akashi_encounters,
+                akashi_ap = excluded.akashi_ap,
+                sealed = excluded.sealed
+        ''', (instance, month, *[counters[k] for k in COUNTERS], self._seal(instance, month, counters)))
+
+    def _insert_entries(self, conn: sqlite3.Connection, rows: List[Tuple[str, str, str, Dict[str, Any]]]):
+        conn.executemany(
+            "INSERT INTO cl1_entries (instance, month, kind, encrypted_blob) VALUES (?, ?, ?, ?)",
+            [(instance, month, kind, self._encrypt(entry)) for instance, month, kind, entry in rows])
+
+    def _write_month(self, conn: sqlite3.Connection, instance: str, month: str, data: Dict[str, Any]):
+        """用完整数据覆盖一个月的计数器与条目"""
+        counters = {k: int(data.get(k, 0)) for k in COUNTERS}
+        self._write_counters(conn, instance, month, counters)
+        conn.execute("DELETE FROM cl1_entries WHERE instance = ? AND month = ?", (instance, month))
+        rows = []
+        for kind, key in ENTRY_KINDS.items():
+            for entry in data.get(key, []):
+                rows.append((instance, month, kind, entry))
+        self._insert_entries(conn, rows)
+
+    def flush(self):
+        """将写缓冲写入数据库，一个事务完成"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            counters, entries = self._pending_counters, self._pending_entries
+            if not counters and not entries:
+                return
+            self._pending_counters, self._pending_entries = {}, []
+            try:
+                with self._transaction() as conn:
+                    for (instance, month), delta in counters.items():
+                        current = self._read_counters(conn, instance, month)
+                        for key, value in delta.items():
+                            current[key] += value
+                        self._write_counters(conn, instance, month, current)
+                    self._insert_entries(conn, entries)
+            except Exception as e:
+                logger.error(f"Failed to flush CL1 data, will retry later: {e}")
+                # 放回缓冲，保持原有顺序
+                for key, delta in counters.items():
+                    self._add_counters(key, delta, schedule=False)
+                self._pending_entries[:0] = entries
+                self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_timer is None:
+            timer = threading.Timer(FLUSH_INTERVAL, self.flush)
+            timer.daemon = True
+            timer.start()
+            self._flush_timer = timer
+
+    def _add_counters(self, key: Tuple[str, str], delta: Dict[str, int], schedule=True):
+        with self._lock:
+            pending = self._pending_counters.setdefault(key, {})
+            for name, value in delta.items():
+                pending[name] = pending.get(name, 0) + value
+            if schedule:
+                self._schedule_flush()
+
+    def _add_entry(self, instance: str, month: str, kind: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._pending_entries.append((instance, month, kind, entry))
+            self._schedule_flush()
+
+    def get_counters(self, instance: str, month: str) -> Dict[str, int]:
+        """
+        获取指定实例和月份的计数器，包含尚未写入的缓冲，不读取条目。
+
+        Returns:
+            dict: battle_count, akashi_encounters, akashi_ap
+        """
+        with self._lock:
+            try:
+                counters = self._read_counters(self.conn, instance, month)
+            except Exception as e:
+                logger.error(f"Failed to query counters for {instance} {month}: {e}")
+                counters = dict.fromkeys(COUNTERS, 0)
+            for key, value in self._pending_counters.get((instance, month), {}).items():
+                counters[key] += value
+            return counters
+
     def get_stats(self, instance: str, month: str) -> Dict[str, Any]:
         """获取指定实例和月份的统计数据"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT encrypted_blob FROM cl1_data WHERE instance = ? AND month = ?", 
-                             (instance, month))
-                row = cursor.fetchone()
-                if row:
-                    data = self._decrypt(row[0])
-                    if data:
-                        return data
-        except Exception as e:
-            logger.error(f"Failed to query stats for {instance} {month}: {e}")
-        
+        with self._lock:
+            self.flush()
+            try:
+                data = self._empty_data(month)
+                data.update(self._read_counters(self.conn, instance, month))
+                rows = self.conn.execute(
+                    "SELECT kind, encrypted_blob FROM cl1_entries WHERE instance = ? AND month = ? ORDER BY id",
+                    (instance, month)).fetchall()
+                for kind, blob in rows:
+                    entry = self._decrypt(blob)
+                    if entry is None or kind not in ENTRY_KINDS:
+                        continue
+                    data.setdefault(ENTRY_KINDS[kind], []).append(entry)
+                return data
+            except Exception as e:
+                logger.error(f"Failed to query stats for {instance} {month}: {e}")
+
         return self._empty_data(month)
 
     def _empty_data(self, month: str) -> Dict[str, Any]:
@@ -117,55 +342,41 @@ class Cl1Database:
         }
 
     def save_stats(self, instance: str, month: str, data: Dict[str, Any]):
-        """保存统计数据"""
+        """保存统计数据，覆盖该月已有的计数器与条目"""
         try:
-            blob = self._encrypt(data)
-            if not blob:
-                return
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO cl1_data (instance, month, encrypted_blob) 
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(instance, month) DO UPDATE SET encrypted_blob = excluded.encrypted_blob
-                ''', (instance, month, blob))
-                conn.commit()
+            with self._lock:
+                self.flush()
+                with self._transaction() as conn:
+                    self._write_month(conn, instance, month, data)
         except Exception as e:
             logger.error(f"Failed to save stats for {instance} {month}: {e}")
 
     def increment_battle_count(self, instance: str, delta: int = 1):
         """增加战斗次数"""
         month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-        data['battle_count'] = data.get('battle_count', 0) + delta
-        self.save_stats(instance, month, data)
+        self._add_counters((instance, month), {'battle_count': delta})
 
     def increment_akashi_encounter(self, instance: str):
         """增加明石奇遇次数"""
         month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-        data['akashi_encounters'] = data.get('akashi_encounters', 0) + 1
-        self.save_stats(instance, month, data)
+        self._add_counters((instance, month), {'akashi_encounters': 1})
 
     def add_akashi_ap_entry(self, instance: str, amount: int, base: int, count: int, source: str):
         """记录明石行动力购买条目"""
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
-        
+        now = datetime.now()
+        month = now.strftime('%Y-%m')
+
         entry = {
-            'ts': datetime.now().isoformat(),
+            'ts': now.isoformat(),
             'amount': amount,
             'base': base,
             'count': count,
             'source': source
         }
-        
-        entries = data.get('akashi_ap_entries', [])
-        entries.append(entry)
-        data['akashi_ap_entries'] = entries
-        
-        data['akashi_ap'] = data.get('akashi_ap', 0) + amount
-        self.save_stats(instance, month, data)
+
+        with self._lock:
+            self._add_entry(instance, month, 'akashi_ap', entry)
+            self._add_counters((instance, month), {'akashi_ap': amount})
 
     def add_ap_snapshot(self, instance: str, ap_current: int, source: str = 'cl1'):
         """记录行动力快照（真实剩余体力）
@@ -175,30 +386,26 @@ class Cl1Database:
             ap_current: 当前行动力剩余
             source: 数据来源标记 (cl1 / meow 等)
         """
-        month = datetime.now().strftime('%Y-%m')
-        data = self.get_stats(instance, month)
+        now = datetime.now()
+        month = now.strftime('%Y-%m')
 
         snapshot = {
-            'ts': datetime.now().isoformat(),
+            'ts': now.isoformat(),
             'ap': int(ap_current),
             'source': source,
         }
-
-        snapshots = data.get('ap_snapshots', [])
-        snapshots.append(snapshot)
-        data['ap_snapshots'] = snapshots
-        self.save_stats(instance, month, data)
+        self._add_entry(instance, month, 'ap_snapshot', snapshot)
 
     def migrate_from_json(self, json_path: Path, instance: str):
         """从 JSON 文件迁移数据到数据库"""
         if not json_path.exists():
             return
-        
+
         logger.info(f"Migrating CL1 data from {json_path} for instance {instance}")
         try:
             with json_path.open('r', encoding='utf-8') as f:
                 old_data = json.load(f)
-            
+
             if not isinstance(old_data, dict):
                 return
 
@@ -208,22 +415,22 @@ class Cl1Database:
             for key in old_data.keys():
                 if len(key) >= 7 and key[4] == '-':
                     months.add(key[:7])
-            
+
             for month in months:
                 # 首先检查数据库是否已有数据，避免覆盖
-                with sqlite3.connect(self.db_path) as conn:
-                    c = conn.cursor()
-                    c.execute("SELECT 1 FROM cl1_data WHERE instance = ? AND month = ?", (instance, month))
-                    if c.fetchone():
-                        logger.info(f"Data for {instance} {month} already exists in DB, skipping migration")
-                        continue
+                with self._lock:
+                    row = self.conn.execute(
+                        "SELECT 1 FROM cl1_counters WHERE instance = ? AND month = ?", (instance, month)).fetchone()
+                if row:
+                    logger.info(f"Data for {instance} {month} already exists in DB, skipping migration")
+                    continue
 
                 new_stats = self._empty_data(month)
                 new_stats['battle_count'] = old_data.get(month, 0)
                 new_stats['akashi_encounters'] = old_data.get(f"{month}-akashi", 0)
                 new_stats['akashi_ap'] = old_data.get(f"{month}-akashi-ap", 0)
                 new_stats['akashi_ap_entries'] = old_data.get(f"{month}-akashi-ap-entries", [])
-                
+
                 self.save_stats(instance, month, new_stats)
                 logger.info(f"Successfully migrated {instance} {month}")
 
@@ -235,13 +442,10 @@ class Cl1Database:
         except Exception as e:
             logger.exception(f"Failed to migrate CL1 data from JSON: {e}")
 
-    def _auto_migrate(self):
-        """
-        初始化时自动扫描 log/cl1 下的所有实例并迁移旧数据
-        """
+    def _move_legacy_db(self):
+        """旧版数据库位于 log/cl1 下，需在打开连接之前移动"""
         project_root = Path(__file__).resolve().parents[2]
-        old_db_dir = project_root / 'log' / 'cl1'
-        old_db_path = old_db_dir / 'cl1_data.db'
+        old_db_path = project_root / 'log' / 'cl1' / 'cl1_data.db'
 
         if old_db_path.exists() and not self.db_path.exists():
             import shutil
@@ -251,9 +455,16 @@ class Cl1Database:
             except Exception as e:
                 logger.error(f"Failed to move old CL1 database: {e}")
 
+    def _auto_migrate(self):
+        """
+        初始化时自动扫描 log/cl1 下的所有实例并迁移旧数据
+        """
+        project_root = Path(__file__).resolve().parents[2]
+        old_db_dir = project_root / 'log' / 'cl1'
+
         if not old_db_dir.exists():
             return
-            
+
         # logger.info(f"Scanning for legacy CL1 data in {old_db_dir}...")
         try:
             for instance_dir in old_db_dir.iterdir():
@@ -23,7 +23,7 @@ class OpsiMonthStats:
         key = f"{year:04d}-{month:02d}"
 
         # 从数据库读取数据
-        data = cl1_db.get_stats(self._instance_name, key)
+        data = cl1_db.get_counters(self._instance_name, key)
         
         total = int(data.get('battle_count', 0))
         akashi = int(data.get('akashi_encounters', 0))
@@ -42,7 +42,7 @@ class OpsiMonthStats:
         key = f"{year:04d}-{month:02d}"
 
         # 从数据库读取数据
-        data = cl1_db.get_stats(self._instance_name, key)
+        data = cl1_db.get_counters(self._instance_name, key)
         
         # 基础数据
         battle_count = int(data.get('battle_count', 0))
@@ -91,7 +91,7 @@ def compute_monthly_cl1_akashi_ap(year: int | None = None, month: int | None = N
     key_prefix = f"{year:04d}-{month:02d}"
 
     instance_name = instance_name or "default"
-    data = cl1_db.get_stats(instance_name, key_prefix)
+    data = cl1_db.get_counters(instance_name, key_prefix)
     
     return int(data.get('akashi_ap', 0))
 
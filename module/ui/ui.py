@@ -44,6 +44,31 @@ class UI(InfoHandler):
                 return True
         return self.appear(page.check_button, offset=offset, interval=interval)
 
+    def ui_page_appear_batch(self, offset=(30, 30)):
+        """
+        Evaluate check buttons of all pages on current screenshot in one pass,
+        following `ui_page_appear()` calls on the same screenshot reuse the results.
+
+        Args:
+            offset:
+
+        Returns:
+            dict[Button, bool]:
+        """
+        buttons = {}
+        for page in Page.iter_pages():
+            if page.check_button is None:
+                continue
+            # Same as ui_page_appear()
+            if page == page_main:
+                buttons[page_main_white.check_button] = offset
+                buttons[page_main.check_button] = (5, 5)
+                continue
+            if self.config.SERVER == 'en' and page == page_academy:
+                buttons[ACADEMY_GOTO_MUNITIONS] = offset
+            buttons[page.check_button] = offset
+        return self.appear_batch(buttons)
+
     def is_in_main(self, offset=(30, 30), interval=0):
         return self.ui_page_appear(page_main, offset=offset, interval=interval)
 
@@ -185,6 +210,7 @@ class UI(InfoHandler):
                 break
 
             # Known pages
+            self.ui_page_appear_batch()
             for page in Page.iter_pages():
                 if page.check_button is None:
                     continue
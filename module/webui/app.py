@@ -73,6 +73,7 @@ from module.webui.fastapi import asgi_app
 from module.webui.lang import _t, t
 from module.webui.patch import fix_py37_subprocess_communicate, patch_executor, patch_mimetype
 from module.webui.pin import put_input, put_select
+from module.webui.preview import preview_html, preview_routes
 from module.webui.process_manager import ProcessManager
 from module.webui.remote_access import RemoteAccess
 from module.webui.setting import State
@@ -1061,8 +1062,11 @@ class AlasGUI(Frame):
                             "log-bar-btns",
                             [
                                 put_scope("log_scroll_btn"),
+                                put_scope("preview_btn"),
                             ],
                         ),
+                        put_html('<hr class="hr-group">'),
+                        put_scope("preview"),
                     ],
                 ),
             else:
@@ -1076,10 +1080,12 @@ class AlasGUI(Frame):
                             "log-bar-btns",
                             [
                                 put_scope("log_scroll_btn"),
+                                put_scope("preview_btn"),
                                 put_scope("dashboard_btn"),
                             ],
                         ),
                         put_html('<hr class="hr-group">'),
+                        put_scope("preview"),
                         put_scope("dashboard"),
                     ],
                 ),
@@ -1112,8 +1118,20 @@ class AlasGUI(Frame):
             color_off="on",
             scope="dashboard_btn",
         )
+        self._preview = False
+        switch_preview = BinarySwitchButton(
+            label_on=t("Gui.Button.PreviewON"),
+            label_off=t("Gui.Button.PreviewOFF"),
+            onclick_on=lambda: self.set_preview_display(False),
+            onclick_off=lambda: self.set_preview_display(True),
+            get_state=lambda: self._preview,
+            color_on="off",
+            color_off="on",
+            scope="preview_btn",
+        )
         self.task_handler.add(switch_scheduler.g(), 1, True)
         self.task_handler.add(switch_log_scroll.g(), 1, True)
+        self.task_handler.add(switch_preview.g(), 1, True)
         if 'Maa' not in self.ALAS_ARGS:
             self.task_handler.add(switch_dashboard.g(), 1, True)
         self.task_handler.add(self.alas_update_overview_task, 10, True)
@@ -1126,6 +1144,15 @@ class AlasGUI(Frame):
         self._log.set_dashboard_display(b)
         self.alas_update_dashboard(True)
 
+    def set_preview_display(self, b):
+        """
+        Show live screen preview, the instance encodes frames only when someone is watching.
+        """
+        self._preview = b
+        with use_scope("preview", clear=True):
+            if b:
+                put_html(preview_html(self.alas_name))
+
     def set_dashboard_display(self, b):
         self._log.set_dashboard_display(b)
         self.alas_update_dashboard(True)
@@ -2432,6 +2459,7 @@ def app():
         cdn=cdn,
         static_dir=static_path,
         debug=True,
+        extra_routes=preview_routes(),
         on_startup=[
             startup,
             lambda: ProcessManager.restart_processes(
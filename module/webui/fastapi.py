@@ -31,6 +31,7 @@ def asgi_app(
     debug=False,
     allowed_origins=None,
     check_origin=None,
+    extra_routes=None,
     **starlette_settings
 ):
     debug = Session.debug = os.environ.get("PYWEBIO_DEBUG", debug)
@@ -43,6 +44,9 @@ def asgi_app(
         allowed_origins=allowed_origins,
         check_origin=check_origin,
     )
+    if extra_routes:
+        # Before pywebio routes, which may match any path
+        routes = list(extra_routes) + routes
     if static_dir:
         routes.append(
             Mount("/static", app=StaticFiles(directory=static_dir), name="static")
@@ -0,0 +1,271 @@
+import html
+import io
+import mmap
+import os
+import struct
+import threading
+import time
+
+from rich.console import ConsoleRenderable
+
+from module.logger import HTMLConsole, Highlighter, WEB_THEME, logger
+from module.webui.utils import DARK_TERMINAL_THEME, LIGHT_TERMINAL_THEME, LOG_CODE_FORMAT
+
+LOG_RING_FOLDER = './log/webui'
+LOG_RING_MAGIC = b'ALASRING'
+# magic, slots, capacity, generation, head, written
+#   slots: Number of records indexed
+#   capacity: Size of data region in bytes
+#   generation: Changes when the ring is re-created, readers should restart from the beginning
+#   head: Sequence number of the next record
+#   written: Total bytes written to data region, records are written at `written % capacity`
+LOG_RING_HEADER = struct.Struct('<8sIIQQQ')
+# seq, position, length
+#   position: Value of `written` before writing the record
+LOG_RING_SLOT = struct.Struct('<QQI')
+
+
+class LogRecord:
+    """
+    A log line rendered for WebUI.
+    """
+    __slots__ = ('seq', 'text', 'dark', 'light')
+
+    def __init__(self, seq, text, dark, light):
+        """
+        Args:
+            seq (int): Sequence number
+            text (str): Plain text without color
+            dark (str): HTML in dark theme
+            light (str): HTML in light theme
+        """
+        self.seq = seq
+        self.text = text
+        self.dark = dark
+        self.light = light
+
+    def encode(self):
+        return '\x00'.join([self.text, self.dark, self.light]).encode('utf-8')
+
+    @classmethod
+    def decode(cls, seq, data):
+        parts = data.decode('utf-8', errors='replace').split('\x00', 2)
+        if len(parts) != 3:
+            return cls(seq, '', '', '')
+        return cls(seq, *parts)
+
+    def html(self, dark=True):
+        return self.dark if dark else self.light
+
+
+class LogRenderer:
+    """
+    Render log renderables into HTML of both themes, once, in the process that logs.
+    """
+
+    def __init__(self):
+        # Output is only recorded, console file is dropped after each render
+        self.console = HTMLConsole(
+            file=io.StringIO(),
+            force_terminal=False,
+            force_interactive=False,
+            width=80,
+            color_system="truecolor",
+            markup=False,
+            record=True,
+            safe_box=False,
+            highlighter=Highlighter(),
+            theme=WEB_THEME,
+        )
+
+    def render(self, renderable):
+        """
+        Args:
+            renderable (ConsoleRenderable, str):
+
+        Returns:
+            tuple[str, str, str]: text, dark, light
+        """
+        self.console.print(renderable)
+        self.console.file = io.StringIO()
+        dark = self.console.export_html(
+            theme=DARK_TERMINAL_THEME, clear=False, code_format=LOG_CODE_FORMAT, inline_styles=True)
+        light = self.console.export_html(
+            theme=LIGHT_TERMINAL_THEME, clear=False, code_format=LOG_CODE_FORMAT, inline_styles=True)
+        text = self.console.export_text(clear=True, styles=False)
+        return text, dark, light
+
+
+class LogRing:
+    """
+    Rendered log records of an Alas instance, in a memory-mapped file.
+
+    The instance process renders each log line once and appends it, WebUI sessions tail from
+    the last sequence number they have seen, so log lines are never rendered again, no matter
+    how many browser tabs are open.
+
+    File layout:
+        LOG_RING_HEADER
+        LOG_RING_SLOT * slots, record `seq` is indexed at `seq % slots`
+        Data region, records are written one after another, wrapping around
+
+    There is only one writer at a time, the instance process, or WebUI after the instance process exited.
+    Readers don't lock, they drop records that are overwritten while being read.
+    """
+
+    def __init__(self, config_name, slots=512, capacity=4 * 1024 * 1024, folder=LOG_RING_FOLDER):
+        """
+        Args:
+            config_name (str):
+            slots (int): Max number of records kept.
+            capacity (int): Max bytes of records kept.
+            folder (str):
+        """
+        self.file = os.path.join(folder, f'{config_name}.ring')
+        self.slots = slots
+        self.capacity = capacity
+        self.data_start = LOG_RING_HEADER.size + LOG_RING_SLOT.size * slots
+        self.size = self.data_start + capacity
+        self.mm = None
+        self.renderer = None
+        self.lock = threading.Lock()
+
+    def create(self):
+        """
+        Create an empty ring, existing records are dropped.
+        """
+        self.close()
+        try:
+            os.makedirs(os.path.dirname(self.file), exist_ok=True)
+            with open(self.file, 'wb') as f:
+                f.write(LOG_RING_HEADER.pack(LOG_RING_MAGIC, self.slots, self.capacity, time.time_ns(), 0, 0))
+                f.truncate(self.size)
+        except OSError as e:
+            # File may be mapped by another process on Windows
+            logger.warning(f'Failed to create log ring {self.file}: {e}')
+
+    def open(self):
+        """
+        Returns:
+            bool: If opened a valid ring.
+        """
+        if self.mm is not None:
+            return True
+        try:
+            with open(self.file, 'r+b') as f:
+                mm = mmap.mmap(f.fileno(), self.size)
+        except (FileNotFoundError, ValueError, OSError):
+            return False
+        magic, slots, capacity, _, _, _ = LOG_RING_HEADER.unpack_from(mm, 0)
+        if magic != LOG_RING_MAGIC or slots != self.slots or capacity != self.capacity:
+            mm.close()
+            return False
+        self.mm = mm
+        return True
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+
+    def _header(self):
+        """
+        Returns:
+            tuple[int, int, int]: generation, head, written
+        """
+        _, _, _, generation, head, written = LOG_RING_HEADER.unpack_from(self.mm, 0)
+        return generation, head, written
+
+    def append(self, text, dark, light):
+        """
+        Args:
+            text (str):
+            dark (str):
+            light (str):
+        """
+        with self.lock:
+            if not self.open():
+                self.create()
+                if not self.open():
+                    return
+            mm = self.mm
+            _, head, written = self._header()
+            data = LogRecord(head, text, dark, light).encode()
+            # A huge traceback should not flush all other records, keep its beginning in plain text
+            limit = self.capacity // 4
+            if len(data) > limit:
+                text = text[:limit // 8]
+                escaped = f'<pre>{html.escape(text)}\n...</pre>'
+                data = LogRecord(head, text, escaped, escaped).encode()
+            length = len(data)
+
+            offset = written % self.capacity
+            first = min(length, self.capacity - offset)
+            mm[self.data_start + offset:self.data_start + offset + first] = data[:first]
+            if first < length:
+                mm[self.data_start:self.data_start + length - first] = data[first:]
+            LOG_RING_SLOT.pack_into(mm, LOG_RING_HEADER.size + LOG_RING_SLOT.size * (head % self.slots),
+                                    head, written, length)
+            # Publish the record by moving head at last
+            struct.pack_into('<QQ', mm, LOG_RING_HEADER.size - 16, head + 1, written + length)
+
+    def put(self, renderable):
+        """
+        Render and append a renderable, used as the func of `set_func_logger()`.
+
+        Args:
+            renderable (ConsoleRenderable, str):
+        """
+        if self.renderer is None:
+            self.renderer = LogRenderer()
+        self.append(*self.renderer.render(renderable))
+
+    def _read_data(self, position, length):
+        offset = position % self.capacity
+        first = min(length, self.capacity - offset)
+        data = self.mm[self.data_start + offset:self.data_start + offset + first]
+        if first < length:
+            data += self.mm[self.data_start:self.data_start + length - first]
+        return data
+
+    def read(self, since=None, limit=400):
+        """
+        Args:
+            since (int): Sequence number of the last record that has been read, None to read from the beginning.
+            limit (int): Max number of records to read.
+
+        Returns:
+            tuple[int, list[LogRecord]]: generation, records after `since`.
+        """
+        if not self.open():
+            return 0, []
+        generation, head, written = self._header()
+        start = max(head - min(limit, self.slots), 0)
+        if since is not None:
+            start = max(start, since + 1)
+        records = []
+        for seq in range(start, head):
+            slot_seq, position, length = LOG_RING_SLOT.unpack_from(
+                self.mm, LOG_RING_HEADER.size + LOG_RING_SLOT.size * (seq % self.slots))
+            if slot_seq != seq or written - position > self.capacity:
+                continue
+            data = self._read_data(position, length)
+            # Overwritten while reading
+            if self._header()[2] - position > self.capacity:
+                continue
+            records.append(LogRecord.decode(seq, data))
+        return generation, records
+
+    def last(self):
+        """
+        Returns:
+            LogRecord: The last record, or None if empty.
+        """
+        _, records = self.read(limit=1)
+        return records[-1] if records else None
+
+    def __len__(self):
+        # Number of records ever appended
+        if not self.open():
+            return 0
+        return self._header()[1]
@@ -0,0 +1,76 @@
+import asyncio
+import secrets
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from module.config.utils import alas_instance
+from module.device.preview import PreviewSlot
+
+# Preview is streamed by plain HTTP, outside of pywebio sessions.
+# Only sessions that passed login get this token, see `preview_html()`.
+PREVIEW_TOKEN = secrets.token_urlsafe(16)
+# Seconds between checks of new frames
+PREVIEW_POLL = 0.05
+PREVIEW_BOUNDARY = 'frame'
+
+
+def content_type(data):
+    if data[:4] == b'RIFF':
+        return b'image/webp'
+    return b'image/jpeg'
+
+
+async def preview_stream(request: Request):
+    """
+    MJPEG stream of an Alas instance, GET /preview/{config_name}?token=PREVIEW_TOKEN
+
+    The instance process encodes frames only when this stream is keeping a heartbeat,
+    and browsers close the stream once the <img> is removed.
+    """
+    if not secrets.compare_digest(request.query_params.get('token', ''), PREVIEW_TOKEN):
+        return Response(status_code=403)
+    config_name = request.path_params['config_name']
+    if config_name not in alas_instance():
+        return Response(status_code=404)
+
+    async def frames():
+        slot = PreviewSlot(config_name)
+        seq = 0
+        try:
+            while not await request.is_disconnected():
+                slot.heartbeat()
+                seq, data = slot.read(since=seq)
+                if data is not None:
+                    yield b''.join([
+                        b'--', PREVIEW_BOUNDARY.encode(), b'\r\n',
+                        b'Content-Type: ', content_type(data), b'\r\n',
+                        b'Content-Length: ', str(len(data)).encode(), b'\r\n\r\n',
+                        data, b'\r\n',
+                    ])
+                await asyncio.sleep(PREVIEW_POLL)
+        finally:
+            slot.close()
+
+    return StreamingResponse(frames(), media_type=f'multipart/x-mixed-replace; boundary={PREVIEW_BOUNDARY}')
+
+
+def preview_routes():
+    """
+    Returns:
+        list[Route]:
+    """
+    return [Route('/preview/{config_name}', preview_stream)]
+
+
+def preview_html(config_name):
+    """
+    Args:
+        config_name (str):
+
+    Returns:
+        str: HTML of the preview stream.
+    """
+    return f'<img class="alas-preview" src="/preview/{config_name}?token={PREVIEW_TOKEN}" ' \
+           f'style="width: 100%; max-width: 640px;">'
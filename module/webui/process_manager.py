@@ -2,13 +2,11 @@ import argparse
 # 此文件专门用于管理 Alas 运行时各实例进程的生存周期及其子进程。
 # 负责多账号多开时的进程池维护、状态（运行中、停止、异常）追踪及进程间通信的安全处理逻辑。
 import os
-import queue
 import threading
 from multiprocessing import Process
 from typing import Dict, List, Union
 
 import inflection
-from rich.console import Console, ConsoleRenderable
 
 # Since this file does not run under the same process or subprocess of app.py
 # the following code needs to be repeated
@@ -21,6 +19,7 @@ from module.logger import logger, set_file_logger, set_func_logger
 from module.submodule.submodule import load_mod
 from module.submodule.utils import get_available_func, get_available_mod, get_available_mod_func, get_config_mod, \
     get_func_mod, list_mod_instance
+from module.webui.log_ring import LogRing
 from module.webui.setting import State
 
 
@@ -29,13 +28,12 @@ class ProcessManager:
 
     def __init__(self, config_name: str = "alas") -> None:
         self.config_name = config_name
-        self._renderable_queue: queue.Queue[ConsoleRenderable] = State.manager.Queue()
-        self.renderables: List[ConsoleRenderable] = []
+        # Logs are rendered in instance process and tailed by WebUI sessions
+        self.log_ring = LogRing(config_name)
+        self.log_ring.create()
         self.renderables_max_length = 400
-        self.renderables_reduce_length = 80
         self._process: Process = None
         self._process_locks: Dict[str, threading.Lock] = {}
-        self.thd_log_queue_handler: threading.Thread = None
 
     def start(self, func, ev: threading.Event = None) -> None:
         if not self.alive:
@@ -44,7 +42,6 @@ class ProcessManager:
             args = (
                 self.config_name,
                 func,
-                self._renderable_queue,
                 ev,
             )
             self._process = Process(
@@ -52,18 +49,6 @@ class ProcessManager:
                 args=args,
             )
             self._process.start()
-            self.start_log_queue_handler()
-
-    def start_log_queue_handler(self):
-        if (
-            self.thd_log_queue_handler is not None
-            and self.thd_log_queue_handler.is_alive()
-        ):
-            return
-        self.thd_log_queue_handler = threading.Thread(
-            target=self._thread_log_queue_handler
-        )
-        self.thd_log_queue_handler.start()
 
     def stop(self) -> None:
         try:
@@ -75,28 +60,12 @@ class ProcessManager:
         with lock:
             if self.alive:
                 self._process.kill()
-                self.renderables.append(
+                # Instance process is the writer of log ring, WebUI takes over after killing it
+                self.log_ring.put(
                     f"[{self.config_name}] exited. Reason: Manual stop\n"
                 )
-            if self.thd_log_queue_handler is not None:
-                self.thd_log_queue_handler.join(timeout=1)
-                if self.thd_log_queue_handler.is_alive():
-                    logger.warning(
-                        "Log queue handler thread does not stop within 1 seconds"
-                    )
         logger.info(f"[{self.config_name}] exited")
 
-    def _thread_log_queue_handler(self) -> None:
-        while self.alive:
-            try:
-                log = self._renderable_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            self.renderables.append(log)
-            if len(self.renderables) > self.renderables_max_length:
-                self.renderables = self.renderables[self.renderables_reduce_length :]
-        logger.info("End of log queue handler loop")
-
     @property
     def alive(self) -> bool:
         if self._process is not None:
@@ -108,13 +77,11 @@ class ProcessManager:
     def state(self) -> int:
         if self.alive:
             return 1
-        elif len(self.renderables) == 0:
+        record = self.log_ring.last()
+        if record is None:
             return 2
         else:
-            console = Console(no_color=True)
-            with console.capture() as capture:
-                console.print(self.renderables[-1])
-            s = capture.get().strip()
+            s = record.text.strip()
             if s.endswith("Reason: Manual stop"):
                 return 2
             elif s.endswith("Reason: Finish"):
@@ -135,7 +102,7 @@ class ProcessManager:
 
     @staticmethod
     def run_process(
-        config_name, func: str, q: queue.Queue, e: threading.Event = None
+        config_name, func: str, e: threading.Event = None
     ) -> None:
         parser = argparse.ArgumentParser()
         parser.add_argument(
@@ -151,7 +118,7 @@ class ProcessManager:
             logger.info("Electron detected, remove log output to stdout")
             from module.logger import console_hdlr
             logger.removeHandler(console_hdlr)
-        set_func_logger(func=q.put)
+        set_func_logger(func=LogRing(config_name).put)
 
         from module.config.config import AzurLaneConfig
 
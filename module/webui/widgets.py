@@ -203,23 +203,26 @@ class RichLog:
 
     def put_log(self, pm: ProcessManager) -> Generator:
         yield
+        dark = self.terminal_theme is DARK_TERMINAL_THEME
         try:
             while True:
-                last_idx = len(pm.renderables)
-                html = "".join(map(self.render, pm.renderables[:]))
+                # Logs are rendered in instance process, tail the log ring by sequence number
+                generation, records = pm.log_ring.read(limit=pm.renderables_max_length)
                 self.reset()
-                self.extend(html)
-                counter = last_idx
+                self.extend("".join([record.html(dark) for record in records]))
+                last_seq = records[-1].seq if records else None
+                counter = len(records)
+                # Reset DOM after a while, so browser won't hold too many lines
                 while counter < pm.renderables_max_length * 2:
                     yield
-                    idx = len(pm.renderables)
-                    if idx < last_idx:
-                        last_idx -= pm.renderables_reduce_length
-                    if idx != last_idx:
-                        html = "".join(map(self.render, pm.renderables[last_idx:idx]))
-                        self.extend(html)
-                        counter += idx - last_idx
-                        last_idx = idx
+                    new_generation, records = pm.log_ring.read(since=last_seq, limit=pm.renderables_max_length)
+                    if new_generation != generation:
+                        # Log ring re-created
+                        break
+                    if records:
+                        self.extend("".join([record.html(dark) for record in records]))
+                        counter += len(records)
+                        last_seq = records[-1].seq
         except SessionException:
             pass
 
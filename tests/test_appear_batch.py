@@ -0,0 +1,46 @@
+import numpy as np
+
+from module.base.base import ModuleBase
+from module.base.button import Button
+
+
+class FakeDevice:
+    def __init__(self, image):
+        self.image = image
+        self.frame_count = 1
+
+    def stuck_record_add(self, button):
+        pass
+
+
+class FakeConfig:
+    BUTTON_OFFSET = (30, 30)
+
+
+def new_module(image):
+    return ModuleBase(config=FakeConfig(), device=FakeDevice(image))
+
+
+def appear_temporary(module, color):
+    # Button is freed after this call, its id can be reused by the next one
+    return module.appear(Button(area=(10, 10, 50, 50), color=color, button=(10, 10, 50, 50)))
+
+
+def test_temporary_buttons_on_same_frame():
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    module = new_module(image)
+    for _ in range(20):
+        assert appear_temporary(module, (0, 0, 0))
+        assert not appear_temporary(module, (255, 255, 255))
+
+
+def test_same_button_reuses_result():
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    module = new_module(image)
+    button = Button(area=(10, 10, 50, 50), color=(0, 0, 0), button=(10, 10, 50, 50))
+    assert module.appear(button)
+    # Result of this frame is reused even if image is modified in place
+    image[:] = 255
+    assert module.appear(button)
+    module.device.frame_count += 1
+    assert not module.appear(button)
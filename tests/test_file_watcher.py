@@ -0,0 +1,106 @@
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import module.config.watcher as config_watcher
+from deploy.atomic import atomic_write
+from module.config.file_watcher import FolderWatcher, InotifyWatcher, Win32Watcher
+from module.config.watcher import ConfigWatcher
+
+BACKENDS = [FolderWatcher]
+if sys.platform.startswith('linux'):
+    BACKENDS.append(InotifyWatcher)
+elif sys.platform == 'win32':
+    BACKENDS.append(Win32Watcher)
+EVENT_BACKENDS = [backend for backend in BACKENDS if backend is not FolderWatcher]
+
+
+def later(delay, func, *args):
+    thread = threading.Thread(target=lambda: (time.sleep(delay), func(*args)), daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    file = tmp_path / 'alas.json'
+    file.write_text('{}', encoding='utf-8')
+    monkeypatch.setattr(config_watcher, 'filepath_config', lambda name: str(tmp_path / f'{name}.json'))
+    return file
+
+
+@pytest.fixture(params=BACKENDS, ids=lambda backend: backend.__name__)
+def backend(request, monkeypatch):
+    watchers = []
+
+    def get_folder_watcher(folder):
+        watcher = request.param(folder)
+        watchers.append(watcher)
+        return watcher
+
+    monkeypatch.setattr(config_watcher, 'get_folder_watcher', get_folder_watcher)
+    yield request.param
+    for watcher in watchers:
+        watcher.close()
+
+
+@pytest.mark.parametrize('backend', EVENT_BACKENDS, ids=lambda backend: backend.__name__)
+def test_write_wakes_wait(tmp_path, backend):
+    file = tmp_path / 'alas.json'
+    file.write_text('{}', encoding='utf-8')
+    watcher = backend(str(tmp_path))
+    try:
+        later(0.2, atomic_write, str(file), '{"Alas": {}}')
+        start = time.perf_counter()
+        assert watcher.wait(10)
+        assert time.perf_counter() - start < 5
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize('backend', BACKENDS, ids=lambda backend: backend.__name__)
+def test_interrupt(tmp_path, backend):
+    watcher = backend(str(tmp_path))
+    try:
+        later(0.2, watcher.interrupt)
+        start = time.perf_counter()
+        assert watcher.wait(10)
+        assert time.perf_counter() - start < 5
+
+        # Interrupt before wait
+        watcher.interrupt()
+        start = time.perf_counter()
+        assert watcher.wait(10)
+        assert time.perf_counter() - start < 0.5
+    finally:
+        watcher.close()
+
+
+def test_wait_change_on_write(config_file, backend):
+    watcher = ConfigWatcher()
+    watcher.start_watching()
+    later(0.2, atomic_write, str(config_file), '{"Alas": {}}')
+    start = time.perf_counter()
+    assert watcher.wait_change(datetime.now() + timedelta(seconds=30))
+    assert time.perf_counter() - start < 5
+    assert watcher.should_reload()
+
+
+def test_wait_change_on_stop_event(config_file, backend):
+    watcher = ConfigWatcher()
+    watcher.start_watching()
+    stop_event = threading.Event()
+    later(0.2, stop_event.set)
+    start = time.perf_counter()
+    assert watcher.wait_change(datetime.now() + timedelta(seconds=30), stop_event=stop_event)
+    assert time.perf_counter() - start < 5
+
+
+def test_wait_change_timeout(config_file, backend):
+    watcher = ConfigWatcher()
+    watcher.start_watching()
+    assert not watcher.wait_change(datetime.now() + timedelta(seconds=0.3))
+    assert not watcher.should_reload()
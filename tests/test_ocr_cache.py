@@ -0,0 +1,62 @@
+import numpy as np
+
+from module.ocr.ocr_cache import OcrCache
+
+
+class PaddingModel:
+    """
+    Like cnocr, pads all crops in one call to the widest one, and padding changes predictions.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def atomic_ocr_for_single_lines(self, image_list, alphabet=None):
+        self.calls += 1
+        width = max(image.shape[1] for image in image_list)
+        return [list(f'{int(image.sum()) % 100}:{width - image.shape[1]}') for image in image_list]
+
+
+def crop(width, value):
+    return np.full((20, width), value, dtype=np.uint8)
+
+
+def test_mixed_hit_miss_same_as_uncached():
+    model = PaddingModel()
+    cache = OcrCache()
+    narrow = crop(40, 1)
+    wide = crop(80, 2)
+
+    # `narrow` is cached alone, without padding
+    assert cache.atomic_ocr_for_single_lines(model, 'azur_lane', [narrow]) \
+           == model.atomic_ocr_for_single_lines([narrow])
+    # Then in a batch with a wider crop
+    assert cache.atomic_ocr_for_single_lines(model, 'azur_lane', [narrow, wide]) \
+           == model.atomic_ocr_for_single_lines([narrow, wide])
+    assert cache.atomic_ocr_for_single_lines(model, 'azur_lane', [wide, narrow]) \
+           == model.atomic_ocr_for_single_lines([wide, narrow])
+
+
+def test_identical_request_skips_model():
+    model = PaddingModel()
+    cache = OcrCache()
+    image_list = [crop(40, 1), crop(60, 3)]
+    expected = cache.atomic_ocr_for_single_lines(model, 'azur_lane', image_list, alphabet='0123456789')
+    calls = model.calls
+    result = cache.atomic_ocr_for_single_lines(
+        model, 'azur_lane', [image.copy() for image in image_list], alphabet='0123456789')
+    assert result == expected
+    assert model.calls == calls
+    assert cache.stats()['hit'] == 1
+
+    # Different alphabet is a different request
+    cache.atomic_ocr_for_single_lines(model, 'azur_lane', image_list, alphabet='0123456789/')
+    assert model.calls == calls + 1
+
+
+def test_lru_size():
+    model = PaddingModel()
+    cache = OcrCache(size=2)
+    for value in range(3):
+        cache.atomic_ocr_for_single_lines(model, 'azur_lane', [crop(40, value)])
+    assert cache.stats()['cached'] == 2
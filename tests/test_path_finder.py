@@ -0,0 +1,47 @@
+import logging
+import random
+
+import pytest
+
+from dev_tools.path_benchmark import find_path_initial_legacy, import_all_maps, prepare, randomize, snapshot
+from module.logger import logger
+from module.map.map_base import CampaignMap
+
+logger.setLevel(logging.WARNING)
+MAPS = import_all_maps()
+
+
+def assert_same_routes(campaign_map, location, has_ambush=True, has_enemy=True):
+    find_path_initial_legacy(campaign_map, location, has_ambush=has_ambush, has_enemy=has_enemy)
+    legacy = snapshot(campaign_map)
+    campaign_map.find_path_initial(location, has_ambush=has_ambush, has_enemy=has_enemy)
+    new = snapshot(campaign_map)
+    # Routes follow connections, same cost and connection on every grid means every route is the same
+    assert new == legacy, f'Different routes from {location}, has_ambush={has_ambush}, has_enemy={has_enemy}'
+
+
+@pytest.mark.parametrize('name, campaign_map, config', MAPS, ids=[name for name, _, _ in MAPS])
+def test_same_routes_as_legacy(name, campaign_map, config):
+    prepare(campaign_map, config)
+    for grid in campaign_map:
+        if grid.is_sea:
+            assert_same_routes(campaign_map, grid.location)
+
+    # Enemies detected on map
+    rng = random.Random(name)
+    randomize(campaign_map, rng)
+    seas = [grid.location for grid in campaign_map if grid.is_sea]
+    for location in rng.sample(seas, min(4, len(seas))):
+        for has_ambush in [True, False]:
+            for has_enemy in [True, False]:
+                assert_same_routes(campaign_map, location, has_ambush=has_ambush, has_enemy=has_enemy)
+
+
+def test_shape_resets_path_finder():
+    campaign_map = CampaignMap()
+    campaign_map.shape = 'C3'
+    campaign_map.grid_connection_initial()
+    assert campaign_map.path_finder.size == 9
+    campaign_map.shape = 'D4'
+    assert campaign_map.path_finder.size == 16
+    assert campaign_map.path_finder.grids == list(campaign_map.grids.values())
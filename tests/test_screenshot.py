@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from module.base.timer import Timer
+from module.device.screenshot import Screenshot
+
+
+class FakeConfig:
+    SCREENSHOT_PREFETCH = False
+    SCREENSHOT_DIFF = True
+    SCREEN_PREVIEW = False
+    Error_SaveError = True
+    Error_ScreenshotLength = 1
+    ERROR_SCREENSHOT_BUDGET = 64 * 1024 * 1024
+
+
+class FakeScreenshot(Screenshot):
+    """
+    Screenshot that decodes into frame buffers like nemu_ipc and ldopengl, each frame filled with its serial.
+    """
+
+    def __init__(self, prefetch=False):
+        self.config = FakeConfig()
+        self.config.SCREENSHOT_PREFETCH = prefetch
+        self.serial = 0
+        self.action_time = 0.
+        self._screen_size_checked = True
+        self._screen_black_checked = True
+        self._screenshot_interval = Timer(0)
+
+    def _screenshot_capture(self):
+        self.serial += 1
+        image = self.frame_buffer.get((720, 1280, 3))
+        image[:] = self.serial % 256
+        return image
+
+    def close(self):
+        if self.screenshot_prefetch is not None:
+            self.screenshot_prefetch.stop()
+
+
+@pytest.fixture(params=[False, True], ids=['on_demand', 'prefetch'])
+def device(request):
+    device = FakeScreenshot(prefetch=request.param)
+    yield device
+    device.close()
+
+
+def test_image_kept_across_screenshot(device):
+    kept = device.screenshot()
+    value = int(kept[0, 0, 0])
+    kept_copy = kept.copy()
+    for _ in range(5):
+        image = device.screenshot()
+        assert image is not kept
+        assert int(image[0, 0, 0]) != value
+    assert np.array_equal(kept, kept_copy)
+
+
+def test_zero_copy(device):
+    with device.screenshot_zero_copy():
+        device.screenshot()
+        device.screenshot()
+        # Frames in the block are frame buffers
+        assert device.frame_buffer._entry(device.image) is not None
+        last = device.image
+
+    # Last frame is copied out when the block ends
+    assert device.image is not last
+    assert device.frame_buffer._entry(device.image) is None
+    kept = device.image
+    kept_copy = kept.copy()
+    for _ in range(5):
+        device.screenshot()
+    assert np.array_equal(kept, kept_copy)